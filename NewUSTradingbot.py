@@ -1,22 +1,29 @@
+import sys
+from startup_profile import startup_profile
+if '--profile-startup' in sys.argv:
+    # Before anything heavy is imported, so the report covers every module
+    startup_profile.trace_imports()
+
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout,
                              QHBoxLayout, QFormLayout, QGroupBox, QLabel,
                              QSpinBox, QDoubleSpinBox, QCheckBox, QPushButton,
-                             QLineEdit, QComboBox, QMessageBox, QFrame, QTableWidgetItem)
-from PyQt5.QtCore import Qt, QSettings, QDateTime, QTimer
+                             QLineEdit, QComboBox, QMessageBox, QFrame)
+from PyQt5.QtCore import Qt, QSettings, QDateTime, QTimer, pyqtSignal
 from PyQt5.QtGui import QFont, QPalette, QColor
-import sys
 import json
-import asyncio
 from datetime import datetime
-from strategies.strategy_manager import StrategyManager
-from strategies.strategy2  import Strategy2
-from market_data_handler import MarketDataHandler
 from config import TradingConfig as Config
-from trading_dashboard import TradingDashboard
+from engine_thread import EngineThread
+
+# Imported on first use: together they pull in pandas, numpy, talib and ib_insync
+ENGINE_MODULES = ('trading_session', 'trading_dashboard', 'dashboard_feed')
+
+startup_profile.mark("GUI modules imported")
 
 
 class SettingsWindow(QMainWindow):
     USER_LOGIN = "Kish19691969"
+    frame_ready = pyqtSignal(object)  # Dashboard frames from the engine thread
     def __init__(self):
         super().__init__()
         # Add this line at the beginning of __init__
@@ -25,34 +32,16 @@ class SettingsWindow(QMainWindow):
         self.setWindowTitle(f"Trading Bot Configuration")
         self.setMinimumSize(1000, 1600)  # Increased window size
 
-        # Initialize the market data handler first
-        self.market_data_handler = MarketDataHandler()  # This creates the handler with default client_id=199
-
         # Initialize config
         self.config = Config()
 
-        # Create the dashboard instance
-        self.trading_dashboard = TradingDashboard(
-            account_id="",  # This will be set later
-            trading_start="09:30",
-            trading_end="16:00",
-            max_positions=5,
-            max_position_dollars=5000,
-            min_stock_price=5,
-            max_stock_price=200,
-            strategy_settings={}
-        )
-
-
-        self.strategy_manager = StrategyManager(
-            dashboard = self.trading_dashboard,
-            market_data = self.market_data_handler,
-            config = self.config
-        )
-
-        # Register Strategy2
-        self.strategy_manager.register_strategy(Strategy2)
-
+        # The dashboard and the trading session are built when trading starts
+        self.trading_dashboard = None
+        self.session = None
+        self.market_data_handler = None
+        self.strategy_manager = None
+        self._init_task = None
+        self._shutting_down = False
 
         # Set default font for the entire application
         self.default_font = QFont("Arial", 12)  # Increased base font size
@@ -73,9 +62,66 @@ class SettingsWindow(QMainWindow):
         self.create_control_buttons()
         self.add_position_size_example()
 
+        startup_profile.mark("Settings window built")
+
+        # Market data, strategies and execution run on the engine thread. It imports the
+        # engine modules while the user reviews the settings; ib_insync binds to its loop
+        self.engine = EngineThread()
+        self.engine.start()
+        self.engine.call(self._preload_engine)
+
         # Load any saved settings
         self.load_settings()
 
+    @staticmethod
+    def _preload_engine():
+        import importlib
+        for module in ENGINE_MODULES:
+            try:
+                importlib.import_module(module)
+            except Exception as e:
+                # build_engine() imports them again and reports the error
+                print(f"Error preloading {module}: {e}")
+                return
+        startup_profile.mark("Engine modules preloaded")
+
+    def build_engine(self):
+        """Create the trading dashboard and the trading session; once only"""
+        if self.session is not None:
+            return
+        # Already loaded by the engine thread unless the user was quicker than the preload
+        from dashboard_feed import DashboardFeed
+        from trading_dashboard import TradingDashboard
+        from trading_session import TradingSession
+
+        # Create the dashboard instance
+        self.trading_dashboard = TradingDashboard(
+            account_id="",  # This will be set later
+            trading_start="09:30",
+            trading_end="16:00",
+            max_positions=5,
+            max_position_dollars=5000,
+            min_stock_price=5,
+            max_stock_price=200,
+            strategy_settings={}
+        )
+        self.trading_dashboard.closed.connect(self.shutdown)
+        self.trading_dashboard.set_log_level(self.config.log_level)
+        self.trading_dashboard.set_log_capacity(self.config.log_max_lines)
+
+        # Market data, strategies and execution; the same session runs headless in headless_runner.py
+        self.session = TradingSession(self.trading_dashboard, self.config)
+        self.market_data_handler = self.session.market_data
+        self.strategy_manager = self.session.strategy_manager
+
+        # The dashboard only receives a compact frame of what changed, at a fixed rate, through a queued signal
+        self.dashboard_feed = DashboardFeed(self.strategy_manager, self.frame_ready.emit)
+        self.frame_ready.connect(self.apply_frame)
+        self.trading_dashboard.chart_requested.connect(
+            lambda symbol, timeframe: self.engine.call(self.dashboard_feed.set_chart, symbol, timeframe))
+        self.engine.call_every(1 / self.config.ui_refresh_hz, self.dashboard_feed.publish)
+        startup_profile.mark("Trading engine built")
+
     def add_user_info(self):
         info_group = QGroupBox("Session Information")
         layout = QFormLayout()
@@ -440,7 +486,8 @@ class SettingsWindow(QMainWindow):
 
         self.main_layout.addLayout(button_layout)
 
-    def save_settings(self):
+    def collect_settings(self):
+        """The settings as saved to file and applied by TradingSession.configure()"""
         settings = {
             "global": {
                 "account_id": self.account_id.text(),
@@ -464,6 +511,10 @@ class SettingsWindow(QMainWindow):
                 "stop_loss_percent": widgets["stop_loss"].value(),
                 "max_trades_per_day": widgets["max_trades"].value()
             }
+        return settings
+
+    def save_settings(self):
+        settings = self.collect_settings()
 
         try:
             # Save to file with timestamp
@@ -584,16 +635,26 @@ class SettingsWindow(QMainWindow):
         msg.setDefaultButton(QMessageBox.No)
 
         if msg.exec_() == QMessageBox.Yes:
-            QApplication.quit()
+            self.shutdown()
 
-    # Add this method to your SettingsWindow class
     def closeEvent(self, event):
-        """Handle cleanup when window is closed"""
-        loop = asyncio.get_event_loop()
-        if hasattr(self, 'market_data_handler'):
-            loop.create_task(self.market_data_handler.disconnect())
+        """Closing the settings window before trading starts exits the application"""
+        self.shutdown()
         event.accept()
 
+    def shutdown(self):
+        """Save state, disconnect from IB, stop the engine thread and quit; runs when the app's window closes"""
+        if self._shutting_down:
+            return
+        self._shutting_down = True
+        if self.session is not None:
+            try:
+                self.engine.submit(self.session.stop()).result(timeout=15)
+            except Exception as e:
+                print(f"Error stopping the trading engine: {e}")
+        self.engine.stop()
+        QApplication.quit()
+
     def start_trading(self):
         # Validate settings before starting
         if not self.validate_settings():
@@ -653,13 +714,8 @@ class SettingsWindow(QMainWindow):
                     for name in enabled_strategies
                 }
 
-                # Initialize the market data handler if not already initialized
-                if not hasattr(self, 'market_data_handler'):
-                    self.market_data_handler = MarketDataHandler(client_id=199)
-                    self.market_data_handler.user_login = self.user_login
-
-                # Connect the market data handler's logger to the dashboard
-                self.market_data_handler.dashboard_logger = self.trading_dashboard.add_to_system_log
+                self.build_engine()
+                self.trading_dashboard.latency_monitor = self.strategy_manager.latency
 
                 # Update the existing dashboard's settings
                 self.trading_dashboard.init_settings(
@@ -673,21 +729,27 @@ class SettingsWindow(QMainWindow):
                     strategy_settings=strategy_settings
                 )
 
+                # Risk limits and per-strategy parameters
+                self.session.configure(self.collect_settings())
+
                 # Start market data initialization
                 self.trading_dashboard.add_to_system_log(
                     "Starting market data initialization sequence..."
                 )
 
-                # Create new async task using asyncio.run
+                # Runs on the engine thread; the window stays responsive meanwhile
                 self.start_async_initialization()
 
                 # Show the trading dashboard
                 self.trading_dashboard.show()
                 self.hide()
+                if startup_profile.tracing:
+                    print(startup_profile.report())
 
             except Exception as e:
                 error_msg = f"Error starting trading: {str(e)}"
-                self.trading_dashboard.add_to_system_log(error_msg)
+                if self.trading_dashboard is not None:
+                    self.trading_dashboard.add_to_system_log(error_msg)
                 msg = QMessageBox()
                 msg.setIcon(QMessageBox.Critical)
                 msg.setFont(self.default_font)
@@ -696,169 +758,72 @@ class SettingsWindow(QMainWindow):
                 msg.exec_()
 
     def start_async_initialization(self):
-        """Helper method to start async initialization"""
-
-        async def init_wrapper():
-            await self.initialize_market_data()
-
-        # Create new event loop for this thread
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-
-        try:
-            loop.run_until_complete(init_wrapper())
-        except Exception as e:
-            self.trading_dashboard.add_to_system_log(f"Error in initialization: {str(e)}")
-        finally:
-            loop.close()
-
-    async def initialize_market_data(self):
-        """Initialize and start market data handling"""
-        try:
-            # Step 1: Connect to IB
-            self.trading_dashboard.add_to_system_log("Connecting to Interactive Brokers...")
-            await self.market_data_handler.connect_ib()
-
-            # Step 2: Load tickers
-            self.trading_dashboard.add_to_system_log("Loading ticker list...")
-            self.market_data_handler.load_tickers()
-
-            # Step 3: Fetch initial historical data
-            self.trading_dashboard.add_to_system_log("Fetching initial market data...")
-            if hasattr(self.market_data_handler, 'fetch_all_market_data'):
-                await self.market_data_handler.fetch_all_market_data()
-
-            # Step 4: Start real-time data subscriptions
-            self.trading_dashboard.add_to_system_log("Starting real-time data subscriptions...")
-            if hasattr(self.market_data_handler, 'start_all_realtime_data'):
-                await self.market_data_handler.start_all_realtime_data()
-
-            self.trading_dashboard.add_to_system_log("Market data system fully initialized")
-
-        except Exception as e:
-            error_msg = f"Error initializing market data: {str(e)}"
-            self.trading_dashboard.add_to_system_log(error_msg)
-            raise
-    def process_market_data(self, data):
-        """
-        Process new market data through strategies
-        Args:
-            data: Dictionary containing:
-                - symbol: The stock symbol
-                - timeframe: The bar timeframe
-                - bar_data: The latest bar data including:
-                    - open, high, low, close, volume
-                    - EMAs (8, 21, 50)
-                    - ATR and ATR ratio
-        """
-        try:
-            # Log the incoming data
-            self.trading_dashboard.add_to_system_log(
-                f"Processing market data for {data['symbol']} on {data['timeframe']}min timeframe"
-            )
-
-            # Process through strategy manager
-            self.strategy_manager.process_market_data(data)
-
-            # Update dashboard UI components
-            self.update_ui(data)
+        """Schedule market data initialization on the engine thread's asyncio loop"""
+        if self._init_task is not None and not self._init_task.done():
+            self.trading_dashboard.add_to_system_log("Market data initialization already running")
+            return
+        self._init_task = self.engine.submit(self.session.start())
+        self._init_task.add_done_callback(self._on_initialization_done)
 
-        except Exception as e:
+    def _on_initialization_done(self, task):
+        # Called on the engine thread; the system log accepts messages from any thread
+        if not task.cancelled() and task.exception() is not None:
             self.trading_dashboard.add_to_system_log(
-                f"Error processing market data: {str(e)}"
+                f"Error in initialization: {str(task.exception())}", "ERROR"
             )
 
-
-    def update_ui(self, data):
-        """
-        Update UI components with latest market data
-        Args:
-            data: Same structure as in process_market_data
-        """
+    def apply_frame(self, frame):
+        """Render one frame from the engine: everything that changed since the previous one"""
+        dashboard = self.trading_dashboard
+        dashboard.setUpdatesEnabled(False)
         try:
-            symbol = data['symbol']
-            timeframe = data['timeframe']
-            bar_data = data['bar_data']
-
-            # Update positions table if this symbol is in our positions
-            if hasattr(self.trading_dashboard, 'positions_table'):
-                self._update_positions_table(symbol, bar_data)
-
-            # Update strategy PnL if available
-            if hasattr(self.trading_dashboard, 'strategy_pnl_table'):
-                self._update_strategy_pnl()
-
-            # Update trade log if there are new trades
-            if hasattr(self.trading_dashboard, 'trade_log_table'):
-                self._update_trade_log()
+            self._update_pnl(frame)
+            dashboard.trade_log_model.append_trades(frame['trades'])
+            dashboard.closed_trades_model.append_trades(frame['closed_trades'])
+            if frame['symbols'] is not None:
+                dashboard.set_chart_symbols(frame['symbols'])
+            if frame['chart'] is not None:
+                dashboard.update_chart(frame['chart'])
+            if frame['heatmap'] is not None:
+                dashboard.update_heatmap(frame['heatmap'])
 
         except Exception as e:
-            self.trading_dashboard.add_to_system_log(
+            dashboard.add_to_system_log(
                 f"Error updating UI with market data: {str(e)}"
             )
-
-
-    def _update_positions_table(self, symbol, bar_data):
-        """Update the positions table with latest price data"""
-        positions_table = self.trading_dashboard.positions_table
-        for row in range(positions_table.rowCount()):
-            symbol_item = positions_table.item(row, 1)  # Assuming symbol is in column 1
-            if symbol_item and symbol_item.text() == symbol:
-                # Update current price
-                current_price_item = positions_table.item(row, 5)  # Assuming current price is in column 5
-                if current_price_item:
-                    current_price_item.setText(f"{bar_data['close']:.2f}")
-
-                # Update PnL
-                entry_price_item = positions_table.item(row, 4)  # Assuming entry price is in column 4
-                shares_item = positions_table.item(row, 3)  # Assuming shares is in column 3
-                if entry_price_item and shares_item:
-                    entry_price = float(entry_price_item.text())
-                    shares = int(shares_item.text())
-                    pnl = (bar_data['close'] - entry_price) * shares
-                    pnl_item = positions_table.item(row, 6)  # Assuming PnL is in column 6
-                    if pnl_item:
-                        pnl_item.setText(f"{pnl:.2f}")
-                        # Update color based on PnL
-                        self.trading_dashboard.update_pnl_color(pnl_item, pnl)
-
-
-    def _update_strategy_pnl(self):
-        """Update the strategy PnL table"""
-        # Get latest PnL from strategy manager for each strategy
-        for strategy_name, strategy in self.strategy_manager.strategies.items():
-            if hasattr(strategy, 'get_pnl'):
-                pnl = strategy.get_pnl()
-                # Find and update the corresponding row in strategy_pnl_table
-                table = self.trading_dashboard.strategy_pnl_table
-                for row in range(table.rowCount()):
-                    if table.item(row, 0).text() == strategy_name:
-                        pnl_item = table.item(row, 1)
-                        if pnl_item:
-                            pnl_item.setText(f"{pnl:.2f}")
-                            self.trading_dashboard.update_pnl_color(pnl_item, pnl)
-
-
-    def _update_trade_log(self):
-        """Update the trade log with any new trades"""
-        # Get latest trades from strategy manager
-        if hasattr(self.strategy_manager, 'get_recent_trades'):
-            recent_trades = self.strategy_manager.get_recent_trades()
-            table = self.trading_dashboard.trade_log_table
-
-            # Add new trades to the top of the table
-            for trade in recent_trades:
-                row = table.rowCount()
-                table.insertRow(row)
-
-                # Assuming trade contains: datetime, symbol, side, price, size, strategy, notes
-                items = [
-                    QTableWidgetItem(str(trade.get(field, '')))
-                    for field in ['datetime', 'symbol', 'side', 'price', 'size', 'strategy', 'notes']
-                ]
-
-                for col, item in enumerate(items):
-                    table.setItem(row, col, item)
+        finally:
+            # One repaint for the whole batch
+            dashboard.setUpdatesEnabled(True)
+
+
+    def _update_pnl(self, frame):
+        """Push the positions, strategy and session PnL of a frame to the dashboard"""
+        positions_model = self.trading_dashboard.positions_model
+        entry_times = frame['entry_times']
+        for key, values in frame['positions'].items():
+            if values is None:
+                positions_model.remove_position(key)
+                continue
+            remaining_size, entry_price, last_price, _, unrealized = values
+            positions_model.set_position(key, entry_times.get(key, ""), key[1], key[0], remaining_size,
+                                         entry_price, last_price, unrealized)
+
+        table = self.trading_dashboard.strategy_pnl_table
+        for strategy_name, (realized, unrealized) in frame['strategies'].items():
+            strategy = self.strategy_manager.strategies.get(strategy_name)
+            # Dashboard rows are in strategy number order
+            if strategy is None or not 1 <= strategy.number <= table.rowCount():
+                continue
+            pnl_item = table.item(strategy.number - 1, 1)
+            if pnl_item:
+                pnl = realized + unrealized
+                pnl_item.setText(f"{pnl:.2f}")
+                self.trading_dashboard.update_pnl_color(pnl_item, pnl)
+
+        if frame['session'] is not None:
+            total = sum(frame['session'])
+            self.trading_dashboard.total_pnl_label.setText(f"{total:.2f}")
+            self.trading_dashboard.update_pnl_color(self.trading_dashboard.total_pnl_label, total)
 
 
 if __name__ == '__main__':
@@ -868,12 +833,21 @@ if __name__ == '__main__':
 
         # Create and set the event loop policy for Windows
         if sys.platform == 'win32':
+            import asyncio
             asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
+        startup_profile.mark("QApplication created")
 
-        # Create and show the window
+        # Create and show the window; the trading engine runs on its own thread
         window = SettingsWindow()
         window.show()
 
+        def report_startup():
+            startup_profile.mark("Settings window interactive")
+            if startup_profile.tracing:
+                print(startup_profile.report())
+        # Runs once the event loop has painted the window
+        QTimer.singleShot(0, report_startup)
+
         # Run the application
         sys.exit(app.exec_())
 
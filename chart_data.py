@@ -0,0 +1,177 @@
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Lines drawn by the chart, after time and OHLC; the EMA columns follow ChartSeries.periods
+CHART_PERIODS = (8, 21, 50)
+TIME, OPEN, HIGH, LOW, CLOSE, FIRST_EMA = range(6)
+
+
+def lttb(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """
+    Indices of the points Largest-Triangle-Three-Buckets keeps to draw y(x) with `threshold` points
+    The first and last points are always kept; every bucket in between keeps the
+    point forming the largest triangle with the point kept before it and the
+    average of the next bucket, which preserves peaks and troughs.
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    # threshold - 2 buckets over the inner points, edges[i]:edges[i + 1] each
+    edges = (np.arange(threshold - 1) * ((n - 2) / (threshold - 2))).astype(np.int64) + 1
+    edges[-1] = n - 1
+    counts = np.diff(edges)
+    average_x = np.add.reduceat(x[:n - 1], edges[:-1]) / counts
+    average_y = np.add.reduceat(y[:n - 1], edges[:-1]) / counts
+    # Third corner of bucket i's triangles: the next bucket's average, the last point for the last bucket
+    next_x = np.append(average_x[1:], x[n - 1]).tolist()
+    next_y = np.append(average_y[1:], y[n - 1]).tolist()
+
+    xs = x.tolist()
+    ys = y.tolist()
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = n - 1
+    kept = 0
+    bounds = edges.tolist()
+    for bucket in range(threshold - 2):
+        start, stop = bounds[bucket], bounds[bucket + 1]
+        ax, ay = xs[kept], ys[kept]
+        cx, cy = next_x[bucket], next_y[bucket]
+        if stop - start > 16:
+            # Twice the triangle area, up to sign, for every point of the bucket at once
+            areas = np.abs((ax - cx) * (y[start:stop] - ay) - (ax - x[start:stop]) * (cy - ay))
+            kept = start + int(areas.argmax())
+        else:
+            best = -1.0
+            for i in range(start, stop):
+                area = abs((ax - cx) * (ys[i] - ay) - (ax - xs[i]) * (cy - ay))
+                if area > best:
+                    best = area
+                    kept = i
+        selected[bucket + 1] = kept
+    return selected
+
+
+class ChartSeries:
+    """
+    Bars, EMAs and ATR of one symbol and timeframe for the dashboard chart
+    Built on the engine thread from the MarketDataHandler history, then extended
+    from the live 5-second bars. Rows are (time, open, high, low, close, EMAs...,
+    ATR); the forming bar is reported separately, with provisional indicators.
+    The EMAs and Wilder ATR follow the same recurrences as TimeframeSeries.
+    """
+
+    def __init__(self, market_data, symbol: str, timeframe, periods: Sequence[int] = CHART_PERIODS,
+                 atr_period: int = 14):
+        self.market_data = market_data
+        self.symbol = symbol
+        self.timeframe = timeframe
+        self.periods = tuple(periods)
+        self.atr_period = atr_period
+        self.width = FIRST_EMA + len(self.periods) + 1
+        # Daily bars only come from the history
+        self.live = timeframe != 'D'
+        self.seconds = 86400 if timeframe == 'D' else int(timeframe) * 60
+        self._alpha = [2.0 / (period + 1) for period in self.periods]
+        self._reset()
+
+    def _reset(self):
+        self._ema: Optional[List[float]] = None
+        self._atr = 0.0
+        self._count = 0
+        self._previous_close = 0.0
+        self._forming: Optional[list] = None  # [start, open, high, low, close, volume]
+        self._raw_seen = 0
+
+    def snapshot(self) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+        """Every completed row from the start of the history, and the forming row"""
+        self._reset()
+        rows = []
+        history = self.market_data.get_timeframe_data(self.symbol, self.timeframe)
+        if history is not None and len(history):
+            dates = pd.to_datetime(history['date'], utc=True)
+            times = (dates - pd.Timestamp(0, tz='UTC')).dt.total_seconds().tolist()
+            columns = [history[name].tolist() for name in ('open', 'high', 'low', 'close', 'volume')]
+            for bar in zip(times, *columns):
+                row = self._add(bar)
+                if row is not None:
+                    rows.append(row)
+        rows.extend(self._read_live())
+        return self._array(rows), self._provisional()
+
+    def poll(self) -> Optional[Tuple[np.ndarray, Optional[np.ndarray]]]:
+        """Rows completed since the last call and the forming row, or None if no live bar arrived"""
+        raw = self._live_bars()
+        if len(raw) == self._raw_seen:
+            return None
+        rows = self._read_live()
+        return self._array(rows), self._provisional()
+
+    def _live_bars(self) -> list:
+        if not self.live:
+            return []
+        # Every timeframe subscription receives the same 5-second bars; read the 1-minute one
+        return self.market_data.live_bars.get(f"{self.symbol}_1", [])
+
+    def _read_live(self) -> List[list]:
+        raw = self._live_bars()
+        if len(raw) < self._raw_seen:
+            self._raw_seen = 0  # Resubscribed; the list was replaced
+        rows = []
+        for bar in raw[self._raw_seen:]:
+            row = self._add((bar['date'].timestamp(), bar['open'], bar['high'], bar['low'],
+                             bar['close'], bar['volume']))
+            if row is not None:
+                rows.append(row)
+        self._raw_seen = len(raw)
+        return rows
+
+    def _add(self, bar) -> Optional[list]:
+        """Merge a bar into the forming one; returns the completed row when a new period starts"""
+        start = bar[0] // self.seconds * self.seconds
+        forming = self._forming
+        if forming is None:
+            self._forming = [start, *bar[1:]]
+            return None
+        if start < forming[0]:
+            return None  # Already part of a completed bar
+        if start == forming[0]:
+            if bar[2] > forming[2]:
+                forming[2] = bar[2]
+            if bar[3] < forming[3]:
+                forming[3] = bar[3]
+            forming[4] = bar[4]
+            forming[5] += bar[5]
+            return None
+        row = self._close(forming)
+        self._forming = [start, *bar[1:]]
+        return row
+
+    def _close(self, bar) -> list:
+        start, open_, high, low, close, _ = bar
+        if self._count == 0:
+            self._ema = [close] * len(self.periods)
+            self._atr = high - low
+        else:
+            self._ema = [ema + alpha * (close - ema) for ema, alpha in zip(self._ema, self._alpha)]
+            previous = self._previous_close
+            true_range = max(high - low, abs(high - previous), abs(low - previous))
+            self._atr += (true_range - self._atr) / min(self._count + 1, self.atr_period)
+        self._previous_close = close
+        self._count += 1
+        return [start, open_, high, low, close, *self._ema, self._atr]
+
+    def _provisional(self) -> Optional[np.ndarray]:
+        """The forming bar with the indicators it would have if it closed now"""
+        if self._forming is None:
+            return None
+        state = (self._ema, self._atr, self._count, self._previous_close)
+        row = self._close(self._forming)
+        self._ema, self._atr, self._count, self._previous_close = state
+        return np.array(row)
+
+    def _array(self, rows: List[list]) -> np.ndarray:
+        return np.array(rows, dtype=np.float64).reshape(-1, self.width)
@@ -0,0 +1,343 @@
+import time
+from datetime import datetime
+from typing import Optional, Tuple
+
+import numpy as np
+from PyQt5.QtCore import QPointF, QRect, QRectF, Qt
+from PyQt5.QtGui import QColor, QFont, QPainter, QPen, QPixmap, QPolygonF
+from PyQt5.QtWidgets import QWidget
+
+from chart_data import CHART_PERIODS, CLOSE, FIRST_EMA, TIME, lttb
+
+ATR = FIRST_EMA + len(CHART_PERIODS)
+# (column, color, label) of the price pane lines, then the ATR pane line
+PRICE_LINES = [(CLOSE, "#202020", "Close")] + [
+    (FIRST_EMA + i, color, f"EMA {period}")
+    for i, (period, color) in enumerate(zip(CHART_PERIODS, ("#1f77b4", "#ff7f0e", "#9467bd")))
+]
+ATR_LINE = (ATR, "#17becf", "ATR")
+
+
+def _polygon(x: np.ndarray, y: np.ndarray) -> QPolygonF:
+    """QPolygonF filled straight from numpy, without a QPointF per point"""
+    polygon = QPolygonF(len(x))
+    pointer = polygon.data()
+    pointer.setsize(len(x) * 16)
+    points = np.frombuffer(pointer, dtype=np.float64)
+    points[0::2] = x
+    points[1::2] = y
+    return polygon
+
+
+def _line_pen(color: str, style=Qt.SolidLine) -> QPen:
+    # Antialiased 1-pixel cosmetic lines stay on the raster engine's fast path; wider pens go
+    # through the stroker and cost over ten times as much per polyline
+    pen = QPen(QColor(color), 1, style)
+    pen.setCosmetic(True)
+    return pen
+
+
+class ChartWidget(QWidget):
+    """
+    Close and EMAs above, ATR below, for one symbol and timeframe
+    Completed bars are drawn into a cached pixmap, each line downsampled with
+    LTTB to one point per pixel column. Bars closing while they fit the current
+    axes are painted onto the pixmap as they arrive, and the forming bar is an
+    overlay repainted on its own; the pixmap is rebuilt only when the view
+    changes (new series, zoom, pan, resize, or a bar outside the axes).
+    Mouse wheel zooms, dragging pans, a double click shows the whole series.
+    """
+
+    LEFT, RIGHT, TOP, BOTTOM = 70, 10, 24, 22
+    PRICE_FRACTION = 0.72  # Of the plot height, the rest is the ATR pane
+    HEADROOM = 0.1  # Of the time axis kept free on the right while following the latest bar
+    MIN_BARS = 10
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setMinimumHeight(320)
+        self.setFont(QFont("Arial", 9))
+        self.symbol = ""
+        self.timeframe = None
+        self._data = np.empty((0, ATR + 1))
+        self._count = 0
+        self._forming: Optional[np.ndarray] = None
+        self._x0 = 0.0
+        self._x1 = 1.0
+        self._follow = True
+        self._price_range = (0.0, 1.0)
+        self._atr_range = (0.0, 1.0)
+        self._base: Optional[QPixmap] = None
+        self._drag_x: Optional[int] = None
+        self.last_render_ms = 0.0
+
+    # Data
+
+    @property
+    def rows(self) -> np.ndarray:
+        return self._data[:self._count]
+
+    def set_series(self, symbol: str, timeframe, rows: np.ndarray, forming: Optional[np.ndarray]):
+        """Replace the series, e.g. after switching symbol; shows all of it"""
+        self.symbol = symbol
+        self.timeframe = timeframe
+        self._data = np.array(rows, dtype=np.float64).reshape(-1, ATR + 1)
+        self._count = len(self._data)
+        self._forming = forming
+        self.reset_view()
+
+    def append(self, rows: np.ndarray, forming: Optional[np.ndarray]):
+        """Add bars closed since the last call and replace the forming bar"""
+        first = self._count
+        if len(rows):
+            self._reserve(first + len(rows))
+            self._data[first:first + len(rows)] = rows
+            self._count += len(rows)
+        self._forming = forming
+
+        if len(rows) and self._follow:
+            if self._count - 1 > self._x1 or not self._fits(rows):
+                self._follow_latest()
+                self.invalidate()
+                return
+            if self._base is not None:
+                self._draw_new_bars(first)
+        # Only the strip from the last drawn bar to the forming bar changes
+        self.update(self._tail_rect(first - 1))
+
+    def _reserve(self, count: int):
+        if count > len(self._data):
+            grown = np.empty((max(count, 2 * len(self._data), 256), ATR + 1))
+            grown[:self._count] = self._data[:self._count]
+            self._data = grown
+
+    def _fits(self, rows: np.ndarray) -> bool:
+        low, high = self._price_range
+        prices = rows[:, CLOSE:ATR]
+        return prices.min() >= low and prices.max() <= high and rows[:, ATR].max() <= self._atr_range[1]
+
+    # View
+
+    def reset_view(self):
+        self._follow = True
+        span = max(self._count - 1, self.MIN_BARS)
+        self._x0 = 0.0
+        self._x1 = span * (1 + self.HEADROOM)
+        self.invalidate()
+
+    def _follow_latest(self):
+        span = self._x1 - self._x0
+        self._x1 = self._count - 1 + span * self.HEADROOM
+        self._x0 = self._x1 - span
+
+    def invalidate(self):
+        self._base = None
+        self.update()
+
+    def wheelEvent(self, event):
+        if not self._count:
+            return
+        factor = 0.8 if event.angleDelta().y() > 0 else 1.25
+        span = self._x1 - self._x0
+        new_span = min(max(span * factor, self.MIN_BARS), max(self._count, self.MIN_BARS) * (1 + self.HEADROOM))
+        center = self._x_index(event.pos().x())
+        self._x0 = center - (center - self._x0) * new_span / span
+        self._x1 = self._x0 + new_span
+        self._follow = self._x1 >= self._count - 1
+        self.invalidate()
+
+    def mousePressEvent(self, event):
+        if event.button() == Qt.LeftButton:
+            self._drag_x = event.pos().x()
+
+    def mouseMoveEvent(self, event):
+        if self._drag_x is None:
+            return
+        shift = (self._drag_x - event.pos().x()) * (self._x1 - self._x0) / max(self._plot_width(), 1)
+        self._drag_x = event.pos().x()
+        self._x0 += shift
+        self._x1 += shift
+        self._follow = self._x1 >= self._count - 1
+        self.invalidate()
+
+    def mouseReleaseEvent(self, event):
+        self._drag_x = None
+
+    def mouseDoubleClickEvent(self, event):
+        self.reset_view()
+
+    def resizeEvent(self, event):
+        self._base = None
+        super().resizeEvent(event)
+
+    # Geometry
+
+    def _plot_width(self) -> int:
+        return self.width() - self.LEFT - self.RIGHT
+
+    def _panes(self) -> Tuple[QRectF, QRectF]:
+        height = self.height() - self.TOP - self.BOTTOM
+        price_height = height * self.PRICE_FRACTION
+        price = QRectF(self.LEFT, self.TOP, self._plot_width(), price_height - 6)
+        atr = QRectF(self.LEFT, self.TOP + price_height + 6, self._plot_width(), height - price_height - 6)
+        return price, atr
+
+    def _x_index(self, px: float) -> float:
+        return self._x0 + (px - self.LEFT) / max(self._plot_width(), 1) * (self._x1 - self._x0)
+
+    def _x_pixels(self, index) -> np.ndarray:
+        return self.LEFT + (index - self._x0) / (self._x1 - self._x0) * self._plot_width()
+
+    @staticmethod
+    def _y_pixels(values, value_range: Tuple[float, float], pane: QRectF):
+        low, high = value_range
+        return pane.bottom() - (values - low) / (high - low) * pane.height()
+
+    def _visible(self) -> Tuple[int, int]:
+        """Row range to draw, one bar beyond each edge so the lines reach it"""
+        start = max(int(np.floor(self._x0)) - 1, 0)
+        stop = min(int(np.ceil(self._x1)) + 2, self._count)
+        return start, max(stop, start)
+
+    def _tail_rect(self, last: int) -> QRect:
+        left = int(self._x_pixels(max(last, 0))) - 2 if self._count else self.LEFT
+        # The value labels in the top bar change with the forming bar too
+        return QRect(0, 0, self.width(), self.TOP).united(
+            QRect(left, 0, self.width() - left, self.height()))
+
+    # Rendering
+
+    def _compute_ranges(self, start: int, stop: int):
+        rows = self.rows[start:stop]
+        if self._forming is not None and stop >= self._count:
+            rows = np.vstack([rows, self._forming]) if len(rows) else self._forming[None, :]
+        if not len(rows):
+            self._price_range = (0.0, 1.0)
+            self._atr_range = (0.0, 1.0)
+            return
+        prices = rows[:, CLOSE:ATR]
+        low, high = float(prices.min()), float(prices.max())
+        pad = (high - low) * 0.05 or max(abs(high) * 0.01, 0.01)
+        self._price_range = (low - pad, high + pad)
+        self._atr_range = (0.0, float(rows[:, ATR].max()) * 1.1 or 1.0)
+
+    def _render_base(self):
+        started = time.perf_counter()
+        pixmap = QPixmap(self.size())
+        pixmap.fill(Qt.white)
+        painter = QPainter(pixmap)
+        price_pane, atr_pane = self._panes()
+        start, stop = self._visible()
+        self._compute_ranges(start, stop)
+
+        painter.setPen(QPen(QColor("#d3d3d3")))
+        painter.drawRect(price_pane)
+        painter.drawRect(atr_pane)
+        self._draw_axes(painter, price_pane, atr_pane, start, stop)
+
+        if stop - start > 0:
+            painter.setRenderHint(QPainter.Antialiasing, True)
+            painter.setClipRect(price_pane.united(atr_pane))
+            index = np.arange(start, stop, dtype=np.float64)
+            x = self._x_pixels(index)
+            # About one point per pixel column survives downsampling
+            threshold = max(int(self._plot_width() * (stop - start) / max(self._x1 - self._x0, 1)), 3)
+            for column, color, _ in PRICE_LINES + [ATR_LINE]:
+                pane, value_range = self._pane_of(column, price_pane, atr_pane)
+                y = self._y_pixels(self.rows[start:stop, column], value_range, pane)
+                kept = lttb(x, y, threshold)
+                painter.setPen(_line_pen(color))
+                painter.drawPolyline(_polygon(x[kept], y[kept]))
+        painter.end()
+        self._base = pixmap
+        self.last_render_ms = (time.perf_counter() - started) * 1000
+
+    def _pane_of(self, column: int, price_pane: QRectF, atr_pane: QRectF):
+        if column == ATR:
+            return atr_pane, self._atr_range
+        return price_pane, self._price_range
+
+    def _draw_axes(self, painter: QPainter, price_pane: QRectF, atr_pane: QRectF, start: int, stop: int):
+        painter.setPen(QPen(QColor("#606060")))
+        metrics = painter.fontMetrics()
+        for pane, (low, high), decimals in ((price_pane, self._price_range, 2), (atr_pane, self._atr_range, 3)):
+            for fraction in (0.0, 0.5, 1.0):
+                value = low + (high - low) * fraction
+                y = pane.bottom() - pane.height() * fraction
+                painter.drawText(QRectF(0, y - 8, self.LEFT - 6, 16), Qt.AlignRight | Qt.AlignVCenter,
+                                 f"{value:.{decimals}f}")
+        if stop > start:
+            time_format = '%Y-%m-%d' if self.timeframe == 'D' else '%m-%d %H:%M'
+            for index, align in ((start, Qt.AlignLeft), (stop - 1, Qt.AlignRight)):
+                label = datetime.fromtimestamp(self.rows[index, TIME]).strftime(time_format)
+                x = float(np.clip(self._x_pixels(index), self.LEFT, self.width() - self.RIGHT))
+                width = metrics.horizontalAdvance(label) + 4
+                left = x if align == Qt.AlignLeft else x - width
+                painter.drawText(QRectF(left, self.height() - self.BOTTOM + 4, width, 16), align, label)
+
+        # Legend on the right of the top bar; the values of the last bar are drawn on the left as an overlay
+        x = self.width() - self.RIGHT
+        for column, color, label in reversed(PRICE_LINES + [ATR_LINE]):
+            width = metrics.horizontalAdvance(label) + 14
+            x -= width
+            painter.setPen(QPen(QColor(color), 2))
+            painter.drawLine(QPointF(x, self.TOP / 2), QPointF(x + 8, self.TOP / 2))
+            painter.setPen(QPen(QColor("#202020")))
+            painter.drawText(QRectF(x + 10, 0, width - 10, self.TOP), Qt.AlignLeft | Qt.AlignVCenter, label)
+
+    def _draw_new_bars(self, first: int):
+        """Paint bars closed since the pixmap was rendered straight onto it"""
+        painter = QPainter(self._base)
+        painter.setRenderHint(QPainter.Antialiasing, True)
+        price_pane, atr_pane = self._panes()
+        painter.setClipRect(price_pane.united(atr_pane))
+        start = max(first - 1, 0)
+        index = np.arange(start, self._count, dtype=np.float64)
+        x = self._x_pixels(index)
+        for column, color, _ in PRICE_LINES + [ATR_LINE]:
+            pane, value_range = self._pane_of(column, price_pane, atr_pane)
+            painter.setPen(_line_pen(color))
+            painter.drawPolyline(_polygon(x, self._y_pixels(self.rows[start:, column], value_range, pane)))
+        painter.end()
+
+    def _draw_forming(self, painter: QPainter):
+        forming = self._forming
+        if forming is None:
+            return
+        price_pane, atr_pane = self._panes()
+        painter.save()
+        painter.setClipRect(price_pane.united(atr_pane))
+        painter.setRenderHint(QPainter.Antialiasing, True)
+        x_forming = float(self._x_pixels(self._count))
+        for column, color, _ in PRICE_LINES + [ATR_LINE]:
+            pane, value_range = self._pane_of(column, price_pane, atr_pane)
+            y_forming = float(self._y_pixels(forming[column], value_range, pane))
+            painter.setPen(_line_pen(color, Qt.DashLine))
+            if self._count:
+                last = self.rows[self._count - 1]
+                painter.drawLine(QPointF(float(self._x_pixels(self._count - 1)),
+                                         float(self._y_pixels(last[column], value_range, pane))),
+                                 QPointF(x_forming, y_forming))
+            else:
+                painter.drawEllipse(QPointF(x_forming, y_forming), 2, 2)
+        painter.restore()
+
+    def _draw_title(self, painter: QPainter):
+        last = self._forming if self._forming is not None else (self.rows[-1] if self._count else None)
+        title = f"{self.symbol} {self.timeframe}{'' if self.timeframe == 'D' else 'min'}"
+        if last is not None:
+            title += "   " + "  ".join(f"{label} {last[column]:.2f}" for column, _, label in PRICE_LINES)
+            title += f"  ATR {last[ATR]:.3f}"
+        painter.setPen(QPen(QColor("#202020")))
+        painter.drawText(QRectF(self.LEFT, 0, self._plot_width(), self.TOP), Qt.AlignLeft | Qt.AlignVCenter, title)
+
+    def paintEvent(self, event):
+        if self._base is None or self._base.size() != self.size():
+            self._render_base()
+        painter = QPainter(self)
+        painter.drawPixmap(event.rect(), self._base, event.rect())
+        if self.symbol:
+            painter.fillRect(QRectF(self.LEFT, 0, self._plot_width() * 0.6, self.TOP), Qt.white)
+            self._draw_title(painter)
+            self._draw_forming(painter)
+        painter.end()
@@ -7,6 +7,34 @@ class TradingConfig:
         self.config_file = 'trading_config.json'
         self.user_login = "Kish19691969"
         self.last_updated = "2025-08-09 16:25:09"  # Your exact current timestamp
+        self.live_trading_enabled = False  # Orders only go to the broker when enabled
+        self.order_rate_limit = 45.0  # Orders per second, below IB's 50 messages/second
+        self.execution_mode = 'paper'  # 'paper' fills in-process, 'ib' routes to the IB account
+        self.bracket_orders = False  # Send stop loss / take profit with the entry as server-side orders
+        self.max_daily_loss = 1000.0  # Stop new entries once session PnL reaches -max_daily_loss
+        self.max_symbol_positions = 1  # Positions per symbol across all strategies
+        self.signal_repeat_window = 60.0  # Seconds during which an identical signal is not sent again
+        self.strategy_time_budget_ms = 5.0  # CPU time per strategy per market data event
+        self.breaker_max_errors = 3  # Consecutive errors before a strategy is paused
+        self.breaker_max_overruns = 5  # Consecutive budget overruns before a strategy is paused
+        self.breaker_cooldown = 60.0  # Seconds a paused strategy waits before a trial run
+        self.pool_signals = False  # Recycle TradeSignal records after dispatch
+        self.paper_slippage_bps = 2.0
+        self.paper_latency_ms = 250.0
+        self.paper_participation = 0.1  # Max fraction of bar volume filled per bar
+        self.journal_enabled = True
+        self.journal_path = 'trade_journal.db'
+        self.snapshot_enabled = True
+        self.snapshot_path = 'state_snapshot'
+        self.snapshot_interval = 60.0  # Seconds between warm-restart snapshots
+        self.snapshot_max_age = 8 * 3600.0  # Older snapshots are ignored at startup
+        self.ui_refresh_hz = 5.0  # Dashboard frames per second, independent of the bar rate
+        self.log_level = 'INFO'  # DEBUG adds a line per market data bar
+        self.log_max_lines = 5000
+        self.ib_host = '127.0.0.1'
+        self.ib_port = 7496
+        self.ticker_file = 'c:/trading/US_ticker_list_for_trading.txt'
+        self.metrics_interval = 30.0  # Seconds between status lines of the headless runner
         self.load_config()
 
     def load_config(self):
@@ -17,6 +45,34 @@ class TradingConfig:
                     config = json.load(f)
                     self.user_login = config.get('user_login', self.user_login)
                     self.last_updated = config.get('last_updated', self.last_updated)
+                    self.live_trading_enabled = config.get('live_trading_enabled', self.live_trading_enabled)
+                    self.order_rate_limit = config.get('order_rate_limit', self.order_rate_limit)
+                    self.execution_mode = config.get('execution_mode', self.execution_mode)
+                    self.bracket_orders = config.get('bracket_orders', self.bracket_orders)
+                    self.max_daily_loss = config.get('max_daily_loss', self.max_daily_loss)
+                    self.max_symbol_positions = config.get('max_symbol_positions', self.max_symbol_positions)
+                    self.signal_repeat_window = config.get('signal_repeat_window', self.signal_repeat_window)
+                    self.strategy_time_budget_ms = config.get('strategy_time_budget_ms', self.strategy_time_budget_ms)
+                    self.breaker_max_errors = config.get('breaker_max_errors', self.breaker_max_errors)
+                    self.breaker_max_overruns = config.get('breaker_max_overruns', self.breaker_max_overruns)
+                    self.breaker_cooldown = config.get('breaker_cooldown', self.breaker_cooldown)
+                    self.pool_signals = config.get('pool_signals', self.pool_signals)
+                    self.paper_slippage_bps = config.get('paper_slippage_bps', self.paper_slippage_bps)
+                    self.paper_latency_ms = config.get('paper_latency_ms', self.paper_latency_ms)
+                    self.paper_participation = config.get('paper_participation', self.paper_participation)
+                    self.journal_enabled = config.get('journal_enabled', self.journal_enabled)
+                    self.journal_path = config.get('journal_path', self.journal_path)
+                    self.snapshot_enabled = config.get('snapshot_enabled', self.snapshot_enabled)
+                    self.snapshot_path = config.get('snapshot_path', self.snapshot_path)
+                    self.snapshot_interval = config.get('snapshot_interval', self.snapshot_interval)
+                    self.snapshot_max_age = config.get('snapshot_max_age', self.snapshot_max_age)
+                    self.ui_refresh_hz = config.get('ui_refresh_hz', self.ui_refresh_hz)
+                    self.log_level = config.get('log_level', self.log_level)
+                    self.log_max_lines = config.get('log_max_lines', self.log_max_lines)
+                    self.ib_host = config.get('ib_host', self.ib_host)
+                    self.ib_port = config.get('ib_port', self.ib_port)
+                    self.ticker_file = config.get('ticker_file', self.ticker_file)
+                    self.metrics_interval = config.get('metrics_interval', self.metrics_interval)
             except Exception as e:
                 print(f"Error loading config: {e}")
 
@@ -24,7 +80,35 @@ class TradingConfig:
         """Save current configuration to file"""
         config = {
             'user_login': self.user_login,
-            'last_updated': self.last_updated
+            'last_updated': self.last_updated,
+            'live_trading_enabled': self.live_trading_enabled,
+            'order_rate_limit': self.order_rate_limit,
+            'execution_mode': self.execution_mode,
+            'bracket_orders': self.bracket_orders,
+            'max_daily_loss': self.max_daily_loss,
+            'max_symbol_positions': self.max_symbol_positions,
+            'signal_repeat_window': self.signal_repeat_window,
+            'strategy_time_budget_ms': self.strategy_time_budget_ms,
+            'breaker_max_errors': self.breaker_max_errors,
+            'breaker_max_overruns': self.breaker_max_overruns,
+            'breaker_cooldown': self.breaker_cooldown,
+            'pool_signals': self.pool_signals,
+            'paper_slippage_bps': self.paper_slippage_bps,
+            'paper_latency_ms': self.paper_latency_ms,
+            'paper_participation': self.paper_participation,
+            'journal_enabled': self.journal_enabled,
+            'journal_path': self.journal_path,
+            'snapshot_enabled': self.snapshot_enabled,
+            'snapshot_path': self.snapshot_path,
+            'snapshot_interval': self.snapshot_interval,
+            'snapshot_max_age': self.snapshot_max_age,
+            'ui_refresh_hz': self.ui_refresh_hz,
+            'log_level': self.log_level,
+            'log_max_lines': self.log_max_lines,
+            'ib_host': self.ib_host,
+            'ib_port': self.ib_port,
+            'ticker_file': self.ticker_file,
+            'metrics_interval': self.metrics_interval
         }
         try:
             with open(self.config_file, 'w') as f:
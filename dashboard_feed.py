@@ -0,0 +1,103 @@
+from typing import Callable, Dict, Optional, Set, Tuple
+
+from chart_data import ChartSeries
+from heatmap_data import UniverseScan
+
+
+class DashboardFeed:
+    """
+    Compact dashboard frames built on the engine thread
+    publish() runs at the dashboard's refresh rate and hands `sink` one frame
+    holding only what changed since the previous one: the PnL engine delta,
+    entry times of newly opened positions, new fills and closed trades, the
+    bars of the charted symbol that closed since the last frame, and the
+    universe heatmap cells whose bucket changed.
+    Trade records are never modified after creation, so they are passed as is.
+    """
+
+    def __init__(self, strategy_manager, sink: Callable[[Dict], None]):
+        self.strategy_manager = strategy_manager
+        self.sink = sink
+        self._version = -1
+        self._trade_seq = 0
+        self._closed_seq = 0
+        self._shown: Set[Tuple[str, str]] = set()
+        self._chart: Optional[ChartSeries] = None
+        self._chart_reset = False
+        self._symbol_count = 0
+        self.universe = UniverseScan(strategy_manager.market_data, strategy_manager.indicators)
+
+    def set_chart(self, symbol: str, timeframe):
+        """Chart another symbol or timeframe; the next frame, sent right away, carries its full series"""
+        self._chart = ChartSeries(self.strategy_manager.market_data, symbol, timeframe)
+        self._chart_reset = True
+        self.publish()
+
+    def publish(self):
+        self.strategy_manager.check_new_day()
+        pnl = self.strategy_manager.pnl
+        chart = self._chart_update()
+        symbols = self._symbols_update()
+        heatmap = self.universe.scan()
+        # Every price move, fill and close bumps the PnL engine version
+        if pnl.version == self._version:
+            if chart is not None or symbols is not None or heatmap is not None:
+                self.sink({'positions': {}, 'entry_times': {}, 'strategies': {}, 'session': None,
+                           'trades': [], 'closed_trades': [], 'chart': chart, 'symbols': symbols,
+                           'heatmap': heatmap})
+            return
+
+        delta = pnl.delta(self._version)
+        self._version = delta['version']
+
+        entry_times = {}
+        position_book = self.strategy_manager.position_book
+        for key, values in delta['positions'].items():
+            if values is None:
+                self._shown.discard(key)
+            elif key not in self._shown:
+                self._shown.add(key)
+                entry_times[key] = position_book.get(*key).entry_time.strftime('%Y-%m-%d %H:%M:%S')
+
+        trades = pnl.get_recent_trades(self._trade_seq)
+        if trades:
+            self._trade_seq = trades[-1].seq
+        closed_trades = pnl.get_closed_trades(self._closed_seq)
+        if closed_trades:
+            self._closed_seq = closed_trades[-1].seq
+
+        self.sink({
+            'positions': delta['positions'],
+            'entry_times': entry_times,
+            'strategies': delta['strategies'],
+            'session': delta['session'],
+            'trades': trades,
+            'closed_trades': closed_trades,
+            'chart': chart,
+            'symbols': symbols,
+            'heatmap': heatmap,
+        })
+
+    def _chart_update(self) -> Optional[Dict]:
+        chart = self._chart
+        if chart is None:
+            return None
+        reset = self._chart_reset
+        if reset:
+            self._chart_reset = False
+            rows, forming = chart.snapshot()
+        else:
+            update = chart.poll()
+            if update is None:
+                return None
+            rows, forming = update
+        return {'symbol': chart.symbol, 'timeframe': chart.timeframe, 'reset': reset,
+                'rows': rows, 'forming': forming}
+
+    def _symbols_update(self) -> Optional[list]:
+        """The symbols with history, when that set has grown"""
+        ticker_data = self.strategy_manager.market_data.ticker_data
+        if len(ticker_data) == self._symbol_count:
+            return None
+        self._symbol_count = len(ticker_data)
+        return sorted(ticker_data)
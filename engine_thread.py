@@ -0,0 +1,59 @@
+import asyncio
+import concurrent.futures
+import logging
+import threading
+from typing import Callable, Coroutine, Optional
+
+
+class EngineThread(threading.Thread):
+    """
+    Dedicated thread running the trading engine's asyncio loop
+    IB I/O, bar aggregation, indicators, strategies and execution all run here,
+    so repaints and modal dialogs on the GUI thread never delay a bar. Other
+    threads hand work in through submit() and call().
+    """
+
+    def __init__(self):
+        super().__init__(name='TradingEngine', daemon=True)
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.logger = logging.getLogger('EngineThread')
+        self._ready = threading.Event()
+
+    def run(self):
+        loop = asyncio.new_event_loop()
+        # ib_insync looks the loop up per thread
+        asyncio.set_event_loop(loop)
+        self.loop = loop
+        self._ready.set()
+        try:
+            loop.run_forever()
+        finally:
+            loop.close()
+
+    def start(self):
+        super().start()
+        self._ready.wait()
+
+    def submit(self, coro: Coroutine) -> concurrent.futures.Future:
+        """Run a coroutine on the engine loop; the returned future is safe to wait on from any thread"""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def call(self, callback: Callable, *args):
+        """Run a plain callable on the engine loop"""
+        self.loop.call_soon_threadsafe(callback, *args)
+
+    def call_every(self, interval: float, callback: Callable):
+        """Call `callback` on the engine loop every `interval` seconds until the loop stops"""
+        def tick():
+            try:
+                callback()
+            except Exception as e:
+                self.logger.error(f"Error in periodic engine task: {e}")
+            self.loop.call_later(interval, tick)
+        self.call(tick)
+
+    def stop(self, timeout: float = 5.0):
+        if self.loop is None or not self.is_alive():
+            return
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.join(timeout)
@@ -0,0 +1,199 @@
+import argparse
+import asyncio
+import json
+import logging
+import os
+import signal
+import sys
+import time
+from typing import Dict, Optional
+
+from config import TradingConfig
+from trading_session import TradingSession
+
+LOG_LEVELS = {'DEBUG': logging.DEBUG, 'INFO': logging.INFO, 'WARNING': logging.WARNING, 'ERROR': logging.ERROR}
+
+
+class LogDashboard:
+    """Stands in for TradingDashboard without a GUI: messages and signals go to `logging`"""
+
+    def __init__(self):
+        self.logger = logging.getLogger('TradingBot')
+
+    def add_to_system_log(self, message, level="INFO", source="", *args):
+        # With args, logging %-formats the message only if the level is enabled
+        if source:
+            message = f"{source} - {message}"
+        self.logger.log(LOG_LEVELS.get(level, logging.INFO), message, *args)
+
+    def update_with_signal(self, signal):
+        self.logger.info(
+            "%s - Signal: %s %s @ %.2f (%s%s)", signal.time_str, signal.signal_type.name, signal.symbol,
+            signal.price, signal.strategy_name, ': ' + signal.reason if signal.reason else ''
+        )
+
+
+class HeadlessRunner:
+    """
+    Runs a TradingSession on the main thread's asyncio loop until SIGINT/SIGTERM
+    Status goes out as a periodic metrics log line, optionally also written as
+    JSON to `metrics_file` for an external collector.
+    """
+
+    def __init__(self, session: TradingSession, metrics_interval: float = 30.0,
+                 metrics_file: Optional[str] = None):
+        self.session = session
+        self.metrics_interval = metrics_interval
+        self.metrics_file = metrics_file
+        self.logger = logging.getLogger('HeadlessRunner')
+        self.fill_count = 0
+        self._started = time.time()
+        self._stop: Optional[asyncio.Event] = None
+
+    def request_stop(self):
+        if self._stop is not None:
+            self._stop.set()
+
+    async def run(self):
+        self._stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(sig, self.request_stop)
+            except (NotImplementedError, RuntimeError):
+                # Windows: Ctrl+C arrives as KeyboardInterrupt instead
+                pass
+
+        try:
+            await self.session.start()
+            manager = self.session.strategy_manager
+            if manager.execution is not None:
+                manager.execution.fill_callbacks.append(self._count_fill)
+
+            while not self._stop.is_set():
+                try:
+                    await asyncio.wait_for(self._stop.wait(), self.metrics_interval)
+                except asyncio.TimeoutError:
+                    manager.check_new_day()
+                    self.report()
+        finally:
+            self.logger.info("Stopping trading session...")
+            self.report()
+            await self.session.stop()
+
+    def _count_fill(self, ticket, shares: float, price: float):
+        self.fill_count += 1
+
+    def metrics(self) -> Dict:
+        manager = self.session.strategy_manager
+        realized, unrealized = manager.pnl.session_pnl()
+        latency = manager.latency.snapshot()
+        execution = manager.execution
+        return {
+            'time': time.time(),
+            'uptime': time.time() - self._started,
+            'connected': self.session.market_data.ib.isConnected(),
+            'subscriptions': len(self.session.market_data.subscribed_symbols),
+            'realized_pnl': realized,
+            'unrealized_pnl': unrealized,
+            'open_positions': sum(1 for _ in manager.position_book.positions()),
+            'orders': execution.submitted_count if execution is not None else 0,
+            'open_orders': len(execution.open_orders) if execution is not None else 0,
+            'fills': self.fill_count,
+            'paused_strategies': [name for name, health in manager.supervisor.stats().items()
+                                  if health['state'] != 'CLOSED'],
+            'latency_p99_us': max((row['p99_us'] for row in latency), default=0),
+            'latency': latency,
+        }
+
+    def report(self):
+        try:
+            metrics = self.metrics()
+        except Exception as e:
+            self.logger.error(f"Error collecting metrics: {e}")
+            return
+        self.logger.info(
+            "PnL %.2f (realized %.2f) | positions %d | orders %d open %d | fills %d | p99 %dus | subscriptions %d%s",
+            metrics['realized_pnl'] + metrics['unrealized_pnl'], metrics['realized_pnl'],
+            metrics['open_positions'], metrics['orders'], metrics['open_orders'], metrics['fills'],
+            metrics['latency_p99_us'], metrics['subscriptions'],
+            f" | paused {', '.join(metrics['paused_strategies'])}" if metrics['paused_strategies'] else ""
+        )
+        if self.metrics_file:
+            try:
+                with open(f"{self.metrics_file}.tmp", 'w') as f:
+                    json.dump(metrics, f, indent=2)
+                # Readers never see a half-written file
+                os.replace(f"{self.metrics_file}.tmp", self.metrics_file)
+            except OSError as e:
+                self.logger.error(f"Error writing metrics file: {e}")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Run the trading engine without the GUI")
+    parser.add_argument('settings', help="Settings file saved by the settings window (trading_config_*.json)")
+    parser.add_argument('--config', default=None, help="Engine config file (default: trading_config.json)")
+    parser.add_argument('--tickers', default=None, help="Ticker list file")
+    parser.add_argument('--host', default=None)
+    parser.add_argument('--port', type=int, default=None)
+    parser.add_argument('--client-id', type=int, default=199)
+    parser.add_argument('--log-level', default=None, choices=sorted(LOG_LEVELS))
+    parser.add_argument('--log-file', default=None)
+    parser.add_argument('--metrics-interval', type=float, default=None, help="Seconds between status lines")
+    parser.add_argument('--metrics-file', default=None, help="Also write the latest metrics here as JSON")
+    args = parser.parse_args(argv)
+
+    config = TradingConfig()
+    if args.config:
+        config.config_file = args.config
+        config.load_config()
+    # Command line options override the config file
+    for option, field in (('tickers', 'ticker_file'), ('host', 'ib_host'), ('port', 'ib_port'),
+                          ('log_level', 'log_level'), ('metrics_interval', 'metrics_interval')):
+        value = getattr(args, option)
+        if value is not None:
+            setattr(config, field, value)
+
+    logging.basicConfig(
+        level=LOG_LEVELS.get(config.log_level, logging.INFO),
+        format='%(asctime)s %(levelname)s %(name)s: %(message)s',
+        filename=args.log_file
+    )
+    logger = logging.getLogger('HeadlessRunner')
+
+    try:
+        with open(args.settings, 'r') as f:
+            settings = json.load(f)
+    except (OSError, ValueError) as e:
+        logger.error(f"Failed to load settings: {e}")
+        return 2
+
+    session = TradingSession(LogDashboard(), config, client_id=args.client_id)
+    session.configure(settings)
+    enabled = [name for name, strategy in session.strategy_manager.strategies.items() if strategy.enabled]
+    if not enabled:
+        logger.error("No strategy is enabled in the settings file")
+        return 2
+    logger.info(f"Enabled strategies: {', '.join(enabled)}; execution mode {config.execution_mode}, "
+                f"live trading {'on' if config.live_trading_enabled else 'off'}")
+
+    if sys.platform == 'win32':
+        asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
+    # ib_insync looks the loop up per thread; give it the one the runner uses
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    runner = HeadlessRunner(session, config.metrics_interval, args.metrics_file)
+    try:
+        loop.run_until_complete(runner.run())
+    except KeyboardInterrupt:
+        logger.info("Interrupted")
+    except Exception as e:
+        logger.error(f"Trading session failed: {e}")
+        return 1
+    finally:
+        loop.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,126 @@
+import math
+from typing import Dict, List, Optional
+
+import numpy as np
+
+# Bucket edges of the values the heatmap shows; a cell is repainted only when a bucket changes
+ATR_RATIO_EDGES = (-5.0, -3.0, -2.0, -1.0, -0.5, 0.5, 1.0, 2.0, 3.0, 5.0)
+DISTANCE_EDGES = (-1.0, -0.5, -0.25, 0.0, 0.25, 0.5, 1.0)  # 5-minute close - EMA 50, in 5-minute ATRs
+BEARISH, MIXED, BULLISH = range(3)  # Daily alignment: price < EMA 8 < 21 < 50, neither, price > 8 > 21 > 50
+
+# Missing values get the bucket after the last one of their kind
+ATR_MISSING = len(ATR_RATIO_EDGES) + 1
+ALIGNMENT_MISSING = 3
+DISTANCE_MISSING = len(DISTANCE_EDGES) + 1
+MISSING_CODE = (ATR_MISSING << 8) | (ALIGNMENT_MISSING << 4) | DISTANCE_MISSING
+
+
+def decode(code: int):
+    """(ATR ratio bucket, daily alignment, distance bucket) of a cell code"""
+    return code >> 8, (code >> 4) & 0xF, code & 0xF
+
+
+def _buckets(values: np.ndarray, edges, missing: int) -> np.ndarray:
+    buckets = np.digitize(values, edges)
+    buckets[np.isnan(values)] = missing
+    return buckets
+
+
+class UniverseScan:
+    """
+    Per-symbol heatmap cells of every subscribed symbol, built on the engine thread
+    Each cell packs three buckets into one code: the 1-minute ATR ratio from
+    MarketDataHandler.atr_data, the daily EMA 8/21/50 alignment, and the
+    distance of the 5-minute close from its EMA 50 read from the IndicatorHub.
+    scan() returns only the cells whose code changed since the previous call.
+    """
+
+    def __init__(self, market_data, indicators, minutes: int = 5, period: int = 50):
+        self.market_data = market_data
+        self.indicators = indicators
+        self.minutes = minutes
+        self.period = period
+        indicators.require(minutes, [period])
+        self.symbols: List[str] = []
+        self._symbol_set = set()
+        self._series: list = []
+        self._alignment = np.empty(0, dtype=np.int32)
+        self._daily_seen: Dict[str, tuple] = {}  # symbol -> (daily bars frame, its alignment)
+        self.codes = np.empty(0, dtype=np.int32)
+
+    def scan(self) -> Optional[Dict]:
+        """Changed cells as {'symbols', 'indices', 'codes'}; symbols is set only when the universe changed"""
+        symbols = None
+        if self.market_data.subscribed_symbols != self._symbol_set:
+            symbols = self._relayout()
+        if not self.symbols:
+            return None
+        if symbols is None:
+            self._refresh_alignment()
+
+        codes = self._codes()
+        if symbols is None:
+            indices = np.flatnonzero(codes != self.codes)
+            if not len(indices):
+                return None
+        else:
+            indices = np.arange(len(codes))
+        self.codes = codes
+        return {'symbols': symbols, 'indices': indices, 'codes': codes[indices]}
+
+    def _relayout(self) -> List[str]:
+        self._symbol_set = set(self.market_data.subscribed_symbols)
+        self.symbols = sorted(self._symbol_set)
+        self._series = [None] * len(self.symbols)
+        self._daily_seen = {symbol: seen for symbol, seen in self._daily_seen.items() if symbol in self._symbol_set}
+        self._alignment = np.array([self._daily_alignment(symbol) for symbol in self.symbols], dtype=np.int32)
+        self.codes = np.full(len(self.symbols), MISSING_CODE, dtype=np.int32)
+        return self.symbols
+
+    def _refresh_alignment(self):
+        """Re-read the alignment of symbols whose daily bars were fetched again since the last scan"""
+        seen = self._daily_seen
+        get_timeframe_data = self.market_data.get_timeframe_data
+        for i, symbol in enumerate(self.symbols):
+            entry = seen.get(symbol)
+            # A history fetch replaces the daily frame, so an identity check is enough
+            if entry is None or get_timeframe_data(symbol, 'D') is not entry[0]:
+                self._alignment[i] = self._daily_alignment(symbol)
+
+    def _daily_alignment(self, symbol: str) -> int:
+        daily = self.market_data.get_timeframe_data(symbol, 'D')
+        if daily is None or len(daily) < self.period:
+            return ALIGNMENT_MISSING
+        seen = self._daily_seen.get(symbol)
+        if seen is not None and seen[0] is daily:
+            return seen[1]
+        price, ema8, ema21, ema50 = (daily[column].iat[-1] for column in ('close', 'EMA_8', 'EMA_21', 'EMA_50'))
+        if price > ema8 > ema21 > ema50:
+            alignment = BULLISH
+        elif price < ema8 < ema21 < ema50:
+            alignment = BEARISH
+        else:
+            alignment = MIXED
+        self._daily_seen[symbol] = (daily, alignment)
+        return alignment
+
+    def _codes(self) -> np.ndarray:
+        nan = math.nan
+        atr_data = self.market_data.atr_data
+        # .get keeps the defaultdict from growing an entry per lookup
+        atr_ratio = np.fromiter((atr_data.get(symbol, {}).get('ATR_ratio', nan) for symbol in self.symbols),
+                                dtype=np.float64, count=len(self.symbols))
+
+        distance = np.full(len(self.symbols), nan)
+        series_list = self._series
+        for i, series in enumerate(series_list):
+            if series is None:
+                # Series appear with the first live bar of a symbol
+                series = series_list[i] = self.indicators.series(self.symbols[i], self.minutes)
+                if series is None:
+                    continue
+            if series.count and series.atr:
+                distance[i] = (series.values[0] - series.ema(self.period)) / series.atr
+
+        return ((_buckets(atr_ratio, ATR_RATIO_EDGES, ATR_MISSING) << 8) | (self._alignment << 4)
+                | _buckets(distance, DISTANCE_EDGES, DISTANCE_MISSING)).astype(np.int32)
@@ -0,0 +1,187 @@
+import math
+from typing import List, Optional
+
+import numpy as np
+from PyQt5.QtCore import QEvent, QRect, Qt, pyqtSignal
+from PyQt5.QtGui import QColor, QFont, QPainter, QPixmap
+from PyQt5.QtWidgets import QToolTip, QWidget
+
+from heatmap_data import (ALIGNMENT_MISSING, ATR_RATIO_EDGES, BEARISH, BULLISH, DISTANCE_EDGES, MISSING_CODE,
+                          MIXED, decode)
+
+MISSING_COLOR = QColor("#e8e8e8")
+
+
+def _diverging(edges, negative_hue: float, positive_hue: float) -> List[QColor]:
+    """One color per bucket of `edges`: one hue below zero, another above, paler towards zero"""
+    below = sum(1 for edge in edges if edge < 0)
+    above = len(edges) - below
+    colors = []
+    for bucket in range(len(edges) + 1):
+        # Bucket b holds values between edges[b - 1] and edges[b]; rank it by its distance from zero
+        low = edges[bucket - 1] if bucket else -math.inf
+        high = edges[bucket] if bucket < len(edges) else math.inf
+        if high <= 0:
+            strength = (below - bucket) / below
+            colors.append(QColor.fromHsvF(negative_hue, 0.15 + 0.75 * strength, 0.95 - 0.25 * strength))
+        elif low >= 0:
+            strength = (bucket - below) / above
+            colors.append(QColor.fromHsvF(positive_hue, 0.15 + 0.75 * strength, 0.9 - 0.35 * strength))
+        else:
+            colors.append(QColor("#f7f7f7"))
+    return colors + [MISSING_COLOR]
+
+
+def _range_label(edges, bucket: int) -> str:
+    if bucket > len(edges):
+        return "n/a"
+    if bucket == 0:
+        return f"< {edges[0]:g}"
+    if bucket == len(edges):
+        return f">= {edges[-1]:g}"
+    return f"{edges[bucket - 1]:g} to {edges[bucket]:g}"
+
+
+ATR_COLORS = _diverging(ATR_RATIO_EDGES, 0.0, 0.33)  # Red to green
+DISTANCE_COLORS = _diverging(DISTANCE_EDGES, 0.08, 0.6)  # Orange to blue
+ALIGNMENT_COLORS = {BEARISH: QColor("#b22222"), MIXED: QColor("#a0a0a0"), BULLISH: QColor("#228b22"),
+                    ALIGNMENT_MISSING: MISSING_COLOR}
+ALIGNMENT_LABELS = {BEARISH: "bearish", MIXED: "mixed", BULLISH: "bullish", ALIGNMENT_MISSING: "n/a"}
+
+
+class HeatmapWidget(QWidget):
+    """
+    One cell per subscribed symbol, sized so the whole universe fits the widget
+    The cell fill is the 1-minute ATR ratio, the top stripe the daily EMA
+    alignment and the bottom stripe the distance of the 5-minute close from its
+    EMA 50. Cells live in a cached pixmap; an update repaints only the cells it
+    lists and asks Qt to refresh only their area. Click a cell to chart it.
+    """
+
+    symbol_clicked = pyqtSignal(str)
+
+    MIN_CELL = 6
+    GAP = 1
+    LABEL_CELL = 40  # Cells at least this wide show their symbol
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setMinimumHeight(240)
+        self.setFont(QFont("Arial", 7))
+        self.symbols: List[str] = []
+        self.codes = np.empty(0, dtype=np.int32)
+        self._columns = 1
+        self._cell = self.MIN_CELL
+        self._base: Optional[QPixmap] = None
+
+    def set_symbols(self, symbols: List[str], indices: np.ndarray, codes: np.ndarray):
+        """New universe: lay the cells out again and redraw them all"""
+        self.symbols = list(symbols)
+        self.codes = np.full(len(self.symbols), MISSING_CODE, dtype=np.int32)
+        self.codes[indices] = codes
+        self._layout()
+        self.invalidate()
+
+    def update_cells(self, indices: np.ndarray, codes: np.ndarray):
+        self.codes[indices] = codes
+        if self._base is None:
+            self.update()
+            return
+        painter = QPainter(self._base)
+        painter.setFont(self.font())
+        dirty = QRect()
+        for index in indices.tolist():
+            rect = self._cell_rect(index)
+            self._draw_cell(painter, index, rect)
+            dirty = dirty.united(rect)
+        painter.end()
+        # Changed cells tend to be scattered; one bounding rectangle is cheaper for Qt than a region of many
+        self.update(dirty)
+
+    def invalidate(self):
+        self._base = None
+        self.update()
+
+    # Layout
+
+    def _layout(self):
+        count = len(self.symbols)
+        width, height = max(self.width(), 1), max(self.height(), 1)
+        if not count:
+            return
+        # Largest square cells for which every symbol fits
+        cell = max(int(math.sqrt(width * height / count)), self.MIN_CELL)
+        while cell > self.MIN_CELL and math.ceil(count / max(width // cell, 1)) * cell > height:
+            cell -= 1
+        self._cell = cell
+        self._columns = max(width // cell, 1)
+
+    def _cell_rect(self, index: int) -> QRect:
+        row, column = divmod(index, self._columns)
+        return QRect(column * self._cell, row * self._cell, self._cell - self.GAP, self._cell - self.GAP)
+
+    def _index_at(self, x: int, y: int) -> Optional[int]:
+        column, row = x // self._cell, y // self._cell
+        if column >= self._columns:
+            return None
+        index = row * self._columns + column
+        return index if index < len(self.symbols) else None
+
+    def resizeEvent(self, event):
+        self._layout()
+        self._base = None
+        super().resizeEvent(event)
+
+    # Rendering
+
+    def _render_base(self):
+        pixmap = QPixmap(self.size())
+        pixmap.fill(Qt.white)
+        painter = QPainter(pixmap)
+        painter.setFont(self.font())
+        for index in range(len(self.symbols)):
+            self._draw_cell(painter, index, self._cell_rect(index))
+        painter.end()
+        self._base = pixmap
+
+    def _draw_cell(self, painter: QPainter, index: int, rect: QRect):
+        atr_bucket, alignment, distance_bucket = decode(int(self.codes[index]))
+        painter.fillRect(rect, ATR_COLORS[atr_bucket])
+        stripe = max(rect.height() // 5, 1)
+        painter.fillRect(QRect(rect.left(), rect.top(), rect.width(), stripe), ALIGNMENT_COLORS[alignment])
+        painter.fillRect(QRect(rect.left(), rect.bottom() - stripe + 1, rect.width(), stripe),
+                         DISTANCE_COLORS[distance_bucket])
+        if self._cell >= self.LABEL_CELL:
+            painter.setPen(QColor("#202020"))
+            painter.drawText(rect, Qt.AlignCenter, self.symbols[index])
+
+    def paintEvent(self, event):
+        if self._base is None or self._base.size() != self.size():
+            self._render_base()
+        painter = QPainter(self)
+        painter.drawPixmap(event.rect(), self._base, event.rect())
+        painter.end()
+
+    # Input
+
+    def event(self, event):
+        if event.type() == QEvent.ToolTip:
+            index = self._index_at(event.pos().x(), event.pos().y())
+            if index is None:
+                QToolTip.hideText()
+            else:
+                atr_bucket, alignment, distance_bucket = decode(int(self.codes[index]))
+                QToolTip.showText(event.globalPos(), (
+                    f"{self.symbols[index]}\n"
+                    f"ATR ratio: {_range_label(ATR_RATIO_EDGES, atr_bucket)}\n"
+                    f"Daily EMA alignment: {ALIGNMENT_LABELS[alignment]}\n"
+                    f"5min close - EMA 50: {_range_label(DISTANCE_EDGES, distance_bucket)} ATR"
+                ), self)
+            return True
+        return super().event(event)
+
+    def mousePressEvent(self, event):
+        if event.button() == Qt.LeftButton:
+            index = self._index_at(event.pos().x(), event.pos().y())
+            if index is not None:
+                self.symbol_clicked.emit(self.symbols[index])
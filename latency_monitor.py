@@ -0,0 +1,149 @@
+import csv
+import time
+from typing import Dict, List, Optional
+
+# Pipeline stages in the order a bar passes through them; each measures the time
+# since the previous stamp ('receive' is the handoff from the market data
+# callback to StrategyManager), 'end_to_end' runs from bar receipt to order submit
+STAGES = ('receive', 'aggregate', 'indicators', 'strategy', 'risk', 'submit', 'end_to_end')
+
+SUB_BUCKET_BITS = 5
+SUB_BUCKETS = 1 << SUB_BUCKET_BITS  # Buckets per power of two, about 3% relative error
+BUCKET_COUNT = 40 * SUB_BUCKETS  # Covers beyond an hour in microseconds
+
+
+class LatencyHistogram:
+    """
+    Fixed-size log-linear histogram of microsecond latencies, in the style of HdrHistogram
+    Recording is a few integer operations and never allocates.
+    """
+
+    __slots__ = ('counts', 'count', 'total', 'max_value')
+
+    def __init__(self):
+        self.counts = [0] * BUCKET_COUNT
+        self.count = 0
+        self.total = 0
+        self.max_value = 0
+
+    @staticmethod
+    def _index(value: int) -> int:
+        if value < 2 * SUB_BUCKETS:
+            return value
+        shift = value.bit_length() - SUB_BUCKET_BITS - 1
+        return min(shift * SUB_BUCKETS + (value >> shift), BUCKET_COUNT - 1)
+
+    @staticmethod
+    def _value(index: int) -> int:
+        """Midpoint of the values that land in the bucket"""
+        if index < 2 * SUB_BUCKETS:
+            return index
+        shift = index // SUB_BUCKETS - 1
+        return ((index - shift * SUB_BUCKETS) << shift) + (1 << shift) // 2
+
+    def record(self, value_us: int):
+        if value_us < 0:
+            value_us = 0
+        self.counts[self._index(value_us)] += 1
+        self.count += 1
+        self.total += value_us
+        if value_us > self.max_value:
+            self.max_value = value_us
+
+    def percentile(self, percent: float) -> int:
+        if not self.count:
+            return 0
+        target = max(1, int(self.count * percent / 100 + 0.5))
+        seen = 0
+        for index, bucket_count in enumerate(self.counts):
+            seen += bucket_count
+            if seen >= target:
+                return min(self._value(index), self.max_value)
+        return self.max_value
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def reset(self):
+        self.counts = [0] * BUCKET_COUNT
+        self.count = 0
+        self.total = 0
+        self.max_value = 0
+
+
+class LatencyTrace:
+    """perf_counter_ns stamps carried with one bar from receipt through the pipeline"""
+
+    __slots__ = ('receive', 'aggregate', 'indicators')
+
+    def __init__(self):
+        self.receive = time.perf_counter_ns()
+        self.aggregate = self.receive
+        self.indicators = self.receive
+
+
+class LatencyMonitor:
+    """Per-stage and per-strategy latency histograms for the bar -> order pipeline"""
+
+    def __init__(self):
+        self.stages: Dict[str, LatencyHistogram] = {stage: LatencyHistogram() for stage in STAGES}
+        self.strategies: Dict[str, LatencyHistogram] = {}
+        self.started = time.time()
+
+    def record(self, stage: str, elapsed_ns: int, strategy: Optional[str] = None):
+        elapsed_us = elapsed_ns // 1000
+        self.stages[stage].record(elapsed_us)
+        if strategy is not None:
+            histogram = self.strategies.get(strategy)
+            if histogram is None:
+                histogram = self.strategies[strategy] = LatencyHistogram()
+            histogram.record(elapsed_us)
+
+    def record_trace(self, trace: LatencyTrace, now_ns: int):
+        """Record the market data stages of a bar as StrategyManager picks it up"""
+        self.record('aggregate', trace.aggregate - trace.receive)
+        self.record('indicators', trace.indicators - trace.aggregate)
+        self.record('receive', now_ns - trace.indicators)
+
+    def snapshot(self) -> List[Dict]:
+        """One row per stage and per strategy with count, p50, p99 and max in microseconds"""
+        rows = []
+        for name, histogram in self.stages.items():
+            if histogram.count:
+                rows.append(self._row(name, histogram))
+        # Read from the GUI thread while the engine may add strategies
+        for name, histogram in list(self.strategies.items()):
+            rows.append(self._row(f"strategy:{name}", histogram))
+        return rows
+
+    @staticmethod
+    def _row(name: str, histogram: LatencyHistogram) -> Dict:
+        return {
+            'stage': name,
+            'count': histogram.count,
+            'mean_us': histogram.mean,
+            'p50_us': histogram.percentile(50),
+            'p99_us': histogram.percentile(99),
+            'max_us': histogram.max_value,
+        }
+
+    def export(self, path: str):
+        """Write the snapshot, plus p90/p99.9, as CSV"""
+        with open(path, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['stage', 'count', 'mean_us', 'p50_us', 'p90_us', 'p99_us', 'p999_us', 'max_us'])
+            histograms = list(self.stages.items()) + [
+                (f"strategy:{name}", histogram) for name, histogram in self.strategies.items()
+            ]
+            for name, histogram in histograms:
+                writer.writerow([name, histogram.count, f"{histogram.mean:.1f}",
+                                 histogram.percentile(50), histogram.percentile(90),
+                                 histogram.percentile(99), histogram.percentile(99.9),
+                                 histogram.max_value])
+
+    def reset(self):
+        for histogram in self.stages.values():
+            histogram.reset()
+        self.strategies.clear()
+        self.started = time.time()
@@ -3,11 +3,12 @@ import pandas as pd
 import asyncio
 from pathlib import Path
 import logging
+import time
 from datetime import datetime, timezone
 import numpy as np
 from collections import defaultdict
 import talib
-from PyQt5.QtCore import QDateTime
+from latency_monitor import LatencyTrace
 
 class MarketDataHandler:
     def __init__(self, client_id=199):
@@ -18,9 +19,13 @@ class MarketDataHandler:
         self.timeframes = [1, 2, 5, 15, 60]  # minutes
         self.ema_periods = [8, 21, 50]
         self.ticker_list = []
+        self.ticker_file = 'c:/trading/US_ticker_list_for_trading.txt'
         self.dashboard_logger = None
+        self.data_callback = None  # Receives each live bar package
         self.live_bars = {}  # Store live bar data
+        self.realtime_bars = {}  # Real-time bar subscription of each symbol
         self.subscribed_symbols = set()
+        self.contracts = {}  # Qualified contracts by symbol, reused for order routing
         self.user_login = "Kish19691969"  # Initialize user_login attribute
 
         # Separate ATR related data
@@ -64,13 +69,8 @@ class MarketDataHandler:
             level: The log level (INFO, ERROR, WARNING)
         """
         if self.dashboard_logger:
-            formatted_message = (
-                f"Current Date and Time (UTC - YYYY-MM-DD HH:MM:SS formatted): {QDateTime.currentDateTime().toString('yyyy-MM-dd HH:mm:ss')}\n"
-                f"Current User's Login: {self.user_login}\n"
-                f"Level: {level}\n"
-                f"Message: {message}"
-            )
-            self.dashboard_logger(formatted_message)
+            # Time and level are added by the dashboard, after its level filter
+            self.dashboard_logger(message, level, "Market Data")
 
     def _setup_logger(self):
         """Set up logging configuration"""
@@ -105,7 +105,7 @@ class MarketDataHandler:
             self.log_to_dashboard("Starting to load ticker list...", "INFO")
 
             # Read the existing ticker file
-            with open('c:/trading/US_ticker_list_for_trading.txt', 'r') as f:
+            with open(self.ticker_file, 'r') as f:
                 # Read and clean the symbols
                 symbols = []
                 for line in f:
@@ -164,6 +164,7 @@ class MarketDataHandler:
             if not qualified:
                 self.log_to_dashboard(f"Could not qualify contract for {contract.symbol}", "ERROR")
                 return
+            self.contracts[contract.symbol] = qualified[0]
 
 
             self.ticker_data[symbol] = {}
@@ -182,12 +183,7 @@ class MarketDataHandler:
                     )
 
                     if bars:
-                        df = util.df(bars)
-                        # Calculate EMAs
-                        for period in self.ema_periods:
-                            df[f'EMA_{period}'] = df['close'].ewm(span=period, adjust=False).mean()
-
-                        self.ticker_data[contract.symbol][timeframe] = df
+                        self.ticker_data[contract.symbol][timeframe] = self._add_emas(util.df(bars))
                         self.log_to_dashboard(f"Fetched {bar_size} data for {contract.symbol}", "INFO")
                     else:
                         self.log_to_dashboard(f"No data received for {contract.symbol} at {bar_size}", "WARNING")
@@ -196,6 +192,21 @@ class MarketDataHandler:
                     self.log_to_dashboard(f"Error fetching {timeframe}min data for {contract.symbol}: {str(e)}", "ERROR")
                     continue
 
+            # Daily bars for the higher-timeframe trend filters
+            try:
+                bars = await self.ib.reqHistoricalDataAsync(
+                    qualified[0],
+                    endDateTime='',
+                    durationStr='1 Y',
+                    barSizeSetting='1 day',
+                    whatToShow='TRADES',
+                    useRTH=True
+                )
+                if bars:
+                    self.ticker_data[contract.symbol]['D'] = self._add_emas(util.df(bars))
+            except Exception as e:
+                self.log_to_dashboard(f"Error fetching daily data for {contract.symbol}: {str(e)}", "ERROR")
+
             return self.ticker_data[symbol]
 
         except Exception as e:
@@ -220,6 +231,66 @@ class MarketDataHandler:
             self.log_to_dashboard(f"Error in fetch_all_market_data: {e}", "ERROR")
             raise
 
+    def _add_emas(self, df):
+        for period in self.ema_periods:
+            df[f'EMA_{period}'] = df['close'].ewm(span=period, adjust=False).mean()
+        return df
+
+    def restore_history(self, symbol, timeframe, df):
+        """Install bars restored from a snapshot as the history of a symbol and timeframe"""
+        self.ticker_data.setdefault(symbol, {})[timeframe] = self._add_emas(df)
+
+    async def top_up_market_data(self, since):
+        """Fetch only the bars after `since` (epoch seconds) on top of the history restored from a snapshot"""
+        gap = time.time() - since
+        if gap >= 86400:
+            # IB only serves second-based durations up to one day
+            return await self.fetch_all_market_data()
+        self.log_to_dashboard(f"Topping up {gap:.0f}s of market data for all symbols", "INFO")
+        tasks = []
+        for stock in self.ticker_list:
+            symbol = stock if isinstance(stock, str) else stock.symbol
+            tasks.append(self._top_up_symbol(symbol, f"{int(gap) + 60} S"))
+        await asyncio.gather(*tasks)
+        self.log_to_dashboard("Completed topping up market data", "INFO")
+
+    async def _top_up_symbol(self, symbol, duration):
+        history = self.ticker_data.get(symbol, {})
+        if any(timeframe not in history for timeframe in self.timeframes + ['D']):
+            await self.fetch_market_data(symbol)
+            return
+        try:
+            qualified = await self.ib.qualifyContractsAsync(Stock(symbol, 'SMART', 'USD'))
+            if not qualified:
+                self.log_to_dashboard(f"Could not qualify contract for {symbol}", "ERROR")
+                return
+            self.contracts[symbol] = qualified[0]
+
+            requests = [(timeframe, self.get_bar_size(timeframe), duration) for timeframe in self.timeframes]
+            requests.append(('D', '1 day', '1 D'))
+            for timeframe, bar_size, duration_str in requests:
+                bars = await self.ib.reqHistoricalDataAsync(
+                    qualified[0],
+                    endDateTime='',
+                    durationStr=duration_str,
+                    barSizeSetting=bar_size,
+                    whatToShow='TRADES',
+                    useRTH=True
+                )
+                if bars:
+                    self._merge_history(symbol, timeframe, util.df(bars))
+        except Exception as e:
+            self.log_to_dashboard(f"Error topping up data for {symbol}: {str(e)}", "ERROR")
+
+    def _merge_history(self, symbol, timeframe, new):
+        """Append fetched bars; they replace the stored ones from their first bar on, which may have been incomplete"""
+        old = self.ticker_data[symbol][timeframe]
+        first = pd.Timestamp(new['date'].iloc[0]).timestamp()
+        keep = [pd.Timestamp(d).timestamp() < first for d in old['date']]
+        merged = pd.concat([old.loc[keep, ['date', 'open', 'high', 'low', 'close', 'volume']],
+                            new[['date', 'open', 'high', 'low', 'close', 'volume']]], ignore_index=True)
+        self.ticker_data[symbol][timeframe] = self._add_emas(merged)
+
     def update_emas(self, symbol, timeframe):
         """Calculate EMAs based on latest data"""
         try:
@@ -293,9 +364,10 @@ class MarketDataHandler:
     def on_bar_update(self, bar, symbol, timeframe):
         """Handle real-time bar updates"""
         try:
+            trace = LatencyTrace()
             bar_dict = {
                 'date': bar.time,
-                'open': bar.open,
+                'open': bar.open_,
                 'high': bar.high,
                 'low': bar.low,
                 'close': bar.close,
@@ -305,10 +377,12 @@ class MarketDataHandler:
             # Add to live bars
             key = f"{symbol}_{timeframe}"
             self.live_bars[key].append(bar_dict)
+            trace.aggregate = time.perf_counter_ns()
 
             # Update EMAs and other calculations
             self.update_emas(symbol, timeframe)
             atr_ratio = self.calculate_atr_ratio(symbol) if timeframe == 1 else None
+            trace.indicators = time.perf_counter_ns()
 
             # Prepare data package for strategy processing
             data = {
@@ -318,11 +392,12 @@ class MarketDataHandler:
                     **bar_dict,
                     **self.live_data[symbol][timeframe],  # This includes EMAs
                     'atr_ratio': atr_ratio
-                }
+                },
+                'trace': trace
             }
 
             # Emit the data to any registered callbacks
-            if hasattr(self, 'data_callback') and self.data_callback:
+            if self.data_callback:
                 self.data_callback(data)
 
         except Exception as e:
@@ -338,29 +413,29 @@ class MarketDataHandler:
                 self.log_to_dashboard(f"Already subscribed to {symbol_str}", "INFO")
                 return
 
-            # Create a new Stock contract
-            contract = Stock(symbol_str, 'SMART', 'USD')
-
-            qualified = await self.ib.qualifyContractsAsync(contract)
+            # Reuse the contract qualified during the historical fetch
+            qualified = [self.contracts[symbol_str]] if symbol_str in self.contracts else None
             if not qualified:
-                self.log_to_dashboard(f"Could not qualify contract for {symbol_str}", "ERROR")
-                return
-
-            # Subscribe to real-time bars for each timeframe
-            for timeframe in self.timeframes:
-                bar_size = self.get_bar_size(timeframe)
-                key = f"{symbol_str}_{timeframe}"
-                self.live_bars[key] = []
-
-                self.log_to_dashboard(f"Requesting real-time {bar_size} bars for {symbol_str}", "INFO")
-
-                bars = self.ib.reqRealTimeBars(
-                    qualified[0],
-                    5,  # Bar period in seconds
-                    'TRADES',
-                    useRTH=True
-                )
-                bars.updateEvent += lambda bar, s=symbol_str, tf=timeframe: self.on_bar_update(bar, s, tf)
+                contract = Stock(symbol_str, 'SMART', 'USD')
+                qualified = await self.ib.qualifyContractsAsync(contract)
+                if not qualified:
+                    self.log_to_dashboard(f"Could not qualify contract for {symbol_str}", "ERROR")
+                    return
+                self.contracts[symbol_str] = qualified[0]
+
+            # One 5-second bar subscription per symbol; IndicatorHub builds every timeframe from it
+            self.live_bars[f"{symbol_str}_1"] = []
+            self.log_to_dashboard(f"Requesting real-time 5 sec bars for {symbol_str}", "INFO")
+            bars = self.ib.reqRealTimeBars(
+                qualified[0],
+                5,  # Bar period in seconds
+                'TRADES',
+                useRTH=True
+            )
+            # The event carries the whole bar list; the new bar is the last one
+            bars.updateEvent += (lambda bar_list, has_new_bar, s=symbol_str:
+                                 self.on_bar_update(bar_list[-1], s, 1) if has_new_bar else None)
+            self.realtime_bars[symbol_str] = bars
 
             self.subscribed_symbols.add(symbol_str)
             self.log_to_dashboard(f"Successfully subscribed to {symbol_str}", "INFO")
@@ -390,10 +465,9 @@ class MarketDataHandler:
                 self.log_to_dashboard(f"Not subscribed to {symbol_str}", "INFO")
                 return
 
-            contract = Stock(symbol_str, 'SMART', 'USD')
-            qualified = await self.ib.qualifyContractsAsync(contract)
-            if qualified:
-                self.ib.cancelRealTimeBars(qualified[0])
+            bars = self.realtime_bars.pop(symbol_str, None)
+            if bars is not None:
+                self.ib.cancelRealTimeBars(bars)
 
             # Clean up stored data
             self.subscribed_symbols.remove(symbol_str)
@@ -415,6 +489,12 @@ class MarketDataHandler:
         for symbol in list(self.subscribed_symbols):
             await self.stop_realtime_data(symbol)
 
+    def get_timeframe_data(self, symbol, timeframe):
+        """Historical bars with EMAs for a timeframe in minutes, or 'D' for daily"""
+        if isinstance(timeframe, str) and timeframe.isdigit():
+            timeframe = int(timeframe)
+        return self.ticker_data.get(symbol, {}).get(timeframe)
+
     def get_latest_live_data(self, symbol, timeframe):
         """Get the latest real-time data including EMAs"""
         try:
@@ -0,0 +1,532 @@
+import asyncio
+import copy
+import itertools
+import logging
+import time
+from abc import ABC, abstractmethod
+from collections import deque
+from enum import Enum
+from typing import Callable, Dict, List, Optional, Tuple
+
+from ib_insync import Order, Stock
+
+from position_book import PositionBook
+from strategies.strategy_base import SignalType, TradeSignal
+
+
+class OrderState(Enum):
+    PENDING = "PENDING"                  # Queued locally, not yet sent
+    SUBMITTED = "SUBMITTED"
+    PARTIALLY_FILLED = "PARTIALLY_FILLED"
+    FILLED = "FILLED"
+    CANCELLED = "CANCELLED"
+    REJECTED = "REJECTED"
+
+
+ACTIVE_STATES = (OrderState.PENDING, OrderState.SUBMITTED, OrderState.PARTIALLY_FILLED)
+
+# Signal type -> (order action, opens a position)
+SIGNAL_ACTIONS = {
+    SignalType.BUY: ('BUY', True),
+    SignalType.SELL: ('SELL', False),
+    SignalType.EXIT: ('SELL', False),
+}
+
+
+class OrderTicket:
+    __slots__ = ('order_id', 'symbol', 'strategy', 'action', 'quantity', 'order_type',
+                 'limit_price', 'aux_price', 'is_entry', 'initial_stop_loss', 'take_profit_level',
+                 'entry_candle_low', 'reason', 'state', 'filled_quantity', 'avg_fill_price',
+                 'commission', 'signal_ns', 'submit_ns', 'broker_ref', 'parent', 'oca_group')
+
+    def __init__(self, order_id: int, symbol: str, strategy: str, action: str, quantity: float,
+                 order_type: str = 'MKT', limit_price: float = 0.0, is_entry: bool = True):
+        self.order_id = order_id
+        self.symbol = symbol
+        self.strategy = strategy
+        self.action = action
+        self.quantity = quantity
+        self.order_type = order_type
+        self.limit_price = limit_price
+        self.aux_price = 0.0  # Stop trigger price for STP orders
+        self.is_entry = is_entry
+        self.initial_stop_loss = 0.0
+        self.take_profit_level = 0.0
+        self.entry_candle_low = 0.0
+        self.reason = ""
+        self.state = OrderState.PENDING
+        self.filled_quantity = 0.0
+        self.avg_fill_price = 0.0
+        self.commission = 0.0
+        self.signal_ns = 0  # time.perf_counter_ns() when the signal reached the engine
+        self.submit_ns = 0  # time.perf_counter_ns() when the broker accepted the order
+        self.broker_ref = None
+        self.parent = None  # Entry ticket of a bracket child; inactive until it fills
+        self.oca_group = ""  # Orders in one OCA group cancel each other on a fill
+
+    @property
+    def remaining_quantity(self) -> float:
+        return self.quantity - self.filled_quantity
+
+    def __repr__(self):
+        return (f"OrderTicket(#{self.order_id} {self.action} {self.quantity:g} {self.symbol} "
+                f"[{self.strategy}] {self.state.value} filled={self.filled_quantity:g})")
+
+
+class RateLimiter:
+    """Token bucket; IB disconnects clients sending more than 50 messages per second"""
+
+    def __init__(self, rate: float = 45.0, burst: Optional[int] = None):
+        self.rate = rate
+        self.capacity = float(burst or int(rate))
+        self.tokens = self.capacity
+        self.last = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.last) * self.rate)
+        self.last = now
+
+    def try_acquire(self, messages: int = 1) -> bool:
+        self._refill()
+        if self.tokens >= messages:
+            self.tokens -= messages
+            return True
+        return False
+
+    def wait_time(self, messages: int = 1) -> float:
+        """Seconds until `messages` tokens are available"""
+        self._refill()
+        return max(0.0, (min(messages, self.capacity) - self.tokens) / self.rate)
+
+
+class Broker(ABC):
+    """Interface every execution venue implements (IB, paper simulator)"""
+
+    def __init__(self):
+        # Set by ExecutionEngine
+        self.on_fill: Optional[Callable[[OrderTicket, float, float, float], None]] = None
+        self.on_status: Optional[Callable[[OrderTicket, OrderState, str], None]] = None
+
+    @abstractmethod
+    def place_order(self, ticket: OrderTicket):
+        """Send the order without waiting for any broker response"""
+        pass
+
+    @abstractmethod
+    def cancel_order(self, ticket: OrderTicket):
+        pass
+
+    def place_bracket(self, parent: OrderTicket, children: List[OrderTicket]):
+        """Send an entry with attached exit orders that only work once the entry fills"""
+        raise NotImplementedError(f"{type(self).__name__} does not support bracket orders")
+
+    def modify_order(self, ticket: OrderTicket):
+        """Resend a working order after its quantity or prices were changed"""
+        raise NotImplementedError(f"{type(self).__name__} does not support order modification")
+
+    def open_exit_orders(self, next_id: Callable[[], int]) -> List[OrderTicket]:
+        """Exit orders an earlier session left working, as tracked tickets; none by default"""
+        return []
+
+    def on_bar(self, symbol: str, bar: Dict):
+        """Market data hook for venues that fill against bars"""
+        pass
+
+
+class IBBroker(Broker):
+    # IB order status -> local order state
+    STATUS_MAP = {
+        'PendingSubmit': OrderState.SUBMITTED,
+        'PreSubmitted': OrderState.SUBMITTED,
+        'Submitted': OrderState.SUBMITTED,
+        'Filled': OrderState.FILLED,
+        'Cancelled': OrderState.CANCELLED,
+        'ApiCancelled': OrderState.CANCELLED,
+        'Inactive': OrderState.REJECTED,
+    }
+
+    def __init__(self, ib, contracts: Optional[Dict] = None, account: str = ""):
+        super().__init__()
+        self.ib = ib
+        # Qualified contracts shared with MarketDataHandler.contracts
+        self.contracts = contracts if contracts is not None else {}
+        self.account = account
+
+        # Prebuilt orders; each submission copies one and only sets quantity/price
+        self.order_templates = {
+            (action, order_type): Order(action=action, orderType=order_type, tif='DAY',
+                                        account=account, transmit=True)
+            for action in ('BUY', 'SELL')
+            for order_type in ('MKT', 'LMT', 'STP')
+        }
+
+    def get_contract(self, symbol: str):
+        contract = self.contracts.get(symbol)
+        if contract is None:
+            # SMART-routed stocks do not need qualifying before placeOrder
+            contract = self.contracts[symbol] = Stock(symbol, 'SMART', 'USD')
+        return contract
+
+    def build_order(self, ticket: OrderTicket) -> Order:
+        order = copy.copy(self.order_templates[(ticket.action, ticket.order_type)])
+        order.totalQuantity = ticket.quantity
+        order.orderRef = ticket.strategy  # Lets a restarted session match the order to its position
+        if ticket.order_type == 'LMT':
+            order.lmtPrice = round(ticket.limit_price, 2)
+        elif ticket.order_type == 'STP':
+            order.auxPrice = round(ticket.aux_price, 2)
+        if ticket.oca_group:
+            order.ocaGroup = ticket.oca_group
+            order.ocaType = 1  # Cancel the rest of the group on a fill, with block
+        return order
+
+    def place_order(self, ticket: OrderTicket):
+        trade = self.ib.placeOrder(self.get_contract(ticket.symbol), self.build_order(ticket))
+        self._track(ticket, trade)
+
+    def place_bracket(self, parent: OrderTicket, children: List[OrderTicket]):
+        contract = self.get_contract(parent.symbol)
+        parent_order = self.build_order(parent)
+        # Nothing is transmitted until the last child goes out with transmit=True
+        parent_order.transmit = False
+        self._track(parent, self.ib.placeOrder(contract, parent_order))
+        for i, child in enumerate(children):
+            order = self.build_order(child)
+            order.parentId = parent_order.orderId
+            order.transmit = i == len(children) - 1
+            self._track(child, self.ib.placeOrder(contract, order))
+
+    def modify_order(self, ticket: OrderTicket):
+        if ticket.broker_ref is None:
+            return
+        order = ticket.broker_ref.order
+        order.totalQuantity = ticket.quantity
+        if ticket.order_type == 'LMT':
+            order.lmtPrice = round(ticket.limit_price, 2)
+        elif ticket.order_type == 'STP':
+            order.auxPrice = round(ticket.aux_price, 2)
+        # Re-placing an order with an existing orderId modifies it
+        self.ib.placeOrder(self.get_contract(ticket.symbol), order)
+
+    def cancel_order(self, ticket: OrderTicket):
+        if ticket.broker_ref is not None:
+            self.ib.cancelOrder(ticket.broker_ref.order)
+
+    def open_exit_orders(self, next_id: Callable[[], int]) -> List[OrderTicket]:
+        """Working SELL orders of this client from an earlier session, e.g. bracket children"""
+        tickets = []
+        for trade in self.ib.openTrades():
+            order = trade.order
+            if order.action != 'SELL' or not order.orderRef or order.orderType not in ('LMT', 'STP'):
+                continue
+            ticket = OrderTicket(next_id(), trade.contract.symbol, order.orderRef, 'SELL',
+                                 order.totalQuantity, order.orderType,
+                                 order.lmtPrice if order.orderType == 'LMT' else 0.0, is_entry=False)
+            ticket.aux_price = order.auxPrice if order.orderType == 'STP' else 0.0
+            ticket.reason = "Stop Loss" if order.orderType == 'STP' else "Take Profit"
+            ticket.oca_group = order.ocaGroup
+            ticket.filled_quantity = trade.orderStatus.filled
+            ticket.state = OrderState.PARTIALLY_FILLED if ticket.filled_quantity else OrderState.SUBMITTED
+            self._track(ticket, trade)
+            tickets.append(ticket)
+        return tickets
+
+    def _track(self, ticket: OrderTicket, trade):
+        ticket.broker_ref = trade
+        trade.fillEvent += lambda trade, fill, t=ticket: self._on_ib_fill(t, fill)
+        trade.statusEvent += lambda trade, t=ticket: self._on_ib_status(t, trade)
+
+    def _on_ib_fill(self, ticket: OrderTicket, fill):
+        if self.on_fill:
+            commission = fill.commissionReport.commission if fill.commissionReport else 0.0
+            self.on_fill(ticket, fill.execution.shares, fill.execution.price, commission)
+
+    def _on_ib_status(self, ticket: OrderTicket, trade):
+        state = self.STATUS_MAP.get(trade.orderStatus.status)
+        # Fill states are driven by on_fill so the position book sees every execution
+        if state and state not in (OrderState.FILLED,) and self.on_status:
+            message = trade.log[-1].message if trade.log else ""
+            self.on_status(ticket, state, message)
+
+
+class ExecutionEngine:
+    def __init__(self, broker: Broker, position_book: PositionBook,
+                 rate_limiter: Optional[RateLimiter] = None, order_type: str = 'MKT',
+                 bracket_orders: bool = False):
+        self.broker = broker
+        self.position_book = position_book
+        self.rate_limiter = rate_limiter or RateLimiter()
+        self.order_type = order_type
+        # Attach the stop loss / take profit to entries as server-side child orders
+        self.bracket_orders = bracket_orders
+        self.logger = logging.getLogger('ExecutionEngine')
+
+        self.broker.on_fill = self.on_fill
+        self.broker.on_status = self.on_status
+
+        self.queue = deque()
+        self.orders: Dict[int, OrderTicket] = {}
+        self.open_orders: Dict[int, OrderTicket] = {}
+        self.fill_callbacks: List[Callable[[OrderTicket, float, float], None]] = []
+        # Called with (ticket, state) when an order ends cancelled or rejected
+        self.status_callbacks: List[Callable[[OrderTicket, OrderState], None]] = []
+        # (strategy, symbol) -> working bracket exit orders of the position
+        self.brackets: Dict[Tuple[str, str], List[OrderTicket]] = {}
+        self._order_ids = itertools.count(1)
+        self._pump_scheduled = False
+
+        # Signal -> broker submit latency, nanoseconds
+        self.submitted_count = 0
+        self.total_submit_ns = 0
+        self.max_submit_ns = 0
+
+    def submit(self, signal: TradeSignal) -> Optional[OrderTicket]:
+        """Queue an order for a signal and return immediately"""
+        signal_ns = time.perf_counter_ns()
+        mapping = SIGNAL_ACTIONS.get(signal.signal_type)
+        if mapping is None:
+            self.logger.warning(f"Unsupported signal type {signal.signal_type} for {signal.symbol}")
+            return None
+
+        action, is_entry = mapping
+        quantity = signal.quantity
+        if not is_entry:
+            position = self.position_book.get(signal.strategy_name, signal.symbol)
+            quantity = signal.sell_size or quantity or (position.remaining_size if position else 0)
+        # IB stock orders are whole shares; partial sells round down
+        quantity = int(quantity)
+        if quantity <= 0:
+            return None
+
+        ticket = OrderTicket(next(self._order_ids), signal.symbol, signal.strategy_name, action,
+                             quantity, self.order_type, signal.price, is_entry)
+        ticket.signal_ns = signal_ns
+        ticket.reason = signal.reason
+        if is_entry:
+            ticket.initial_stop_loss = signal.stop_loss
+            ticket.take_profit_level = signal.take_profit
+            ticket.entry_candle_low = signal.entry_candle_low
+
+        self._track(ticket)
+        if is_entry and self.bracket_orders:
+            children = self._bracket_children(ticket)
+            if children:
+                self.brackets[(ticket.strategy, ticket.symbol)] = children
+                self._enqueue('bracket', ticket, children)
+                return ticket
+        elif not is_entry:
+            self._adjust_bracket(ticket)
+
+        self._enqueue('place', ticket)
+        return ticket
+
+    def modify(self, ticket: OrderTicket):
+        """Queue a modification of a working order whose fields were changed"""
+        self._enqueue('modify', ticket)
+
+    def _track(self, ticket: OrderTicket):
+        self.orders[ticket.order_id] = ticket
+        self.open_orders[ticket.order_id] = ticket
+
+    def _enqueue(self, kind: str, ticket: OrderTicket, children: Optional[List[OrderTicket]] = None):
+        self.queue.append((kind, ticket, children))
+        self._schedule_pump()
+
+    def _bracket_children(self, parent: OrderTicket) -> List[OrderTicket]:
+        """Stop loss and take profit orders attached to an entry, in one OCA group"""
+        children = []
+        oca_group = f"OCA-{parent.strategy}-{parent.symbol}-{parent.order_id}"
+        stop_level = max(parent.initial_stop_loss, parent.entry_candle_low)
+        if stop_level:
+            stop = OrderTicket(next(self._order_ids), parent.symbol, parent.strategy, 'SELL',
+                               parent.quantity, 'STP', is_entry=False)
+            stop.aux_price = stop_level
+            stop.reason = "Stop Loss"
+            children.append(stop)
+        if parent.take_profit_level:
+            target = OrderTicket(next(self._order_ids), parent.symbol, parent.strategy, 'SELL',
+                                 parent.quantity, 'LMT', parent.take_profit_level, is_entry=False)
+            target.reason = "Take Profit"
+            children.append(target)
+
+        for child in children:
+            child.parent = parent
+            child.oca_group = oca_group
+            child.signal_ns = parent.signal_ns
+            self._track(child)
+        return children
+
+    def adopt_open_orders(self) -> int:
+        """
+        Track the server-side exits an earlier session left working; call once the
+        position book is recovered. Exits of positions no longer held are cancelled.
+        """
+        adopted = 0
+        for ticket in self.broker.open_exit_orders(lambda: next(self._order_ids)):
+            self._track(ticket)
+            if not self.position_book.has_position(ticket.symbol, ticket.strategy):
+                self.logger.warning(f"Cancelling {ticket}: no open position left to protect")
+                self.cancel(ticket)
+                continue
+            self.brackets.setdefault((ticket.strategy, ticket.symbol), []).append(ticket)
+            adopted += 1
+        return adopted
+
+    def has_working_bracket(self, strategy: str, symbol: str) -> bool:
+        return bool(self._working_bracket(strategy, symbol))
+
+    def _working_bracket(self, strategy: str, symbol: str) -> List[OrderTicket]:
+        return [child for child in self.brackets.get((strategy, symbol), ())
+                if child.state in ACTIVE_STATES]
+
+    def _adjust_bracket(self, exit_ticket: OrderTicket):
+        """Keep the server-side exits of a bracketed position in line with a client-side exit"""
+        children = self._working_bracket(exit_ticket.strategy, exit_ticket.symbol)
+        if not children:
+            return
+
+        position = self.position_book.get(exit_ticket.strategy, exit_ticket.symbol)
+        remaining = (position.remaining_size if position else 0) - exit_ticket.quantity
+        if remaining <= 0:
+            # Full exit joins the bracket's OCA group: whichever fills first cancels the others
+            exit_ticket.oca_group = children[0].oca_group
+            return
+
+        # Partial exit: shrink the stop and target to what will be left
+        for child in children:
+            child.quantity = child.filled_quantity + remaining
+            self.modify(child)
+
+    def on_bar(self, symbol: str, bar: Dict):
+        """Pass a new bar to the broker before strategies see it"""
+        self.broker.on_bar(symbol, bar)
+
+    def cancel(self, ticket: OrderTicket):
+        if ticket.state == OrderState.PENDING:
+            for item in self.queue:
+                if item[1] is ticket:
+                    self.queue.remove(item)
+                    break
+            self.on_status(ticket, OrderState.CANCELLED, "cancelled before submit")
+        elif ticket.state in ACTIVE_STATES:
+            self.broker.cancel_order(ticket)
+
+    def _schedule_pump(self, delay: float = 0.0):
+        if self._pump_scheduled:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None
+
+        if loop is None:
+            # No event loop (tests, replays): hand orders over inline
+            self.pump()
+            return
+
+        self._pump_scheduled = True
+        if delay:
+            loop.call_later(delay, self._run_pump)
+        else:
+            loop.call_soon(self._run_pump)
+
+    def _run_pump(self):
+        self._pump_scheduled = False
+        self.pump()
+
+    def pump(self):
+        """Send queued orders to the broker as fast as the rate limit allows"""
+        while self.queue:
+            kind, ticket, children = self.queue[0]
+            messages = 1 + len(children) if children else 1
+            if not self.rate_limiter.try_acquire(messages):
+                self._schedule_pump(self.rate_limiter.wait_time(messages))
+                return
+
+            self.queue.popleft()
+            try:
+                if kind == 'modify':
+                    if ticket.state in ACTIVE_STATES:
+                        self.broker.modify_order(ticket)
+                    continue
+                if kind == 'bracket':
+                    self.broker.place_bracket(ticket, children)
+                else:
+                    self.broker.place_order(ticket)
+            except Exception as e:
+                self.on_status(ticket, OrderState.REJECTED, str(e))
+                for child in children or ():
+                    self.on_status(child, OrderState.REJECTED, str(e))
+                continue
+
+            ticket.submit_ns = time.perf_counter_ns()
+            for order in [ticket] + (children or []):
+                if order.state == OrderState.PENDING:
+                    order.state = OrderState.SUBMITTED
+            latency = ticket.submit_ns - ticket.signal_ns
+            self.submitted_count += 1
+            self.total_submit_ns += latency
+            if latency > self.max_submit_ns:
+                self.max_submit_ns = latency
+
+    def on_fill(self, ticket: OrderTicket, shares: float, price: float, commission: float = 0.0):
+        """Apply an execution to the order and the shared position book"""
+        total = ticket.filled_quantity + shares
+        ticket.avg_fill_price = (ticket.avg_fill_price * ticket.filled_quantity + price * shares) / total
+        ticket.filled_quantity = total
+        ticket.commission += commission
+        if ticket.filled_quantity >= ticket.quantity:
+            ticket.state = OrderState.FILLED
+            self.open_orders.pop(ticket.order_id, None)
+        else:
+            ticket.state = OrderState.PARTIALLY_FILLED
+
+        if ticket.is_entry:
+            self.position_book.open_position(
+                ticket.strategy, ticket.symbol, price, shares,
+                initial_stop_loss=ticket.initial_stop_loss,
+                take_profit_level=ticket.take_profit_level,
+                entry_candle_low=ticket.entry_candle_low
+            )
+        else:
+            self.position_book.reduce_position(ticket.strategy, ticket.symbol, shares, price)
+            if not self.position_book.has_position(ticket.symbol, ticket.strategy):
+                # Nothing left to protect: make sure no bracket exit can open a short
+                for child in self._working_bracket(ticket.strategy, ticket.symbol):
+                    if child is not ticket:
+                        self.cancel(child)
+                self.brackets.pop((ticket.strategy, ticket.symbol), None)
+
+        for callback in self.fill_callbacks:
+            try:
+                callback(ticket, shares, price)
+            except Exception as e:
+                self.logger.error(f"Error in fill callback for {ticket}: {e}")
+
+    def on_status(self, ticket: OrderTicket, state: OrderState, message: str = ""):
+        if ticket.state in (OrderState.FILLED, OrderState.CANCELLED, OrderState.REJECTED):
+            return
+        # A partially filled order stays partially filled until it is done
+        if state == OrderState.SUBMITTED and ticket.state == OrderState.PARTIALLY_FILLED:
+            return
+        ticket.state = state
+        if state in (OrderState.CANCELLED, OrderState.REJECTED):
+            self.open_orders.pop(ticket.order_id, None)
+            if message:
+                self.logger.warning(f"{ticket}: {message}")
+            for callback in self.status_callbacks:
+                try:
+                    callback(ticket, state)
+                except Exception as e:
+                    self.logger.error(f"Error in status callback for {ticket}: {e}")
+
+    def latency_stats(self) -> Dict[str, float]:
+        """Signal-to-submit latency in microseconds, including any wait on the rate limit"""
+        if not self.submitted_count:
+            return {'count': 0, 'mean_us': 0.0, 'max_us': 0.0}
+        return {
+            'count': self.submitted_count,
+            'mean_us': self.total_submit_ns / self.submitted_count / 1000,
+            'max_us': self.max_submit_ns / 1000,
+        }
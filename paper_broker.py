@@ -0,0 +1,187 @@
+import logging
+import time
+from collections import deque
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from order_execution import Broker, OrderState, OrderTicket
+
+
+class FillModel:
+    """Slippage, latency, partial-fill and commission assumptions for simulated fills"""
+
+    def __init__(self, slippage_bps: float = 2.0, latency_ms: float = 250.0,
+                 participation: Optional[float] = 0.1, commission_per_share: float = 0.005,
+                 min_commission: float = 1.0, max_commission_pct: float = 0.01):
+        self.slippage_bps = slippage_bps
+        self.latency_ms = latency_ms
+        # Fraction of each bar's volume our orders may take; None fills everything at once
+        self.participation = participation
+        # IB fixed-rate stock commissions
+        self.commission_per_share = commission_per_share
+        self.min_commission = min_commission
+        self.max_commission_pct = max_commission_pct
+
+    def commission(self, shares: float, price: float) -> float:
+        commission = max(shares * self.commission_per_share, self.min_commission)
+        return min(commission, shares * price * self.max_commission_pct)
+
+    def slipped_price(self, action: str, price: float) -> float:
+        slip = price * self.slippage_bps / 10000
+        return price + slip if action == 'BUY' else price - slip
+
+
+class PaperExecution:
+    __slots__ = ('order_id', 'symbol', 'strategy', 'action', 'shares', 'price',
+                 'commission', 'time')
+
+    def __init__(self, order_id, symbol, strategy, action, shares, price, commission, time):
+        self.order_id = order_id
+        self.symbol = symbol
+        self.strategy = strategy
+        self.action = action
+        self.shares = shares
+        self.price = price
+        self.commission = commission
+        self.time = time
+
+
+class PaperBroker(Broker):
+    """
+    Simulated broker that fills orders against the live or replayed bar stream
+    Orders become eligible `latency_ms` after they are placed, measured on the
+    bar clock, and fill at the next eligible bar's open (market), when the
+    bar trades through the limit price (limit) or the stop price (stop).
+    Bracket children work on the shares their parent has filled so far, like
+    IB's; OCA groups cancel the other orders of the group on a fill.
+    """
+
+    def __init__(self, fill_model: Optional[FillModel] = None):
+        super().__init__()
+        self.fill_model = fill_model or FillModel()
+        self.logger = logging.getLogger('PaperBroker')
+
+        # Pending orders per symbol as [ticket, eligible_time] pairs, in arrival order
+        self.pending: Dict[str, deque] = {}
+        self.executions: List[PaperExecution] = []
+        self.oca_groups: Dict[str, List[OrderTicket]] = {}
+        self.total_commission = 0.0
+
+        # Bar clock: epoch seconds of the latest bar seen per symbol, and across all symbols
+        self.last_bar_time: Dict[str, float] = {}
+        self.clock: Optional[float] = None
+
+    def _now(self, symbol: str) -> float:
+        # A symbol without a bar yet is on the clock of the whole stream, which is what a replay runs on
+        bar_time = self.last_bar_time.get(symbol, self.clock)
+        return bar_time if bar_time is not None else time.time()
+
+    def place_order(self, ticket: OrderTicket):
+        eligible_time = self._now(ticket.symbol) + self.fill_model.latency_ms / 1000
+        queue = self.pending.get(ticket.symbol)
+        if queue is None:
+            queue = self.pending[ticket.symbol] = deque()
+        queue.append([ticket, eligible_time])
+        ticket.broker_ref = self
+        if ticket.oca_group:
+            self.oca_groups.setdefault(ticket.oca_group, []).append(ticket)
+
+    def place_bracket(self, parent: OrderTicket, children: List[OrderTicket]):
+        self.place_order(parent)
+        for child in children:
+            self.place_order(child)
+
+    def modify_order(self, ticket: OrderTicket):
+        # Resting orders are read from the ticket at fill time
+        pass
+
+    def cancel_order(self, ticket: OrderTicket):
+        queue = self.pending.get(ticket.symbol)
+        if queue:
+            for entry in queue:
+                if entry[0] is ticket:
+                    queue.remove(entry)
+                    break
+        if self.on_status:
+            self.on_status(ticket, OrderState.CANCELLED, "cancelled")
+
+    def on_bar(self, symbol: str, bar: Dict):
+        """Fill pending orders for the symbol against a new bar"""
+        bar_time = bar.get('date')
+        if isinstance(bar_time, datetime):
+            bar_time = bar_time.timestamp()
+        elif bar_time is None:
+            bar_time = time.time()
+        self.last_bar_time[symbol] = bar_time
+        if self.clock is None or bar_time > self.clock:
+            self.clock = bar_time
+
+        queue = self.pending.get(symbol)
+        if not queue:
+            return
+
+        model = self.fill_model
+        if model.participation is None:
+            available = float('inf')
+        else:
+            available = int(bar.get('volume', 0) * model.participation)
+
+        still_pending = deque()
+        while queue:
+            entry = queue.popleft()
+            ticket, eligible_time = entry
+            if ticket.state not in (OrderState.SUBMITTED, OrderState.PARTIALLY_FILLED):
+                continue
+            # A bracket child covers only what its parent has bought so far
+            workable = ticket.remaining_quantity
+            if ticket.parent is not None:
+                workable = min(workable, ticket.parent.filled_quantity - ticket.filled_quantity)
+            if eligible_time > bar_time or available <= 0 or workable <= 0:
+                still_pending.append(entry)
+                continue
+
+            price = self._fill_price(ticket, bar)
+            if price is None:
+                still_pending.append(entry)
+                continue
+
+            shares = min(workable, available)
+            available -= shares
+            commission = model.commission(shares, price)
+            self.total_commission += commission
+            self.executions.append(PaperExecution(ticket.order_id, symbol, ticket.strategy,
+                                                  ticket.action, shares, price, commission, bar_time))
+            if self.on_fill:
+                self.on_fill(ticket, shares, price, commission)
+            if ticket.oca_group:
+                self._cancel_oca_siblings(ticket)
+            if ticket.remaining_quantity > 0:
+                still_pending.append(entry)
+
+        self.pending[symbol] = still_pending
+
+    def _cancel_oca_siblings(self, ticket: OrderTicket):
+        for sibling in self.oca_groups.pop(ticket.oca_group, ()):
+            # Siblings are skipped in on_bar once they are no longer working
+            if sibling is not ticket and self.on_status:
+                self.on_status(sibling, OrderState.CANCELLED, f"OCA group {ticket.oca_group} filled")
+
+    def _fill_price(self, ticket: OrderTicket, bar: Dict) -> Optional[float]:
+        open_price = bar.get('open') or bar['close']
+        if ticket.order_type == 'STP':
+            if ticket.action == 'SELL':
+                if bar.get('low', open_price) > ticket.aux_price:
+                    return None
+                return self.fill_model.slipped_price('SELL', min(open_price, ticket.aux_price))
+            if bar.get('high', open_price) < ticket.aux_price:
+                return None
+            return self.fill_model.slipped_price('BUY', max(open_price, ticket.aux_price))
+        if ticket.order_type == 'LMT':
+            if ticket.action == 'BUY':
+                if bar.get('low', open_price) > ticket.limit_price:
+                    return None
+                return min(open_price, ticket.limit_price)
+            if bar.get('high', open_price) < ticket.limit_price:
+                return None
+            return max(open_price, ticket.limit_price)
+        return self.fill_model.slipped_price(ticket.action, open_price)
@@ -0,0 +1,258 @@
+import argparse
+import itertools
+import json
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+import talib
+
+# Row order of the columnar history file: history[column, bar]
+HISTORY_COLUMNS = ['open', 'high', 'low', 'close', 'volume']
+
+# Current hard-coded values from Strategy2 / StrategyBase
+DEFAULT_PARAMS = {
+    'ema_periods': (8, 21, 50),
+    'atr_ratio_threshold': 5.0,
+    'partial_sell_percentage': 0.75,
+    'profit_target_percent': 3.0,
+    'stop_loss_percent': 2.0,
+    'max_position_dollars': 5000.0,
+    'atr_period': 14,
+}
+
+# Per-worker view of the memory-mapped history, set by _init_worker
+_history = None
+_history_index = None
+
+
+def save_history(frames: Dict[str, pd.DataFrame], path) -> Path:
+    """
+    Write bar history to a columnar .npy file plus a JSON symbol index
+    Args:
+        frames: symbol -> OHLCV DataFrame, e.g. {s: handler.ticker_data[s][5]}
+        path: Target file path (the .npy suffix is added if missing)
+    """
+    path = Path(path).with_suffix('.npy')
+    index = {}
+    columns = []
+    offset = 0
+    for symbol, df in frames.items():
+        if df is None or df.empty:
+            continue
+        block = df[HISTORY_COLUMNS].to_numpy(dtype=np.float64).T
+        columns.append(block)
+        index[symbol] = [offset, offset + block.shape[1]]
+        offset += block.shape[1]
+
+    if not columns:
+        raise ValueError("No bar history to save")
+
+    np.save(path, np.ascontiguousarray(np.concatenate(columns, axis=1)))
+    with open(path.with_suffix('.json'), 'w') as f:
+        json.dump(index, f, indent=4)
+    return path
+
+
+def load_history(path):
+    """Memory-map a history file read-only; pages are shared through the OS cache"""
+    path = Path(path).with_suffix('.npy')
+    with open(path.with_suffix('.json'), 'r') as f:
+        index = json.load(f)
+    return np.load(path, mmap_mode='r'), index
+
+
+def run_backtest(history, index: Dict, params: Dict) -> Dict:
+    """
+    Replay the Strategy2 entry/exit rules over every symbol in the history
+    Entries are closes crossing above the slow EMA while the fast EMA is above
+    the mid EMA (standing in for the daily alignment override). Exits are the
+    partial ATR ratio exit, the slow EMA cross, take profit and stop loss.
+    """
+    params = {**DEFAULT_PARAMS, **params}
+    fast_period, mid_period, slow_period = params['ema_periods']
+    stop_pct = params['stop_loss_percent'] / 100
+    target_pct = params['profit_target_percent'] / 100
+    threshold = params['atr_ratio_threshold']
+    partial = params['partial_sell_percentage']
+
+    trade_pnls = []
+    for start, end in index.values():
+        # Row slices of a C-ordered memmap are views, not copies
+        high = history[1, start:end]
+        low = history[2, start:end]
+        close = history[3, start:end]
+        if len(close) <= slow_period:
+            continue
+
+        series = pd.Series(close)
+        fast = series.ewm(span=fast_period, adjust=False).mean().to_numpy()
+        mid = series.ewm(span=mid_period, adjust=False).mean().to_numpy()
+        slow = series.ewm(span=slow_period, adjust=False).mean().to_numpy()
+        atr = talib.ATR(np.asarray(high), np.asarray(low), np.asarray(close),
+                        timeperiod=params['atr_period'])
+        with np.errstate(divide='ignore', invalid='ignore'):
+            atr_ratio = (close - slow) / atr
+
+        shares = 0
+        remaining = 0
+        trade_pnl = 0.0
+        for i in range(1, len(close)):
+            price = close[i]
+            if not remaining:
+                if (close[i - 1] <= slow[i - 1] and price > slow[i] and
+                        fast[i] > mid[i]):
+                    shares = int(params['max_position_dollars'] / price)
+                    if shares <= 0:
+                        continue
+                    remaining = shares
+                    entry_price = price
+                    entry_candle_low = low[i]
+                    stop_loss = price * (1 - stop_pct)
+                    take_profit = price * (1 + target_pct)
+                    trade_pnl = 0.0
+                continue
+
+            if atr_ratio[i] >= threshold and remaining == shares:
+                sell_size = int(remaining * partial)
+                trade_pnl += (price - entry_price) * sell_size
+                remaining -= sell_size
+                if not remaining:
+                    # The partial exit sold everything: the trade is closed
+                    trade_pnls.append(trade_pnl)
+                    continue
+
+            if (price < slow[i] or price >= take_profit or
+                    price <= stop_loss or price < entry_candle_low):
+                trade_pnl += (price - entry_price) * remaining
+                remaining = 0
+                trade_pnls.append(trade_pnl)
+
+        if remaining:
+            trade_pnls.append(trade_pnl + (close[-1] - entry_price) * remaining)
+
+    pnls = np.asarray(trade_pnls, dtype=np.float64)
+    equity = np.cumsum(pnls)
+    gross_loss = -pnls[pnls < 0].sum()
+    return {
+        'total_pnl': float(pnls.sum()),
+        'trades': int(len(pnls)),
+        'win_rate': float((pnls > 0).mean()) if len(pnls) else 0.0,
+        'profit_factor': float(pnls[pnls > 0].sum() / gross_loss) if gross_loss else float('inf'),
+        'max_drawdown': float((np.maximum.accumulate(equity) - equity).max()) if len(pnls) else 0.0,
+    }
+
+
+def _init_worker(history_path):
+    """Map the shared history once per worker process"""
+    global _history, _history_index
+    _history, _history_index = load_history(history_path)
+
+
+def _run_task(params: Dict) -> Dict:
+    return {**params, **run_backtest(_history, _history_index, params)}
+
+
+class ParameterSweep:
+    def __init__(self, history_path, workers: Optional[int] = None, rank_by: str = 'total_pnl'):
+        self.history_path = Path(history_path).with_suffix('.npy')
+        self.workers = workers or os.cpu_count() or 1
+        self.rank_by = rank_by
+
+    @staticmethod
+    def grid(param_grid: Dict[str, List]) -> List[Dict]:
+        """Expand {name: [values]} into every combination"""
+        names = list(param_grid)
+        return [dict(zip(names, values))
+                for values in itertools.product(*(param_grid[name] for name in names))]
+
+    @staticmethod
+    def random_space(space: Dict, samples: int, seed: Optional[int] = None) -> List[Dict]:
+        """
+        Draw random parameter sets
+        Args:
+            space: name -> list of choices, or (low, high) tuple for a uniform
+                   range (integer range when both bounds are ints)
+            samples: Number of parameter sets to draw
+            seed: Optional seed for reproducible sweeps
+        """
+        rng = random.Random(seed)
+        param_sets = []
+        for _ in range(samples):
+            params = {}
+            for name, values in space.items():
+                if isinstance(values, tuple):
+                    low, high = values
+                    if isinstance(low, int) and isinstance(high, int):
+                        params[name] = rng.randint(low, high)
+                    else:
+                        params[name] = rng.uniform(low, high)
+                else:
+                    params[name] = rng.choice(values)
+            param_sets.append(params)
+        return param_sets
+
+    def run(self, param_sets: List[Dict]) -> pd.DataFrame:
+        """Backtest every parameter set across the process pool and rank the results"""
+        if not param_sets:
+            return pd.DataFrame()
+
+        # A few chunks per worker keeps every core busy without per-task IPC overhead
+        chunksize = max(1, len(param_sets) // (self.workers * 4))
+        with ProcessPoolExecutor(max_workers=self.workers,
+                                 initializer=_init_worker,
+                                 initargs=(str(self.history_path),)) as pool:
+            results = list(pool.map(_run_task, param_sets, chunksize=chunksize))
+
+        table = pd.DataFrame(results)
+        return table.sort_values(self.rank_by, ascending=False).reset_index(drop=True)
+
+    def refine(self, space: Dict, rounds: int = 4, samples_per_round: int = 250,
+               top_fraction: float = 0.1, seed: Optional[int] = None) -> pd.DataFrame:
+        """
+        Sequential search: sample the space, then narrow every numeric range
+        around the best-ranked results before the next round
+        """
+        rng = random.Random(seed)
+        current = dict(space)
+        tables = []
+        for _ in range(rounds):
+            table = self.run(self.random_space(current, samples_per_round, rng.random()))
+            tables.append(table)
+            best = table.head(max(1, int(len(table) * top_fraction)))
+            for name, values in space.items():
+                if isinstance(values, tuple):
+                    low, high = best[name].min(), best[name].max()
+                    if isinstance(values[0], int) and isinstance(values[1], int):
+                        current[name] = (int(low), int(high))
+                    else:
+                        current[name] = (float(low), float(high))
+                else:
+                    current[name] = list(best[name].unique())
+
+        table = pd.concat(tables, ignore_index=True)
+        return table.sort_values(self.rank_by, ascending=False).reset_index(drop=True)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Parallel strategy parameter sweep")
+    parser.add_argument('history', help="History file written by save_history")
+    parser.add_argument('grid', help="JSON file with {parameter: [values]}")
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--rank-by', default='total_pnl')
+    parser.add_argument('--output', default='sweep_results.csv')
+    args = parser.parse_args()
+
+    with open(args.grid, 'r') as f:
+        grid = json.load(f)
+    if 'ema_periods' in grid:
+        grid['ema_periods'] = [tuple(periods) for periods in grid['ema_periods']]
+
+    sweep = ParameterSweep(args.history, workers=args.workers, rank_by=args.rank_by)
+    results = sweep.run(sweep.grid(grid))
+    results.to_csv(args.output, index=False)
+    print(results.head(20).to_string())
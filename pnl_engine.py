@@ -0,0 +1,197 @@
+import time
+from collections import deque
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from position_book import Position, PositionBook
+
+
+class TradeRecord:
+    __slots__ = ('seq', 'time', 'symbol', 'side', 'price', 'size', 'strategy', 'notes')
+
+    def __init__(self, seq: int, time: float, symbol: str, side: str, price: float, size: float,
+                 strategy: str, notes: str = ""):
+        self.seq = seq
+        self.time = time  # Epoch seconds
+        self.symbol = symbol
+        self.side = side
+        self.price = price
+        self.size = size
+        self.strategy = strategy
+        self.notes = notes
+
+    @property
+    def time_str(self) -> str:
+        return datetime.fromtimestamp(self.time).strftime('%Y-%m-%d %H:%M:%S')
+
+
+class ClosedTrade:
+    __slots__ = ('seq', 'symbol', 'strategy', 'pnl', 'entry_price', 'size', 'entry_time', 'closed_time')
+
+    def __init__(self, seq: int, symbol: str, strategy: str, pnl: float, entry_price: float,
+                 size: float, entry_time: datetime, closed_time: float):
+        self.seq = seq
+        self.symbol = symbol
+        self.strategy = strategy
+        self.pnl = pnl
+        self.entry_price = entry_price
+        self.size = size
+        self.entry_time = entry_time
+        self.closed_time = closed_time  # Epoch seconds
+
+    @property
+    def closed_time_str(self) -> str:
+        return datetime.fromtimestamp(self.closed_time).strftime('%Y-%m-%d %H:%M:%S')
+
+
+class PnLEngine:
+    """
+    Realized and unrealized PnL per position, per strategy and for the session
+    The numbers come from the running totals of the PositionBook, so every
+    read is O(1). Price and fill events stamp what they touched with a version,
+    and delta() hands the dashboard only what changed since its last read.
+    Reads change nothing, so any number of readers can poll at their own pace;
+    closed positions are remembered for `closed_keep` seconds for them.
+    """
+
+    def __init__(self, position_book: PositionBook, max_trades: int = 1000, closed_keep: float = 3600.0):
+        self.position_book = position_book
+        position_book.close_callbacks.append(self._on_close)
+
+        self.version = 0
+        # Both kept in version order, so delta() walks back only over what changed
+        self._position_versions: Dict[Tuple[str, str], int] = {}  # Open positions
+        self._closed_versions: Dict[Tuple[str, str], Tuple[int, float]] = {}  # -> (version, close time)
+        self.closed_keep = closed_keep
+        self._strategy_versions: Dict[str, int] = {}
+        self._session_version = 0
+
+        self._seq = 0
+        self.trades = deque(maxlen=max_trades)
+        self.closed_trades = deque(maxlen=max_trades)
+
+    def on_price(self, symbol: str):
+        """Mark the positions in a symbol changed after PositionBook.update_price"""
+        positions = self.position_book.symbol_positions(symbol)
+        if not positions:
+            return
+        self.version += 1
+        for strategy in positions:
+            self._mark(strategy, symbol)
+
+    def on_fill(self, ticket, shares: float, price: float):
+        """Record a fill; the position book has already been updated"""
+        self.version += 1
+        self._mark(ticket.strategy, ticket.symbol)
+        self._seq += 1
+        self.trades.append(TradeRecord(self._seq, time.time(), ticket.symbol, ticket.action, price,
+                                       shares, ticket.strategy, ticket.reason))
+
+    def _on_close(self, position: Position):
+        self.version += 1
+        self._mark(position.strategy, position.symbol)
+        self._seq += 1
+        self.closed_trades.append(ClosedTrade(self._seq, position.symbol, position.strategy,
+                                              position.realized_pnl, position.entry_price,
+                                              position.position_size, position.entry_time, time.time()))
+
+    def new_day(self):
+        """Start a new trading day's realized PnL; open positions keep their own"""
+        self.version += 1
+        for strategy in self.position_book.strategy_realized_pnl:
+            self._strategy_versions[strategy] = self.version
+        self._session_version = self.version
+        self.position_book.reset_realized_pnl()
+
+    def _mark(self, strategy: str, symbol: str):
+        key = (strategy, symbol)
+        self._position_versions.pop(key, None)
+        self._closed_versions.pop(key, None)
+        if self.position_book.get(strategy, symbol) is not None:
+            self._position_versions[key] = self.version
+        else:
+            now = time.time()
+            self._closed_versions[key] = (self.version, now)
+            self._trim_closed(now)
+        self._strategy_versions[strategy] = self.version
+        self._session_version = self.version
+
+    def position_pnl(self, strategy: str, symbol: str) -> Optional[Tuple[float, float]]:
+        """(realized, unrealized) of an open position"""
+        position = self.position_book.get(strategy, symbol)
+        if position is None:
+            return None
+        return position.realized_pnl, position.unrealized_pnl
+
+    def strategy_pnl(self, strategy: str) -> Tuple[float, float]:
+        """(realized, unrealized) of a strategy for the session"""
+        book = self.position_book
+        return book.strategy_realized_pnl.get(strategy, 0.0), book.strategy_unrealized_pnl(strategy)
+
+    def session_pnl(self) -> Tuple[float, float]:
+        return self.position_book.realized_pnl, self.position_book.unrealized_pnl
+
+    def _trim_closed(self, now: float):
+        closed = self._closed_versions
+        while closed:
+            key = next(iter(closed))
+            if now - closed[key][1] < self.closed_keep:
+                break
+            del closed[key]
+
+    def snapshot(self) -> Dict:
+        """Everything, as of the current version; only open positions are listed"""
+        return self._delta(-1, False)
+
+    def delta(self, since: int) -> Dict:
+        """
+        Values changed after version `since`; pass the returned 'version' next time
+        Positions closed since then are reported with a value of None. A call
+        costs O(changed positions).
+        """
+        return self._delta(since, True)
+
+    def _delta(self, since: int, closed: bool) -> Dict:
+        positions = {}
+        if closed:
+            for key, (version, _) in reversed(self._closed_versions.items()):
+                if version <= since:
+                    break
+                positions[key] = None
+        get = self.position_book.get
+        for key, version in reversed(self._position_versions.items()):
+            if version <= since:
+                break
+            position = get(*key)
+            positions[key] = (position.remaining_size, position.entry_price, position.last_price,
+                              position.realized_pnl, position.unrealized_pnl)
+        strategies = {
+            strategy: self.strategy_pnl(strategy)
+            for strategy, version in self._strategy_versions.items() if version > since
+        }
+        session = self.session_pnl() if self._session_version > since or since < 0 else None
+        return {
+            'version': self.version,
+            'positions': positions,
+            'strategies': strategies,
+            'session': session,
+        }
+
+    def get_recent_trades(self, since: int = 0) -> List:
+        """Fills recorded after sequence number `since`, oldest first"""
+        return self._since(self.trades, since)
+
+    def get_closed_trades(self, since: int = 0) -> List:
+        """Positions closed after sequence number `since`, oldest first"""
+        return self._since(self.closed_trades, since)
+
+    @staticmethod
+    def _since(records: deque, since: int) -> List:
+        # Walk back from the newest record so a poll costs O(new records)
+        recent = []
+        for record in reversed(records):
+            if record.seq <= since:
+                break
+            recent.append(record)
+        recent.reverse()
+        return recent
@@ -0,0 +1,185 @@
+from datetime import datetime
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+
+class Position:
+    __slots__ = ('symbol', 'strategy', 'entry_price', 'entry_time', 'entry_candle_low',
+                 'position_size', 'remaining_size', 'initial_stop_loss',
+                 'take_profit_level', 'last_price', 'realized_pnl')
+
+    def __init__(self, symbol: str, strategy: str, entry_price: float, entry_time: datetime,
+                 position_size: float, initial_stop_loss: float = 0.0,
+                 take_profit_level: float = 0.0, entry_candle_low: float = 0.0):
+        self.symbol = symbol
+        self.strategy = strategy
+        self.entry_price = entry_price
+        self.entry_time = entry_time
+        self.entry_candle_low = entry_candle_low
+        self.position_size = position_size
+        self.remaining_size = position_size  # Track remaining position after partial sells
+        self.initial_stop_loss = initial_stop_loss
+        self.take_profit_level = take_profit_level
+        self.last_price = entry_price
+        self.realized_pnl = 0.0  # From partial sells of this position
+
+    @property
+    def market_value(self) -> float:
+        return self.remaining_size * self.last_price
+
+    @property
+    def unrealized_pnl(self) -> float:
+        return (self.last_price - self.entry_price) * self.remaining_size
+
+    def __repr__(self):
+        return (f"Position({self.strategy}:{self.symbol} {self.remaining_size}/{self.position_size} "
+                f"@ {self.entry_price:.2f}, last {self.last_price:.2f})")
+
+
+class PositionBook:
+    """Single source of open positions shared by every strategy, the risk checks and the dashboard"""
+
+    def __init__(self, max_positions: int = 5, max_position_dollars: float = 5000.0):
+        self.max_positions = max_positions
+        self.max_position_dollars = max_position_dollars
+
+        # Indexes over the same Position records
+        self._by_symbol: Dict[str, Dict[str, Position]] = {}
+        self._by_strategy: Dict[str, Dict[str, Position]] = {}
+
+        # Running totals, maintained on every open/reduce/price update
+        self.position_count = 0
+        self.gross_exposure = 0.0
+        self.cost_basis = 0.0  # Sum of entry_price * remaining_size
+        self.realized_pnl = 0.0
+        self.strategy_exposure: Dict[str, float] = {}
+        self.symbol_exposure: Dict[str, float] = {}
+        self.strategy_realized_pnl: Dict[str, float] = {}
+        self.strategy_cost_basis: Dict[str, float] = {}
+
+        # Called with each Position once it is fully closed
+        self.close_callbacks: List[Callable[[Position], None]] = []
+
+    @property
+    def unrealized_pnl(self) -> float:
+        return self.gross_exposure - self.cost_basis
+
+    def strategy_unrealized_pnl(self, strategy: str) -> float:
+        return self.strategy_exposure.get(strategy, 0.0) - self.strategy_cost_basis.get(strategy, 0.0)
+
+    def set_limits(self, max_positions: int, max_position_dollars: float):
+        """Apply the position limits from the settings window"""
+        self.max_positions = max_positions
+        self.max_position_dollars = max_position_dollars
+
+    def strategy_positions(self, strategy: str) -> Dict[str, Position]:
+        """Live symbol -> Position mapping for one strategy"""
+        return self._by_strategy.setdefault(strategy, {})
+
+    def symbol_positions(self, symbol: str) -> Dict[str, Position]:
+        """Live strategy -> Position mapping for one symbol"""
+        return self._by_symbol.get(symbol, {})
+
+    def get(self, strategy: str, symbol: str) -> Optional[Position]:
+        return self._by_strategy.get(strategy, {}).get(symbol)
+
+    def has_position(self, symbol: str, strategy: Optional[str] = None) -> bool:
+        if strategy is None:
+            return bool(self._by_symbol.get(symbol))
+        return symbol in self._by_strategy.get(strategy, {})
+
+    def positions(self) -> Iterator[Position]:
+        for by_strategy in self._by_symbol.values():
+            yield from by_strategy.values()
+
+    def can_open(self, strategy: str, symbol: str, dollars: float, pending: int = 0) -> Tuple[bool, str]:
+        """Pre-trade check against the global limits; `pending` entry orders count as positions"""
+        if self.position_count + pending >= self.max_positions:
+            return False, f"max positions ({self.max_positions}) reached"
+        if dollars > self.max_position_dollars:
+            return False, f"${dollars:.2f} exceeds max ${self.max_position_dollars:.2f} per position"
+        if symbol in self._by_strategy.get(strategy, {}):
+            return False, f"{strategy} already holds {symbol}"
+        return True, ""
+
+    def open_position(self, strategy: str, symbol: str, price: float, size: float,
+                      initial_stop_loss: float = 0.0, take_profit_level: float = 0.0,
+                      entry_candle_low: float = 0.0, entry_time: Optional[datetime] = None) -> Position:
+        """Record a new position, or add to an existing one at the averaged entry price"""
+        self.cost_basis += price * size
+        self.strategy_cost_basis[strategy] = self.strategy_cost_basis.get(strategy, 0.0) + price * size
+        position = self.get(strategy, symbol)
+        if position is not None:
+            self._adjust_exposure(position, -position.market_value)
+            total = position.remaining_size + size
+            position.entry_price = (position.entry_price * position.remaining_size + price * size) / total
+            position.position_size += size
+            position.remaining_size = total
+            position.last_price = price
+            self._adjust_exposure(position, position.market_value)
+            return position
+
+        position = Position(symbol, strategy, price, entry_time or datetime.now(), size,
+                            initial_stop_loss, take_profit_level, entry_candle_low)
+        self._by_symbol.setdefault(symbol, {})[strategy] = position
+        self._by_strategy.setdefault(strategy, {})[symbol] = position
+        self.position_count += 1
+        self._adjust_exposure(position, position.market_value)
+        return position
+
+    def reduce_position(self, strategy: str, symbol: str, size: float,
+                        price: Optional[float] = None) -> Optional[Position]:
+        """Remove shares from a position; the position is dropped once nothing remains"""
+        position = self.get(strategy, symbol)
+        if position is None:
+            return None
+
+        before = position.market_value
+        if price is not None:
+            position.last_price = price
+        size = min(size, position.remaining_size)
+        realized = (position.last_price - position.entry_price) * size
+        self.realized_pnl += realized
+        self.strategy_realized_pnl[strategy] = self.strategy_realized_pnl.get(strategy, 0.0) + realized
+        position.realized_pnl += realized
+        self.cost_basis -= position.entry_price * size
+        self.strategy_cost_basis[strategy] -= position.entry_price * size
+        position.remaining_size -= size
+        self._adjust_exposure(position, position.market_value - before)
+
+        if position.remaining_size <= 0:
+            self._remove(position)
+            for callback in self.close_callbacks:
+                callback(position)
+        return position
+
+    def close_position(self, strategy: str, symbol: str,
+                       price: Optional[float] = None) -> Optional[Position]:
+        position = self.get(strategy, symbol)
+        if position is None:
+            return None
+        return self.reduce_position(strategy, symbol, position.remaining_size, price)
+
+    def reset_realized_pnl(self):
+        """Start a new trading day's realized PnL"""
+        self.realized_pnl = 0.0
+        self.strategy_realized_pnl.clear()
+
+    def update_price(self, symbol: str, price: float):
+        """Mark every position in the symbol to the latest price"""
+        for position in self._by_symbol.get(symbol, {}).values():
+            self._adjust_exposure(position, (price - position.last_price) * position.remaining_size)
+            position.last_price = price
+
+    def _remove(self, position: Position):
+        by_symbol = self._by_symbol[position.symbol]
+        del by_symbol[position.strategy]
+        if not by_symbol:
+            del self._by_symbol[position.symbol]
+            self.symbol_exposure.pop(position.symbol, None)
+        del self._by_strategy[position.strategy][position.symbol]
+        self.position_count -= 1
+
+    def _adjust_exposure(self, position: Position, delta: float):
+        self.gross_exposure += delta
+        self.strategy_exposure[position.strategy] = self.strategy_exposure.get(position.strategy, 0.0) + delta
+        self.symbol_exposure[position.symbol] = self.symbol_exposure.get(position.symbol, 0.0) + delta
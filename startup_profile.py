@@ -0,0 +1,69 @@
+import builtins
+import sys
+import threading
+import time
+from typing import Dict, List, Tuple
+
+
+class StartupProfile:
+    """
+    Wall-clock marks of the startup phases, plus optional per-module import times
+    mark() is cheap and always on. trace_imports() wraps __import__ and records,
+    for every module loaded from then on, the time spent loading it including
+    its own imports (like the cumulative column of `python -X importtime`).
+    """
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.marks: List[Tuple[str, float]] = []
+        self.imports: Dict[str, Tuple[float, str]] = {}  # module -> (seconds, importing thread)
+        self.tracing = False
+        self._original_import = None
+        self._lock = threading.Lock()
+
+    def mark(self, phase: str):
+        with self._lock:
+            self.marks.append((phase, time.perf_counter()))
+
+    def trace_imports(self):
+        if self.tracing:
+            return
+        self.tracing = True
+        self._original_import = original_import = builtins.__import__
+        imports = self.imports
+
+        def timed_import(name, globals=None, locals=None, fromlist=(), level=0):
+            # Relative and already loaded imports are passed straight through
+            if level or name in sys.modules:
+                return original_import(name, globals, locals, fromlist, level)
+            start = time.perf_counter()
+            try:
+                return original_import(name, globals, locals, fromlist, level)
+            finally:
+                imports.setdefault(name, (time.perf_counter() - start, threading.current_thread().name))
+
+        builtins.__import__ = timed_import
+
+    def stop_tracing(self):
+        if self.tracing:
+            builtins.__import__ = self._original_import
+            self.tracing = False
+
+    def report(self, top: int = 15) -> str:
+        with self._lock:
+            marks = list(self.marks)
+        lines = ["Startup profile (ms since process start):"]
+        previous = self.start
+        for phase, at in marks:
+            lines.append(f"  {(at - self.start) * 1000:8.1f}  +{(at - previous) * 1000:7.1f}  {phase}")
+            previous = at
+        if self.imports:
+            lines.append(f"Slowest imports (ms, cumulative), {len(self.imports)} modules traced:")
+            slowest = sorted(self.imports.items(), key=lambda item: item[1][0], reverse=True)[:top]
+            for name, (seconds, thread) in slowest:
+                lines.append(f"  {seconds * 1000:8.1f}  {name}  [{thread}]")
+        return "\n".join(lines)
+
+
+# Shared by the entry point and whatever it loads later
+startup_profile = StartupProfile()
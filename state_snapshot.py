@@ -0,0 +1,163 @@
+import json
+import logging
+import os
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+BAR_COLUMNS = ('open', 'high', 'low', 'close', 'volume')
+FORMAT_VERSION = 1
+
+
+class Snapshot:
+    """A loaded snapshot: JSON index plus the memory-mapped bar array it points into"""
+
+    __slots__ = ('time', 'index', 'bars')
+
+    def __init__(self, index: Dict, bars: np.ndarray):
+        self.time = index['time']
+        self.index = index
+        self.bars = bars
+
+    def block(self, entry: Dict) -> np.ndarray:
+        """Rows of (time, open, high, low, close, volume) of one index entry"""
+        return self.bars[entry['start']:entry['stop']]
+
+
+class StateSnapshot:
+    """
+    Periodic warm-restart snapshots of bars, indicators and strategy counters
+    The state is captured on the engine thread (shallow copies only) and written
+    by a background thread: every bar goes into one float64 .npy array that is
+    memory-mapped on load, with a small JSON index of offsets and indicator
+    accumulators next to it. Open positions are not included; they come from
+    the trade journal.
+    """
+
+    def __init__(self, path: str = 'state_snapshot', interval: float = 60.0, max_age: float = 8 * 3600):
+        self.array_path = f"{path}.npy"
+        self.index_path = f"{path}.json"
+        self.interval = interval
+        self.max_age = max_age
+        self.logger = logging.getLogger('StateSnapshot')
+
+        self._next_save = time.monotonic() + interval
+        self._writer: Optional[threading.Thread] = None
+        self.saved_count = 0
+        self.last_write_ms = 0.0
+
+    def due(self) -> bool:
+        return time.monotonic() >= self._next_save
+
+    def save(self, market_data, indicators, strategies: Dict) -> bool:
+        """Capture the state and write it in the background; skipped while the previous write runs"""
+        self._next_save = time.monotonic() + self.interval
+        if self._writer is not None and self._writer.is_alive():
+            return False
+
+        history = [
+            (symbol, timeframe, df)
+            for symbol, frames in list(market_data.ticker_data.items())
+            for timeframe, df in list(frames.items())
+        ]
+        state = {
+            'version': FORMAT_VERSION,
+            'time': time.time(),
+            'series': indicators.export_state(),
+            'history': history,
+            'strategies': {name: strategy.export_state() for name, strategy in strategies.items()},
+        }
+        self._writer = threading.Thread(target=self._write, args=(state,), name='StateSnapshot', daemon=True)
+        self._writer.start()
+        return True
+
+    def wait(self):
+        if self._writer is not None:
+            self._writer.join()
+
+    def _write(self, state: Dict):
+        start = time.perf_counter()
+        try:
+            blocks: List[np.ndarray] = []
+            offset = 0
+            series_index = []
+            for series_state, bars in state.pop('series'):
+                block = np.array(bars, dtype=np.float64).reshape(-1, 6)
+                series_index.append({**series_state, 'start': offset, 'stop': offset + len(block)})
+                blocks.append(block)
+                offset += len(block)
+
+            history_index = []
+            for symbol, timeframe, df in state.pop('history'):
+                block = np.empty((len(df), 6))
+                block[:, 0] = _epochs(df['date'])
+                block[:, 1:] = df[list(BAR_COLUMNS)].to_numpy(dtype=np.float64)
+                history_index.append({'symbol': symbol, 'timeframe': timeframe,
+                                      'start': offset, 'stop': offset + len(block)})
+                blocks.append(block)
+                offset += len(block)
+
+            state['series'] = series_index
+            state['history'] = history_index
+            state['rows'] = offset
+            bars = np.concatenate(blocks) if blocks else np.empty((0, 6))
+
+            # Both files are replaced only once fully written; load() checks they belong together
+            with open(f"{self.array_path}.tmp", 'wb') as f:
+                np.save(f, bars)
+            with open(f"{self.index_path}.tmp", 'w') as f:
+                json.dump(state, f)
+            os.replace(f"{self.array_path}.tmp", self.array_path)
+            os.replace(f"{self.index_path}.tmp", self.index_path)
+            self.saved_count += 1
+        except Exception as e:
+            self.logger.error(f"Snapshot write failed: {e}")
+        self.last_write_ms = (time.perf_counter() - start) * 1000
+
+    def load(self) -> Optional[Snapshot]:
+        """The last snapshot, or None if there is none, it is too old or it is incomplete"""
+        try:
+            with open(self.index_path) as f:
+                index = json.load(f)
+            bars = np.load(self.array_path, mmap_mode='r')
+        except (OSError, ValueError) as e:
+            self.logger.info(f"No usable snapshot: {e}")
+            return None
+        if index.get('version') != FORMAT_VERSION or index.get('rows') != len(bars):
+            self.logger.warning("Snapshot index does not match its bar file, ignoring it")
+            return None
+        if time.time() - index['time'] > self.max_age:
+            self.logger.info("Snapshot is too old, starting cold")
+            return None
+        return Snapshot(index, bars)
+
+    @staticmethod
+    def restore_market_state(snapshot: Snapshot, market_data, indicators) -> Tuple[int, int]:
+        """Restore the bar store and the indicator series; returns how many of each"""
+        for entry in snapshot.index['history']:
+            block = snapshot.block(entry)
+            timeframe = entry['timeframe']
+            dates = pd.to_datetime(block[:, 0], unit='s', utc=True)
+            df = pd.DataFrame(np.array(block[:, 1:]), columns=list(BAR_COLUMNS))
+            # Daily bars are dated, intraday bars are timestamped
+            df.insert(0, 'date', dates.date if timeframe == 'D' else dates)
+            market_data.restore_history(entry['symbol'], timeframe, df)
+
+        restored = indicators.restore_state(
+            (entry, map(tuple, snapshot.block(entry).tolist())) for entry in snapshot.index['series']
+        )
+        return len(snapshot.index['history']), restored
+
+    @staticmethod
+    def restore_strategies(snapshot: Snapshot, strategies: Dict):
+        for name, state in snapshot.index['strategies'].items():
+            strategy = strategies.get(name)
+            if strategy is not None:
+                strategy.restore_state(state)
+
+
+def _epochs(dates) -> List[float]:
+    return [pd.Timestamp(d).timestamp() for d in dates]
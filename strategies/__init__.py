@@ -4,16 +4,40 @@ Last updated: 2025-08-10 04:19:31
 User: Kish19691969
 """
 
-from .strategy_base import StrategyBase, TradeSignal, SignalType
+from .strategy_base import StrategyBase, TradeSignal, SignalType, SignalPool
 from .strategy_manager import StrategyManager
+from .strategy1 import Strategy1
 from .strategy2 import Strategy2  # Adding Strategy2 import
+from .strategy3 import Strategy3
+from .strategy4 import Strategy4
+from .ema_cross_engine import EMACrossStrategy
+from .indicator_hub import IndicatorHub, TimeframeSeries
+from .trigger_engine import TriggerEngine, ExitTrigger
+from .risk_gate import RiskGate, RiskRejection
+from .signal_coalescer import SignalCoalescer
+from .strategy_supervisor import StrategySupervisor, StrategyHealth, BreakerState
 
 __all__ = [
     'StrategyBase',
     'TradeSignal',
     'SignalType',
+    'SignalPool',
     'StrategyManager',
-    'Strategy2'  # Making Strategy2 available for import
+    'Strategy1',
+    'Strategy2',  # Making Strategy2 available for import
+    'Strategy3',
+    'Strategy4',
+    'EMACrossStrategy',
+    'IndicatorHub',
+    'TimeframeSeries',
+    'TriggerEngine',
+    'ExitTrigger',
+    'RiskGate',
+    'RiskRejection',
+    'SignalCoalescer',
+    'StrategySupervisor',
+    'StrategyHealth',
+    'BreakerState'
 ]
 
 # Module configuration
@@ -0,0 +1,110 @@
+from typing import Dict, List, Optional
+
+from .indicator_hub import PRICE, TimeframeSeries
+from .strategy_base import StrategyBase, TradeSignal, SignalType
+from position_book import Position
+
+
+class EMACrossStrategy(StrategyBase):
+    """
+    Parameterized EMA-cross / candle-breakout strategy on the shared IndicatorHub
+    Subclasses only set the class attributes below. Entries are evaluated once
+    per completed bar of `timeframe`; EMA values and cross detection come from
+    the hub, so they are computed once per symbol for every strategy reading them.
+    """
+
+    timeframe = 1  # Minutes
+    fast_period = 8
+    slow_period = 21
+    trend_period: Optional[int] = None  # Entries need price > fast > slow > trend
+    entry_mode = 'cross'  # 'cross': fast crosses above slow; 'breakout': close above prior candle high
+    exit_on_cross = True  # Exit when fast crosses back below slow
+    candle_low_stop = False  # Trail the stop to the prior completed candle low
+    atr_exit_ratio: Optional[float] = None  # Partial exit at slow EMA + ratio * ATR
+    atr_exit_fraction = 0.5
+
+    def __init__(self, dashboard, market_data, config, position_book=None, trigger_engine=None,
+                 indicators=None):
+        super().__init__(dashboard, market_data, config, position_book, trigger_engine, indicators)
+        periods = [self.fast_period, self.slow_period]
+        if self.trend_period:
+            periods.append(self.trend_period)
+        self.warmup_bars = max(periods)
+        self.indicators.require(self.timeframe, periods)
+        self.entry_reason = f"{self.entry_mode} entry"
+
+    def generate_signals(self, data: Dict) -> List[TradeSignal]:
+        if self.timeframe not in data.get('completed_timeframes', ()):
+            return []
+        symbol = data['symbol']
+        series = self.indicators.series(symbol, self.timeframe)
+        if series is None or series.count < self.warmup_bars:
+            return []
+
+        if self._has_existing_position(symbol):
+            return self._manage_open_position(symbol, series)
+        if self._entry_triggered(series):
+            return [self._create_buy_signal(symbol, series)]
+        return []
+
+    def _entry_triggered(self, series: TimeframeSeries) -> bool:
+        if self.entry_mode == 'breakout':
+            previous = series.last_bar(2)
+            if previous is None or series.values[0] <= previous[2]:
+                return False
+            return series.aligned(PRICE, self.slow_period)
+
+        if not series.crossed_above(self.fast_period, self.slow_period):
+            return False
+        if self.trend_period:
+            return series.aligned(PRICE, self.fast_period, self.slow_period, self.trend_period)
+        return series.aligned(PRICE, self.fast_period)
+
+    def _manage_open_position(self, symbol: str, series: TimeframeSeries) -> List[TradeSignal]:
+        """Move the indicator-based exit levels; a bearish cross exits outright"""
+        position = self.current_positions[symbol]
+        if self.exit_on_cross and series.crossed_below(self.fast_period, self.slow_period):
+            return [self._create_sell_signal(position, series.values[0], "EMA Cross Exit", 1.0)]
+
+        if self.candle_low_stop:
+            self.trigger_engine.set_stop(self.name, symbol, "Candle Low Stop", series.last_bar()[3])
+
+        if self.atr_exit_ratio and symbol not in self.partial_exit_symbols and series.atr > 0:
+            self.trigger_engine.set_target(
+                self.name, symbol, "ATR Ratio Exit",
+                series.ema(self.slow_period) + self.atr_exit_ratio * series.atr,
+                fraction=self.atr_exit_fraction
+            )
+        return []
+
+    def on_position_opened(self, position: Position, server_exits: Optional[bool] = None):
+        self.partial_exit_symbols.discard(position.symbol)
+        super().on_position_opened(position, server_exits)
+
+    def create_exit_signal(self, trigger) -> TradeSignal:
+        if trigger.fraction < 1.0:
+            self.partial_exit_symbols.add(trigger.symbol)
+        position = self.current_positions[trigger.symbol]
+        return self._create_sell_signal(position, trigger.fire_price, trigger.name, trigger.fraction)
+
+    def _create_buy_signal(self, symbol: str, series: TimeframeSeries) -> TradeSignal:
+        bar = series.last_bar()
+        price = bar[4]
+        return self.new_signal(
+            symbol, SignalType.BUY, price,
+            reason=self.entry_reason,
+            entry_candle_low=bar[3] if self.candle_low_stop else 0.0,
+            stop_loss=self.calculate_stop_loss(price),
+            take_profit=self.calculate_profit_target(price)
+        )
+
+    def _create_sell_signal(self, position: Position, price: float, reason: str,
+                            sell_percentage: float) -> TradeSignal:
+        sell_size = int(position.remaining_size * sell_percentage)
+        return self.new_signal(
+            position.symbol, SignalType.SELL, price,
+            reason=reason,
+            sell_size=sell_size,
+            remaining_size=position.remaining_size - sell_size,
+            entry_price=position.entry_price
+        )
@@ -0,0 +1,256 @@
+import time
+from collections import deque
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+# Row of the price itself in the cross matrices, so price/EMA crosses share the same lookup
+PRICE = 0
+
+
+class TimeframeSeries:
+    """
+    N-minute bars for one symbol built from the real-time feed, with incremental EMAs,
+    Wilder ATR and a matrix of every line crossing every other line on the last bar
+    """
+
+    __slots__ = ('symbol', 'minutes', 'periods', '_index', '_alpha', 'values', 'prev_values',
+                 'crossed_up', 'crossed_down', 'atr', 'atr_period', 'bars', 'count',
+                 '_bucket', '_forming')
+
+    def __init__(self, symbol: str, minutes: int, periods: Tuple[int, ...], atr_period: int = 14,
+                 max_bars: int = 500):
+        self.symbol = symbol
+        self.minutes = minutes
+        self.periods = periods
+        self._index = {period: i + 1 for i, period in enumerate(periods)}
+        self._index[PRICE] = 0
+        self._alpha = np.array([1.0] + [2.0 / (period + 1) for period in periods])
+
+        # values[0] is the close, values[i] the EMA of periods[i - 1]
+        self.values = np.zeros(len(periods) + 1)
+        self.prev_values = np.zeros(len(periods) + 1)
+        self.crossed_up = np.zeros((len(periods) + 1,) * 2, dtype=bool)
+        self.crossed_down = np.zeros((len(periods) + 1,) * 2, dtype=bool)
+        self.atr = 0.0
+        self.atr_period = atr_period
+
+        # Completed bars as (start, open, high, low, close, volume)
+        self.bars = deque(maxlen=max_bars)
+        self.count = 0
+        self._bucket = None
+        self._forming = None
+
+    def update(self, time: float, open_: float, high: float, low: float, close: float,
+               volume: float) -> bool:
+        """Add a feed bar; returns True when it closes the forming N-minute bar"""
+        bucket = int(time // (self.minutes * 60))
+        forming = self._forming
+        if forming is None:
+            self._bucket = bucket
+            self._forming = [bucket * self.minutes * 60, open_, high, low, close, volume]
+            return False
+        if bucket < self._bucket:
+            return False  # Late bar from a period already closed
+
+        if bucket == self._bucket:
+            if high > forming[2]:
+                forming[2] = high
+            if low < forming[3]:
+                forming[3] = low
+            forming[4] = close
+            forming[5] += volume
+            return False
+
+        self._complete(*forming)
+        self._bucket = bucket
+        self._forming = [bucket * self.minutes * 60, open_, high, low, close, volume]
+        return True
+
+    def _complete(self, start, open_, high, low, close, volume):
+        previous_close = self.values[0]
+        self.prev_values, self.values = self.values, self.prev_values
+        if self.count == 0:
+            self.values[:] = close
+            self.prev_values[:] = close
+            self.atr = high - low
+        else:
+            # EMA update for every period at once; alpha of the price row is 1
+            np.multiply(self._alpha, close - self.prev_values, out=self.values)
+            self.values += self.prev_values
+            true_range = max(high - low, abs(high - previous_close), abs(low - previous_close))
+            self.atr += (true_range - self.atr) / min(self.count + 1, self.atr_period)
+
+        self._update_crosses()
+        self.bars.append((start, open_, high, low, close, volume))
+        self.count += 1
+
+    def _update_crosses(self):
+        # crossed_up[i, j]: line i moved from at/below line j to above it on this bar
+        above = self.values[:, None] > self.values[None, :]
+        was_above = self.prev_values[:, None] > self.prev_values[None, :]
+        np.logical_and(above, ~was_above, out=self.crossed_up)
+        np.logical_and(above.T, ~was_above.T, out=self.crossed_down)
+
+    def seed(self, bars: Iterable[Tuple[float, float, float, float, float, float]]):
+        """Warm the indicators from completed historical bars"""
+        for bar in bars:
+            self._complete(*bar)
+
+    def catch_up(self, bars: Iterable[Tuple[float, float, float, float, float, float]]):
+        """Add the completed bars missed while the bot was down; the stale forming bar is dropped"""
+        last_start = self.bars[-1][0] if self.bars else float('-inf')
+        self.seed(bar for bar in bars if bar[0] > last_start)
+        self._bucket = None
+        self._forming = None
+
+    def state(self) -> Dict:
+        """Indicator accumulators for a snapshot; the bars are saved separately"""
+        return {
+            'symbol': self.symbol,
+            'minutes': self.minutes,
+            'periods': list(self.periods),
+            'values': self.values.tolist(),
+            'prev_values': self.prev_values.tolist(),
+            'atr': self.atr,
+            'count': self.count,
+        }
+
+    def restore(self, state: Dict, bars: Iterable[Tuple]):
+        self.values[:] = state['values']
+        self.prev_values[:] = state['prev_values']
+        self.atr = state['atr']
+        self.count = state['count']
+        self.bars.extend(bars)
+        self._update_crosses()
+
+    def ema(self, period: int) -> float:
+        return float(self.values[self._index[period]])
+
+    def crossed_above(self, line: int, other: int) -> bool:
+        """Whether `line` crossed above `other` on the last bar; PRICE (0) is the close"""
+        return bool(self.crossed_up[self._index[line], self._index[other]])
+
+    def crossed_below(self, line: int, other: int) -> bool:
+        return bool(self.crossed_down[self._index[line], self._index[other]])
+
+    def aligned(self, *lines: int) -> bool:
+        """Whether the lines are in strictly descending order, e.g. aligned(PRICE, 8, 21, 50)"""
+        values = [self.values[self._index[line]] for line in lines]
+        return all(a > b for a, b in zip(values, values[1:]))
+
+    def last_bar(self, offset: int = 1) -> Optional[Tuple]:
+        """The most recent completed bar, or the one `offset` - 1 bars before it"""
+        if len(self.bars) < offset:
+            return None
+        return self.bars[-offset]
+
+
+class IndicatorHub:
+    """
+    Bar aggregation and indicator state shared by every strategy
+    Each (symbol, timeframe) series is updated once per feed bar however many
+    strategies read it; strategies declare what they need through require().
+    """
+
+    def __init__(self, market_data=None, atr_period: int = 14, max_bars: int = 500):
+        self.market_data = market_data
+        self.atr_period = atr_period
+        self.max_bars = max_bars
+        self.periods: Dict[int, set] = {}  # minutes -> EMA periods
+        self._series: Dict[Tuple[str, int], TimeframeSeries] = {}
+        self._last_bar_time: Dict[str, float] = {}
+
+    def require(self, minutes: int, periods: Iterable[int] = ()):
+        """Declare a timeframe and EMA periods; call before market data starts"""
+        self.periods.setdefault(minutes, set()).update(periods)
+
+    def series(self, symbol: str, minutes: int) -> Optional[TimeframeSeries]:
+        return self._series.get((symbol, minutes))
+
+    def export_state(self) -> List[Tuple[Dict, List[Tuple]]]:
+        """(indicator state, completed bars) of every series; the bar list is a shallow copy"""
+        return [(series.state(), list(series.bars)) for series in self._series.values()]
+
+    def restore_state(self, states: Iterable[Tuple[Dict, Iterable[Tuple]]]) -> int:
+        """Recreate series from export_state(); series whose EMA periods changed are skipped"""
+        restored = 0
+        for state, bars in states:
+            minutes = state['minutes']
+            if minutes not in self.periods or tuple(state['periods']) != tuple(sorted(self.periods[minutes])):
+                continue
+            series = TimeframeSeries(state['symbol'], minutes, tuple(state['periods']),
+                                     self.atr_period, self.max_bars)
+            series.restore(state, bars)
+            self._series[(state['symbol'], minutes)] = series
+            restored += 1
+        return restored
+
+    def top_up(self):
+        """Feed restored series the bars completed since they were saved, from the market data history"""
+        if self.market_data is None:
+            return
+        now = time.time()
+        for (symbol, minutes), series in self._series.items():
+            history = self.market_data.get_timeframe_data(symbol, minutes)
+            if history is None or not len(history):
+                continue
+            current_start = int(now // (minutes * 60)) * minutes * 60
+            series.catch_up(
+                (start, row.open, row.high, row.low, row.close, row.volume)
+                for start, row in zip(self._epochs(history['date']), history.itertuples())
+                if start < current_start
+            )
+
+    def on_bar(self, data: Dict) -> Optional[List[int]]:
+        """
+        Feed one market data package; returns the timeframes whose bar just completed,
+        or None when the package repeats the symbol's previous feed bar
+        """
+        bar = data.get('bar_data')
+        if not bar or 'close' not in bar:
+            return []
+        symbol = data['symbol']
+        bar_time = bar.get('date')
+        if isinstance(bar_time, datetime):
+            bar_time = bar_time.timestamp()
+        else:
+            bar_time = float(bar_time) if bar_time is not None else time.time()
+
+        # A bar the feed delivers twice is applied once
+        if self._last_bar_time.get(symbol) == bar_time:
+            return None
+        self._last_bar_time[symbol] = bar_time
+
+        completed = []
+        for minutes in self.periods:
+            series = self._series.get((symbol, minutes))
+            if series is None:
+                series = self._create(symbol, minutes, bar_time)
+            if series.update(bar_time, bar.get('open', bar['close']), bar.get('high', bar['close']),
+                             bar.get('low', bar['close']), bar['close'], bar.get('volume', 0)):
+                completed.append(minutes)
+        return completed
+
+    def _create(self, symbol: str, minutes: int, bar_time: float) -> TimeframeSeries:
+        series = TimeframeSeries(symbol, minutes, tuple(sorted(self.periods[minutes])),
+                                 self.atr_period, self.max_bars)
+        self._series[(symbol, minutes)] = series
+
+        history = None
+        if self.market_data is not None and hasattr(self.market_data, 'get_timeframe_data'):
+            history = self.market_data.get_timeframe_data(symbol, minutes)
+        if history is not None and len(history):
+            # Historical bars up to, not including, the one the live feed is forming
+            current_start = int(bar_time // (minutes * 60)) * minutes * 60
+            series.seed(
+                (start, row.open, row.high, row.low, row.close, row.volume)
+                for start, row in zip(self._epochs(history['date']), history.itertuples())
+                if start < current_start
+            )
+        return series
+
+    @staticmethod
+    def _epochs(dates) -> List[float]:
+        return [d.timestamp() if hasattr(d, 'timestamp') else float(d) for d in dates]
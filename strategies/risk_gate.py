@@ -0,0 +1,184 @@
+import time
+from collections import deque
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+
+from position_book import PositionBook
+from .strategy_base import SignalType, TradeSignal
+
+ENTRY_SIGNALS = (SignalType.BUY, SignalType.SELL_SHORT)
+
+
+class RiskRejection:
+    __slots__ = ('time', 'strategy', 'symbol', 'reason', 'detail')
+
+    def __init__(self, time: float, strategy: str, symbol: str, reason: str, detail: str):
+        self.time = time
+        self.strategy = strategy
+        self.symbol = symbol
+        self.reason = reason  # Short code used for counting
+        self.detail = detail
+
+    def __repr__(self):
+        return f"RiskRejection({self.strategy}:{self.symbol} {self.reason}: {self.detail})"
+
+
+class RiskGate:
+    """
+    Pre-trade checks between StrategyManager and execution, applied across all strategies
+    Every check reads precomputed counters (position book totals, per-strategy
+    entry counts, a per-minute trading-hours flag), so its cost does not grow
+    with the number of positions, symbols or strategies. Exits always pass.
+    Entry orders still working count as positions: toward the daily trade limit,
+    the position and per-symbol limits, and a strategy's one position per symbol.
+    """
+
+    def __init__(self, position_book: PositionBook, max_positions: int = 5,
+                 max_position_dollars: float = 5000.0, min_stock_price: float = 5.0,
+                 max_stock_price: float = 200.0, trading_start: str = "09:30",
+                 trading_end: str = "16:00", max_symbol_positions: int = 1,
+                 max_symbol_dollars: Optional[float] = None, max_daily_loss: Optional[float] = None):
+        self.position_book = position_book
+        # Entry orders sent and not yet filled, and the totals they add to the book's
+        self._pending_orders: Dict[int, Tuple[str, str, float]] = {}  # order id -> (strategy, symbol, dollars)
+        self.pending_entries: Dict[str, int] = {}  # Per strategy
+        self.pending_count = 0
+        self.pending_symbol_count: Dict[str, int] = {}
+        self.pending_symbol_dollars: Dict[str, float] = {}
+        self._pending_keys: Dict[Tuple[str, str], int] = {}  # (strategy, symbol) -> working entries
+        self.rejection_counts: Dict[str, int] = {}
+        self.recent_rejections = deque(maxlen=200)
+
+        # Check timings, nanoseconds
+        self.check_count = 0
+        self.total_check_ns = 0
+        self.max_check_ns = 0
+
+        self._in_hours = False
+        self._minute_expires = 0.0
+
+        self.configure(max_positions, max_position_dollars, min_stock_price, max_stock_price,
+                       trading_start, trading_end, max_symbol_positions, max_symbol_dollars,
+                       max_daily_loss)
+
+    def configure(self, max_positions: int, max_position_dollars: float, min_stock_price: float,
+                  max_stock_price: float, trading_start: str, trading_end: str,
+                  max_symbol_positions: int = 1, max_symbol_dollars: Optional[float] = None,
+                  max_daily_loss: Optional[float] = None):
+        """Apply the limits from the settings window"""
+        self.position_book.set_limits(max_positions, max_position_dollars)
+        self.min_stock_price = min_stock_price
+        self.max_stock_price = max_stock_price
+        # Trading hours as minutes after midnight, local wall-clock time like the rest of the UI
+        self.trading_start_minute = self._to_minute(trading_start)
+        self.trading_end_minute = self._to_minute(trading_end)
+        self.max_symbol_positions = max_symbol_positions
+        self.max_symbol_dollars = max_symbol_dollars if max_symbol_dollars is not None else max_position_dollars
+        self.max_daily_loss = max_daily_loss
+        self._minute_expires = 0.0
+
+    @staticmethod
+    def _to_minute(hhmm: str) -> int:
+        hours, minutes = hhmm.split(':')
+        return int(hours) * 60 + int(minutes)
+
+    def _refresh_clock(self):
+        """Recompute the trading-hours flag once per minute"""
+        now = time.time()
+        if now < self._minute_expires:
+            return
+        current = datetime.now()
+        self._minute_expires = now + 60 - current.second - current.microsecond / 1e6
+        minute = current.hour * 60 + current.minute
+        self._in_hours = self.trading_start_minute <= minute < self.trading_end_minute
+
+    def check(self, strategy, signal: TradeSignal) -> Tuple[bool, str]:
+        """Approve or reject a signal; returns (approved, reason)"""
+        start_ns = time.perf_counter_ns()
+        approved, reason, detail = self._evaluate(strategy, signal)
+        elapsed = time.perf_counter_ns() - start_ns
+
+        self.check_count += 1
+        self.total_check_ns += elapsed
+        if elapsed > self.max_check_ns:
+            self.max_check_ns = elapsed
+
+        if not approved:
+            self.rejection_counts[reason] = self.rejection_counts.get(reason, 0) + 1
+            self.recent_rejections.append(RiskRejection(time.time(), strategy.name, signal.symbol,
+                                                        reason, detail))
+            return False, f"{reason}: {detail}"
+        return True, ""
+
+    def _evaluate(self, strategy, signal: TradeSignal) -> Tuple[bool, str, str]:
+        if signal.signal_type not in ENTRY_SIGNALS:
+            return True, "", ""
+
+        self._refresh_clock()
+        if not self._in_hours:
+            return False, "trading_hours", "outside trading hours"
+
+        price = signal.price
+        if price < self.min_stock_price or price > self.max_stock_price:
+            return False, "price_range", (f"${price:.2f} outside ${self.min_stock_price:.2f}"
+                                          f" - ${self.max_stock_price:.2f}")
+
+        entries = strategy.today_trade_count + self.pending_entries.get(strategy.name, 0)
+        if entries >= strategy.max_trades_per_day:
+            return False, "max_trades_per_day", f"{strategy.name} reached {strategy.max_trades_per_day} trades"
+
+        book = self.position_book
+        if self.max_daily_loss is not None:
+            daily_pnl = book.realized_pnl + book.unrealized_pnl
+            if daily_pnl <= -self.max_daily_loss:
+                return False, "daily_loss", f"session PnL {daily_pnl:.2f} at loss limit"
+
+        symbol = signal.symbol
+        if (strategy.name, symbol) in self._pending_keys:
+            return False, "position_limits", f"{strategy.name} already has an entry working for {symbol}"
+        dollars = (signal.quantity or strategy.calculate_position_size(price)) * price
+        allowed, detail = book.can_open(strategy.name, symbol, dollars, self.pending_count)
+        if not allowed:
+            return False, "position_limits", detail
+
+        if len(book.symbol_positions(symbol)) + self.pending_symbol_count.get(symbol, 0) >= self.max_symbol_positions:
+            return False, "symbol_positions", f"{symbol} already held {self.max_symbol_positions}x"
+        if (book.symbol_exposure.get(symbol, 0.0) + self.pending_symbol_dollars.get(symbol, 0.0)
+                + dollars > self.max_symbol_dollars):
+            return False, "symbol_exposure", f"{signal.symbol} exposure above ${self.max_symbol_dollars:.2f}"
+
+        return True, "", ""
+
+    def entry_sent(self, ticket):
+        """An entry order went out; it counts as a position until it fills or ends unfilled"""
+        dollars = ticket.quantity * ticket.limit_price
+        self._pending_orders[ticket.order_id] = (ticket.strategy, ticket.symbol, dollars)
+        self._add_pending(ticket.strategy, ticket.symbol, 1, dollars)
+
+    def entry_done(self, ticket):
+        """An entry order got its first fill, or was cancelled or rejected; repeated calls are ignored"""
+        pending = self._pending_orders.pop(ticket.order_id, None)
+        if pending is not None:
+            strategy, symbol, dollars = pending
+            self._add_pending(strategy, symbol, -1, -dollars)
+
+    def _add_pending(self, strategy: str, symbol: str, count: int, dollars: float):
+        self.pending_count += count
+        self.pending_entries[strategy] = self.pending_entries.get(strategy, 0) + count
+        self.pending_symbol_count[symbol] = self.pending_symbol_count.get(symbol, 0) + count
+        self.pending_symbol_dollars[symbol] = self.pending_symbol_dollars.get(symbol, 0.0) + dollars
+        key = (strategy, symbol)
+        working = self._pending_keys.get(key, 0) + count
+        if working > 0:
+            self._pending_keys[key] = working
+        else:
+            self._pending_keys.pop(key, None)
+
+    def stats(self) -> Dict:
+        """Check counts, rejection counts by reason and mean/max check time in microseconds"""
+        return {
+            'checks': self.check_count,
+            'mean_us': self.total_check_ns / self.check_count / 1000 if self.check_count else 0.0,
+            'max_us': self.max_check_ns / 1000,
+            'rejections': dict(self.rejection_counts),
+        }
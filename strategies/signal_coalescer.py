@@ -0,0 +1,100 @@
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from .strategy_base import SignalType, TradeSignal
+
+EXIT_SIGNALS = (SignalType.SELL, SignalType.EXIT, SignalType.BUY_TO_COVER)
+
+
+class SignalCoalescer:
+    """
+    Merges the signals of one (strategy, symbol) within a bar into a single
+    order intent and drops intents that repeat within `repeat_window` seconds
+    An exit outranks an entry and the larger exit wins; the reasons of every
+    merged signal are kept in the winner's `reasons`. Only intents reported
+    through sent() count as repeats, so a rejected intent can come back.
+    """
+
+    def __init__(self, repeat_window: float = 60.0,
+                 release: Optional[Callable[[TradeSignal], None]] = None):
+        self.repeat_window = repeat_window
+        self.release = release  # Receives signals that are merged away or suppressed
+        # (strategy, symbol) -> (strategy object, merged signal, reasons), in arrival order
+        self._pending: Dict[Tuple[str, str], tuple] = {}
+        # (strategy, symbol) -> (signal type, quantity, bar, monotonic time) of the last intent sent
+        self._last_sent: Dict[Tuple[str, str], tuple] = {}
+        self._flush_bar = None
+        self._flush_time = 0.0
+
+        self.received_count = 0
+        self.merged_count = 0
+        self.suppressed_count = 0
+
+    @staticmethod
+    def _size(signal: TradeSignal) -> float:
+        return signal.quantity or signal.sell_size
+
+    @staticmethod
+    def _reason(signal: TradeSignal) -> str:
+        return signal.reason or signal.signal_type.name
+
+    def add(self, strategy, signal: TradeSignal):
+        """Queue a signal, merging it with what the strategy already sent for the symbol"""
+        self.received_count += 1
+        key = (strategy.name, signal.symbol)
+        pending = self._pending.get(key)
+        if pending is None:
+            self._pending[key] = (strategy, signal, [self._reason(signal)])
+            return
+
+        self.merged_count += 1
+        _, current, reasons = pending
+        reasons.append(self._reason(signal))
+        current_is_exit = current.signal_type in EXIT_SIGNALS
+        is_exit = signal.signal_type in EXIT_SIGNALS
+        if (is_exit and not current_is_exit) or \
+                (is_exit == current_is_exit and self._size(signal) > self._size(current)):
+            self._pending[key] = (strategy, signal, reasons)
+            signal = current
+        if self.release is not None:
+            self.release(signal)
+
+    def flush(self, bar=None) -> List[tuple]:
+        """Return the net (strategy, signal) intents for the bar, minus recent repeats"""
+        if not self._pending:
+            return []
+
+        now = self._flush_time = time.monotonic()
+        self._flush_bar = bar
+        intents = []
+        for key, (strategy, signal, reasons) in self._pending.items():
+            intent = (signal.signal_type, self._size(signal))
+            last = self._last_sent.get(key)
+            if last is not None and last[:2] == intent and \
+                    (last[2] == bar or now - last[3] < self.repeat_window):
+                self.suppressed_count += 1
+                if self.release is not None:
+                    self.release(signal)
+                continue
+
+            signal.reasons = reasons
+            intents.append((strategy, signal))
+
+        self._pending.clear()
+        return intents
+
+    def sent(self, strategy_name: str, signal: TradeSignal):
+        """Record an intent of the last flush that passed the downstream checks"""
+        self._last_sent[(strategy_name, signal.symbol)] = (signal.signal_type, self._size(signal),
+                                                           self._flush_bar, self._flush_time)
+
+    def forget(self, strategy: str, symbol: str):
+        """Allow the next intent for a position right away, e.g. once it has been closed"""
+        self._last_sent.pop((strategy, symbol), None)
+
+    def stats(self) -> Dict:
+        return {
+            'received': self.received_count,
+            'merged': self.merged_count,
+            'suppressed': self.suppressed_count,
+        }
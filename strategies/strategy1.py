@@ -0,0 +1,16 @@
+from .ema_cross_engine import EMACrossStrategy
+
+
+class Strategy1(EMACrossStrategy):
+    """1min 8-21-50 EMA Trend Rider: 8 EMA crosses above 21 EMA with price > 8 > 21 > 50"""
+
+    number = 1
+    timeframe = 1
+    fast_period = 8
+    slow_period = 21
+    trend_period = 50
+
+    def __init__(self, dashboard, market_data, config, position_book=None, trigger_engine=None,
+                 indicators=None):
+        super().__init__(dashboard, market_data, config, position_book, trigger_engine, indicators)
+        self.name = "Strategy1_EMA_Trend_Rider"
@@ -1,26 +1,17 @@
-from typing import Dict, List
-from datetime import datetime
-from dataclasses import dataclass
+from typing import Dict, List, Optional
+from .indicator_hub import PRICE
 from .strategy_base import StrategyBase, TradeSignal, SignalType
-
-
-@dataclass
-class Strategy2Position:
-    symbol: str
-    entry_price: float
-    entry_time: datetime
-    entry_candle_low: float
-    position_size: float
-    remaining_size: float  # Track remaining position after partial sells
-    initial_stop_loss: float
-    take_profit_level: float
+from .trigger_engine import ExitTrigger
+from position_book import Position
 
 
 class Strategy2(StrategyBase):
-    def __init__(self, dashboard, market_data, config):
-        super().__init__(dashboard, market_data, config)
+    number = 2  # Position in the settings window and dashboard
+
+    def __init__(self, dashboard, market_data, config, position_book=None, trigger_engine=None,
+                 indicators=None):
+        super().__init__(dashboard, market_data, config, position_book, trigger_engine, indicators)
         self.name = "Strategy2_EMA_ATR"
-        self.positions: Dict[str, Strategy2Position] = {}
         self.timeframes = {
             'daily': 'D',
             '5min': '5'
@@ -30,6 +21,12 @@ class Strategy2(StrategyBase):
         self.partial_sell_percentage = 0.75
         self.last_update = "2025-08-10 04:10:30"
         self.user_login = "Kish19691969"
+        self.indicators.require(5, [50])
+        self.indicators.require(1, [50])
+
+    @property
+    def positions(self) -> Dict[str, Position]:
+        return self.current_positions
 
     def check_override_conditions(self, symbol: str, data: Dict) -> bool:
         """Check daily timeframe EMA alignment"""
@@ -46,108 +43,81 @@ class Strategy2(StrategyBase):
         return (price > ema8 > ema21 > ema50)
 
     def generate_signals(self, data: Dict) -> List[TradeSignal]:
-        signals = []
-
-        for symbol, symbol_data in data.items():
-            # Skip if position exists
-            if self._has_existing_position(symbol):
-                self._check_exit_signals(symbol, symbol_data, signals)
-                continue
-
-            # Check buy conditions
-            if self._check_buy_conditions(symbol, symbol_data):
-                signals.append(self._create_buy_signal(symbol, symbol_data))
-
-        return signals
+        # Evaluated once per completed 5min bar
+        if 5 not in data.get('completed_timeframes', ()):
+            return []
+        symbol = data['symbol']
+
+        # Stops and targets fire from the trigger engine; the EMA cross exit needs a 5min close below the 50 EMA
+        if self._has_existing_position(symbol):
+            five_min = self.indicators.series(symbol, 5)
+            if five_min is not None and five_min.count and five_min.values[0] < five_min.ema(50):
+                return [self._create_sell_signal(symbol, five_min.values[0], "EMA Cross Exit", 1.0)]
+            self._update_exit_triggers(symbol)
+            return []
+
+        if self._check_buy_conditions(symbol, data):
+            return [self._create_buy_signal(symbol)]
+        return []
 
     def _check_buy_conditions(self, symbol: str, data: Dict) -> bool:
         """Check all buy conditions"""
-        # Get 5-minute data
-        five_min_data = self.market_data.get_timeframe_data(symbol, '5')
-        if five_min_data is None or len(five_min_data) < 50:
+        five_min = self.indicators.series(symbol, 5)
+        if five_min is None or five_min.count < 50:
             return False
 
-        # Check override conditions first
-        if not self.check_override_conditions(symbol, data):
+        # Check 50 EMA cross on 5-min first, it rules out most bars
+        if not five_min.crossed_above(PRICE, 50):
             return False
 
-        # Check 50 EMA cross on 5-min
-        current_price = five_min_data['close'].iloc[-1]
-        previous_close = five_min_data['close'].iloc[-2]
-        current_ema50 = five_min_data['EMA_50'].iloc[-1]
-        previous_ema50 = five_min_data['EMA_50'].iloc[-2]
-
-        return (previous_close <= previous_ema50 and
-                current_price > current_ema50)
-
-    def _check_exit_signals(self, symbol: str, data: Dict, signals: List[TradeSignal]):
-        """Check all exit conditions"""
+        return self.check_override_conditions(symbol, data)
+
+    def on_position_opened(self, position: Position, server_exits: Optional[bool] = None):
+        """Arm the Strategy2 exits for a newly filled position"""
+        # Stop loss: initial stop or a break of the entry candle low, whichever is hit first
+        self.partial_exit_symbols.discard(position.symbol)
+        # With bracket orders the stop loss and take profit already work at IB
+        if not (self.server_side_exits if server_exits is None else server_exits):
+            stop_level = max(position.initial_stop_loss, position.entry_candle_low)
+            if stop_level:
+                self.trigger_engine.set_stop(self.name, position.symbol, "Stop Loss", stop_level)
+            if position.take_profit_level:
+                self.trigger_engine.set_target(self.name, position.symbol, "Take Profit", position.take_profit_level)
+        self._update_exit_triggers(position.symbol)
+
+    def _update_exit_triggers(self, symbol: str):
+        """Move the ATR ratio exit level to the latest 1min indicators"""
         position = self.positions.get(symbol)
         if not position:
             return
 
-        five_min_data = self.market_data.get_timeframe_data(symbol, '5')
-        if five_min_data is None:
+        # ATR ratio threshold (partial exit, once per position), on the 1min ATR ratio:
+        #    (price - EMA_50) / ATR >= threshold  <=>  price >= EMA_50 + threshold * ATR
+        if symbol in self.partial_exit_symbols or position.remaining_size != position.position_size:
             return
-
-        current_price = five_min_data['close'].iloc[-1]
-        atr_ratio = self.market_data.get_atr_ratio(symbol)
-
-        # Check exit conditions
-        # 1. ATR ratio threshold (partial exit)
-        if (atr_ratio >= self.atr_ratio_threshold and
-                position.remaining_size == position.position_size):
-            signals.append(self._create_sell_signal(
-                symbol,
-                current_price,
-                "ATR Ratio Exit",
-                self.partial_sell_percentage
-            ))
-
-        # 2. Price below 50 EMA
-        current_ema50 = five_min_data['EMA_50'].iloc[-1]
-        if current_price < current_ema50:
-            signals.append(self._create_sell_signal(
-                symbol,
-                current_price,
-                "EMA Cross Exit",
-                1.0
-            ))
-
-        # 3. Take profit
-        if current_price >= position.take_profit_level:
-            signals.append(self._create_sell_signal(
-                symbol,
-                current_price,
-                "Take Profit",
-                1.0
-            ))
-
-        # 4. Stop loss
-        if (current_price <= position.initial_stop_loss or
-                current_price < position.entry_candle_low):
-            signals.append(self._create_sell_signal(
-                symbol,
-                current_price,
-                "Stop Loss",
-                1.0
-            ))
-
-    def _create_buy_signal(self, symbol: str, data: Dict) -> TradeSignal:
+        one_min = self.indicators.series(symbol, 1)
+        if one_min is not None and one_min.atr > 0:
+            self.trigger_engine.set_target(
+                self.name, symbol, "ATR Ratio Exit",
+                one_min.ema(50) + self.atr_ratio_threshold * one_min.atr,
+                fraction=self.partial_sell_percentage
+            )
+
+    def create_exit_signal(self, trigger: ExitTrigger) -> TradeSignal:
+        if trigger.fraction < 1.0:
+            self.partial_exit_symbols.add(trigger.symbol)
+        return self._create_sell_signal(trigger.symbol, trigger.fire_price, trigger.name, trigger.fraction)
+
+    def _create_buy_signal(self, symbol: str) -> TradeSignal:
         """Create a buy signal with calculated levels"""
-        current_price = data['close'].iloc[-1]
-
-        return TradeSignal(
-            symbol=symbol,
-            signal_type=SignalType.BUY,
-            price=current_price,
-            timestamp="2025-08-10 04:10:30",
-            strategy_name=self.name,
-            additional_info={
-                'entry_candle_low': data['low'].iloc[-1],
-                'stop_loss': current_price * (1 - self.config.stop_loss_percentage),
-                'take_profit': current_price * (1 + self.config.take_profit_percentage)
-            }
+        entry_candle = self.indicators.series(symbol, 5).last_bar()
+        current_price = entry_candle[4]
+
+        return self.new_signal(
+            symbol, SignalType.BUY, current_price,
+            entry_candle_low=entry_candle[3],
+            stop_loss=self.calculate_stop_loss(current_price),
+            take_profit=self.calculate_profit_target(current_price)
         )
 
     def _create_sell_signal(
@@ -161,16 +131,10 @@ class Strategy2(StrategyBase):
         position = self.positions[symbol]
         sell_size = position.remaining_size * sell_percentage
 
-        return TradeSignal(
-            symbol=symbol,
-            signal_type=SignalType.SELL,
-            price=price,
-            timestamp="2025-08-10 04:10:30",
-            strategy_name=self.name,
-            additional_info={
-                'reason': reason,
-                'sell_size': sell_size,
-                'remaining_size': position.remaining_size - sell_size,
-                'entry_price': position.entry_price
-            }
+        return self.new_signal(
+            symbol, SignalType.SELL, price,
+            reason=reason,
+            sell_size=sell_size,
+            remaining_size=position.remaining_size - sell_size,
+            entry_price=position.entry_price
         )
\ No newline at end of file
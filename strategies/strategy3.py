@@ -0,0 +1,17 @@
+from .ema_cross_engine import EMACrossStrategy
+
+
+class Strategy3(EMACrossStrategy):
+    """2min Candle Break: close above the prior candle high in an uptrend, stop trails candle lows"""
+
+    number = 3
+    timeframe = 2
+    fast_period = 8
+    slow_period = 21
+    entry_mode = 'breakout'
+    candle_low_stop = True
+
+    def __init__(self, dashboard, market_data, config, position_book=None, trigger_engine=None,
+                 indicators=None):
+        super().__init__(dashboard, market_data, config, position_book, trigger_engine, indicators)
+        self.name = "Strategy3_Candle_Break"
@@ -0,0 +1,17 @@
+from .ema_cross_engine import EMACrossStrategy
+
+
+class Strategy4(EMACrossStrategy):
+    """2min 8/21 EMA Cross with ATR Sell: partial exit once price stretches from the 21 EMA"""
+
+    number = 4
+    timeframe = 2
+    fast_period = 8
+    slow_period = 21
+    atr_exit_ratio = 3.0
+    atr_exit_fraction = 0.5
+
+    def __init__(self, dashboard, market_data, config, position_book=None, trigger_engine=None,
+                 indicators=None):
+        super().__init__(dashboard, market_data, config, position_book, trigger_engine, indicators)
+        self.name = "Strategy4_EMA_Cross_ATR"
@@ -1,33 +1,124 @@
+import time
 from abc import ABC, abstractmethod
-from typing import Dict, List
-from dataclasses import dataclass
-from enum import Enum
+from typing import Dict, List, Optional
+from enum import IntEnum
 from datetime import datetime
+from position_book import Position, PositionBook
+from .indicator_hub import IndicatorHub
+from .trigger_engine import ExitTrigger, TriggerEngine
+
+class SignalType(IntEnum):
+    BUY = 1
+    SELL = 2
+    SELL_SHORT = 3
+    BUY_TO_COVER = 4
+    HOLD = 5
+    EXIT = 6
 
-class SignalType(Enum):
-    BUY = "BUY"
-    SELL = "SELL"
-    SELL_SHORT = "SELL_SHORT"
-    BUY_TO_COVER = "BUY_TO_COVER"
-    HOLD = "HOLD"
-    EXIT = "EXIT"
 
-@dataclass
 class TradeSignal:
-    symbol: str
-    signal_type: SignalType
-    price: float
-    quantity: int = 0
-    timestamp: str = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    strategy_name: str = ""
-    additional_info: Dict = None
+    """
+    Compact signal record with fixed fields; timestamp is epoch seconds taken at creation
+    Entry signals fill stop_loss / take_profit / entry_candle_low, exits fill
+    sell_size / remaining_size / entry_price; unused fields stay zero.
+    """
+
+    __slots__ = ('symbol', 'signal_type', 'price', 'quantity', 'timestamp', 'strategy_name',
+                 'reason', 'stop_loss', 'take_profit', 'entry_candle_low', 'sell_size',
+                 'remaining_size', 'entry_price', 'reasons')
+
+    def __init__(self, symbol: str, signal_type: SignalType, price: float, quantity: int = 0,
+                 timestamp: Optional[float] = None, strategy_name: str = "", reason: str = "",
+                 stop_loss: float = 0.0, take_profit: float = 0.0, entry_candle_low: float = 0.0,
+                 sell_size: float = 0.0, remaining_size: float = 0.0, entry_price: float = 0.0):
+        self.symbol = symbol
+        self.signal_type = signal_type
+        self.price = price
+        self.quantity = quantity
+        self.timestamp = time.time() if timestamp is None else timestamp
+        self.strategy_name = strategy_name
+        self.reason = reason
+        self.stop_loss = stop_loss
+        self.take_profit = take_profit
+        self.entry_candle_low = entry_candle_low
+        self.sell_size = sell_size
+        self.remaining_size = remaining_size
+        self.entry_price = entry_price
+        self.reasons = None  # Reasons of every signal merged into this one
+
+    @property
+    def time_str(self) -> str:
+        return datetime.fromtimestamp(self.timestamp).strftime("%Y-%m-%d %H:%M:%S")
+
+    @property
+    def additional_info(self) -> Dict:
+        """Dict view of the optional fields, for display and older callers"""
+        info = {'reason': self.reason} if self.reason else {}
+        if self.signal_type == SignalType.BUY or self.signal_type == SignalType.SELL_SHORT:
+            info.update(stop_loss=self.stop_loss, take_profit=self.take_profit,
+                        entry_candle_low=self.entry_candle_low)
+        elif self.sell_size:
+            info.update(sell_size=self.sell_size, remaining_size=self.remaining_size,
+                        entry_price=self.entry_price)
+        if self.reasons:
+            info['reasons'] = self.reasons
+        return info
+
+    def __repr__(self):
+        return (f"TradeSignal({self.strategy_name}:{self.symbol} {self.signal_type.name} "
+                f"{self.quantity or self.sell_size:g} @ {self.price:.2f} {self.reason})")
+
+
+class SignalPool:
+    """
+    Free list of TradeSignal records for high-rate evaluation
+    A released signal is re-initialized on its next acquire, so consumers
+    must copy whatever they keep beyond the dispatch of the signal.
+    """
+
+    def __init__(self, max_free: int = 256):
+        self.max_free = max_free
+        self._free: List[TradeSignal] = []
+        self.created = 0
+        self.reused = 0
+
+    def acquire(self, symbol: str, signal_type: SignalType, price: float, quantity: int = 0,
+                timestamp: Optional[float] = None, strategy_name: str = "", reason: str = "",
+                stop_loss: float = 0.0, take_profit: float = 0.0, entry_candle_low: float = 0.0,
+                sell_size: float = 0.0, remaining_size: float = 0.0,
+                entry_price: float = 0.0) -> TradeSignal:
+        if self._free:
+            signal = self._free.pop()
+            self.reused += 1
+            signal.__init__(symbol, signal_type, price, quantity, timestamp, strategy_name, reason,
+                            stop_loss, take_profit, entry_candle_low, sell_size, remaining_size,
+                            entry_price)
+            return signal
+        self.created += 1
+        return TradeSignal(symbol, signal_type, price, quantity, timestamp, strategy_name, reason,
+                           stop_loss, take_profit, entry_candle_low, sell_size, remaining_size,
+                           entry_price)
+
+    def release(self, signal: TradeSignal):
+        if len(self._free) < self.max_free:
+            self._free.append(signal)
 
 class StrategyBase(ABC):
-    def __init__(self, dashboard, market_data, config):
+    number = 0  # Position in the settings window and dashboard
+
+    def __init__(self, dashboard, market_data, config, position_book=None, trigger_engine=None,
+                 indicators=None):
         self.dashboard = dashboard
         self.market_data = market_data
         self.config = config
+        self.position_book = position_book if position_book is not None else PositionBook()
+        self.trigger_engine = trigger_engine if trigger_engine is not None else TriggerEngine()
+        self.indicators = indicators if indicators is not None else IndicatorHub(market_data)
+        # Set when entries carry bracket orders, so stop loss / take profit live at the broker
+        self.server_side_exits = False
         self.name = self.__class__.__name__
+        self.enabled = True  # Disabled strategies open nothing new but still manage their open positions
+        self.signal_pool: Optional[SignalPool] = None  # Set by StrategyManager when pooling is on
         
         # Trading parameters
         self.max_position_dollars = 5000.0
@@ -36,11 +127,24 @@ class StrategyBase(ABC):
         self.max_trades_per_day = 5
         
         # Strategy state
-        self.current_positions = {}
         self.today_trade_count = 0
         self.last_update_time = None
+        self.partial_exit_symbols = set()  # Positions whose ATR partial exit already fired
         self.user_login = "Kish19691969"
 
+    @property
+    def current_positions(self):
+        """This strategy's open positions, read from the shared position book"""
+        return self.position_book.strategy_positions(self.name)
+
+    def get_pnl(self) -> float:
+        """Session PnL of this strategy, realized plus unrealized"""
+        book = self.position_book
+        return book.strategy_realized_pnl.get(self.name, 0.0) + book.strategy_unrealized_pnl(self.name)
+
+    def _has_existing_position(self, symbol: str) -> bool:
+        return self.position_book.has_position(symbol, self.name)
+
     @abstractmethod
     def generate_signals(self, data: Dict) -> List[TradeSignal]:
         """Each strategy must implement this method to generate trading signals"""
@@ -48,15 +152,18 @@ class StrategyBase(ABC):
 
     def check_global_conditions(self, signal: TradeSignal) -> bool:
         """Check if global trading conditions are met"""
+        # Exits always pass: a position must be closable whatever the day's count
+        if signal.signal_type in [SignalType.EXIT, SignalType.SELL, SignalType.BUY_TO_COVER]:
+            return True
+
         # Check if we've exceeded max trades for the day
         if self.today_trade_count >= self.max_trades_per_day:
             return False
-            
-        # Check if we have an existing position for non-exit signals
-        if signal.signal_type not in [SignalType.EXIT, SignalType.SELL, SignalType.BUY_TO_COVER]:
-            if signal.symbol in self.current_positions:
-                return False
-                
+
+        # Check if we have an existing position for entry signals
+        if signal.symbol in self.current_positions:
+            return False
+
         return True
 
     def update_state(self):
@@ -69,6 +176,30 @@ class StrategyBase(ABC):
             
         self.last_update_time = current_time
 
+    def export_state(self) -> Dict:
+        """Counters to carry across a restart"""
+        return {
+            'today_trade_count': self.today_trade_count,
+            'last_update_time': self.last_update_time.timestamp() if self.last_update_time else None,
+            'partial_exit_symbols': sorted(self.partial_exit_symbols),
+        }
+
+    def restore_state(self, state: Dict):
+        """Apply export_state() after positions are restored; counters from an earlier day are dropped"""
+        # The ATR partial exit fires once per position; don't re-arm it for positions that took it
+        for symbol in state.get('partial_exit_symbols', ()):
+            if self._has_existing_position(symbol):
+                self.partial_exit_symbols.add(symbol)
+                self.trigger_engine.remove(self.name, symbol, "ATR Ratio Exit")
+
+        if state.get('last_update_time') is None:
+            return
+        last_update_time = datetime.fromtimestamp(state['last_update_time'])
+        if last_update_time.date() != datetime.now().date():
+            return
+        self.last_update_time = last_update_time
+        self.today_trade_count = max(self.today_trade_count, state.get('today_trade_count', 0))
+
     def calculate_position_size(self, price: float) -> int:
         """Calculate the number of shares to trade based on max position size"""
         if price <= 0:
@@ -103,31 +234,42 @@ class StrategyBase(ABC):
         self.market_data.update(market_data)
         self.update_state()
 
-    def manage_positions(self):
-        """Manage existing positions (check stops, targets, etc.)"""
+    def on_position_opened(self, position: Position, server_exits: Optional[bool] = None):
+        """
+        Arm the exit triggers for a newly filled position; server_exits tells whether
+        bracket orders protect it at the broker, by default whenever entries carry them
+        """
+        if self.server_side_exits if server_exits is None else server_exits:
+            return
+        if position.initial_stop_loss:
+            self.trigger_engine.set_stop(self.name, position.symbol, "Stop Loss", position.initial_stop_loss)
+        if position.take_profit_level:
+            self.trigger_engine.set_target(self.name, position.symbol, "Take Profit", position.take_profit_level)
+
+    def new_signal(self, symbol: str, signal_type: SignalType, price: float, quantity: int = 0,
+                   reason: str = "", stop_loss: float = 0.0, take_profit: float = 0.0,
+                   entry_candle_low: float = 0.0, sell_size: float = 0.0,
+                   remaining_size: float = 0.0, entry_price: float = 0.0) -> TradeSignal:
+        """Create a signal for this strategy, from the shared pool when one is attached"""
+        if self.signal_pool is not None:
+            return self.signal_pool.acquire(symbol, signal_type, price, quantity, None, self.name,
+                                            reason, stop_loss, take_profit, entry_candle_low,
+                                            sell_size, remaining_size, entry_price)
+        return TradeSignal(symbol, signal_type, price, quantity, None, self.name, reason,
+                           stop_loss, take_profit, entry_candle_low, sell_size, remaining_size,
+                           entry_price)
+
+    def create_exit_signal(self, trigger: ExitTrigger) -> TradeSignal:
+        """Build the exit signal for a fired trigger"""
+        position = self.current_positions.get(trigger.symbol)
+        quantity = int(position.remaining_size * trigger.fraction) if position else 0
+        return self.new_signal(trigger.symbol, SignalType.EXIT, trigger.fire_price, quantity,
+                               reason=trigger.name)
+
+    def manage_positions(self, triggers: List[ExitTrigger]) -> List[TradeSignal]:
+        """Turn the exit triggers fired by the trigger engine into exit signals"""
         signals = []
-        
-        for symbol, position in self.current_positions.items():
-            current_price = self.market_data.get(symbol, {}).get('price')
-            if not current_price:
-                continue
-                
-            # Check stop loss
-            if current_price <= position['stop_loss']:
-                signals.append(TradeSignal(
-                    symbol=symbol,
-                    signal_type=SignalType.EXIT,
-                    price=current_price,
-                    quantity=position['quantity']
-                ))
-                
-            # Check profit target
-            elif current_price >= position['profit_target']:
-                signals.append(TradeSignal(
-                    symbol=symbol,
-                    signal_type=SignalType.EXIT,
-                    price=current_price,
-                    quantity=position['quantity']
-                ))
-                
+        for trigger in triggers:
+            if trigger.symbol in self.current_positions:
+                signals.append(self.create_exit_signal(trigger))
         return signals
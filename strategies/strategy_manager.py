@@ -1,7 +1,16 @@
-from typing import Dict, Type
-from datetime import datetime
-from .strategy_base import StrategyBase, TradeSignal
+import time
+from typing import Dict, List, Optional, Type
+from datetime import datetime, timedelta
+from .strategy_base import StrategyBase, TradeSignal, SignalType, SignalPool
+from latency_monitor import LatencyMonitor
 from market_data_handler import MarketDataHandler
+from pnl_engine import PnLEngine
+from position_book import PositionBook
+from .indicator_hub import IndicatorHub
+from .risk_gate import RiskGate
+from .signal_coalescer import SignalCoalescer
+from .strategy_supervisor import StrategySupervisor
+from .trigger_engine import TriggerEngine
 
 class StrategyManager:
     def __init__(self, dashboard, market_data, config):
@@ -9,39 +18,315 @@ class StrategyManager:
         self.market_data = market_data
         self.config = config
         self.strategies: Dict[str, StrategyBase] = {}
+        self.position_book = PositionBook()
+        self.pnl = PnLEngine(self.position_book)
+        self.trigger_engine = TriggerEngine()
+        self.indicators = IndicatorHub(market_data)
+        self.risk_gate = RiskGate(self.position_book)
+        # Signal records are recycled once dispatched when pooling is enabled
+        self.signal_pool = SignalPool() if config.pool_signals else None
+        self.coalescer = SignalCoalescer(config.signal_repeat_window,
+                                         self.signal_pool.release if self.signal_pool else None)
+        self.supervisor = StrategySupervisor(config.strategy_time_budget_ms,
+                                             config.breaker_max_errors,
+                                             config.breaker_max_overruns,
+                                             config.breaker_cooldown)
+        self.execution = None
+        self.journal = None
+        self._next_checkpoint = 0.0
+        self._day_end = self._next_midnight()
+        self.snapshots = None
+        self.latency = LatencyMonitor()
+        self._trace = None  # LatencyTrace of the bar being processed
         self.user_login = "Kish19691969"
         self.last_update = "2025-08-10 07:11:20"
 
     def register_strategy(self, strategy_class: Type[StrategyBase]):
         """Register a new strategy"""
-        strategy = strategy_class(self.dashboard, self.market_data, self.config)
+        strategy = strategy_class(self.dashboard, self.market_data, self.config,
+                                  position_book=self.position_book,
+                                  trigger_engine=self.trigger_engine,
+                                  indicators=self.indicators)
+        strategy.server_side_exits = bool(self.execution and self.execution.bracket_orders)
+        strategy.signal_pool = self.signal_pool
         self.strategies[strategy.name] = strategy
         self._log_action(f"Registered strategy: {strategy.name}")
 
+    def attach_execution(self, execution):
+        """Route approved signals to an ExecutionEngine"""
+        self.execution = execution
+        execution.fill_callbacks.append(self.pnl.on_fill)
+        execution.fill_callbacks.append(self._on_fill)
+        execution.status_callbacks.append(self._on_order_status)
+        for strategy in self.strategies.values():
+            strategy.server_side_exits = execution.bracket_orders
+        self._log_action("Execution engine attached")
+
+    def attach_journal(self, journal):
+        """Write approved signals, orders and fills to a TradeJournal"""
+        self.journal = journal
+        journal.start()
+        self._next_checkpoint = time.monotonic() + self.config.snapshot_interval
+        self._log_action(f"Trade journal attached: {journal.path}")
+
+    def recover_from_journal(self):
+        """Rebuild open positions and today's trade counts from the journal; call before market data starts"""
+        start = time.perf_counter()
+        trade_counts = self.journal.recover(self.position_book)
+        for name, count in trade_counts.items():
+            strategy = self.strategies.get(name)
+            if strategy is not None:
+                strategy.today_trade_count = count
+        # Stop and target orders still working at the broker keep protecting their positions
+        adopted = self.execution.adopt_open_orders() if self.execution is not None else 0
+        for position in self.position_book.positions():
+            strategy = self.strategies.get(position.strategy)
+            if strategy is not None:
+                # A position whose bracket did not survive the restart gets client-side exits
+                bracketed = (self.execution is not None and
+                             self.execution.has_working_bracket(position.strategy, position.symbol))
+                strategy.on_position_opened(position, server_exits=bracketed)
+        self._log_action(f"Recovered {self.position_book.position_count} open positions, "
+                         f"{adopted} working exit orders and {sum(trade_counts.values())} trades "
+                         f"today in {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    def checkpoint_journal(self):
+        """Snapshot positions and trade counts so the next recovery replays only newer fills"""
+        if self.journal is not None:
+            self.journal.checkpoint(self.position_book, {
+                name: strategy.today_trade_count for name, strategy in self.strategies.items()
+            })
+
+    def attach_snapshots(self, snapshots):
+        """Save a StateSnapshot periodically while market data flows"""
+        self.snapshots = snapshots
+        self._log_action(f"State snapshots every {snapshots.interval:g}s to {snapshots.array_path}")
+
+    def save_snapshot(self):
+        if self.snapshots is not None:
+            self.snapshots.save(self.market_data, self.indicators, self.strategies)
+
+    def warm_start(self) -> Optional[float]:
+        """
+        Restore bars and indicators from the last snapshot, positions from the journal,
+        then strategy counters; returns the snapshot time, or None for a cold start
+        """
+        start = time.perf_counter()
+        snapshot = self.snapshots.load() if self.snapshots is not None else None
+        if snapshot is not None:
+            histories, series = self.snapshots.restore_market_state(snapshot, self.market_data, self.indicators)
+            self._log_action(f"Restored {histories} histories and {series} indicator series from the snapshot")
+        # Indicators are back before the journal re-arms exit triggers for the open positions
+        if self.journal is not None:
+            self.recover_from_journal()
+        if snapshot is None:
+            return None
+        self.snapshots.restore_strategies(snapshot, self.strategies)
+        self._log_action(f"Warm start from the snapshot of {datetime.fromtimestamp(snapshot.time):%H:%M:%S} "
+                         f"in {(time.perf_counter() - start) * 1000:.1f} ms")
+        return snapshot.time
+
+    @staticmethod
+    def _next_midnight() -> float:
+        return (datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+                + timedelta(days=1)).timestamp()
+
+    def check_new_day(self):
+        """Roll the session's realized PnL over at midnight; called on every bar and UI frame"""
+        if time.time() < self._day_end:
+            return
+        self._day_end = self._next_midnight()
+        self.pnl.new_day()
+        self._log_action("New trading day: session realized PnL reset")
+
     def process_market_data(self, new_data: Dict):
         """Process new market data through all strategies"""
-        for strategy_name, strategy in self.strategies.items():
+        self.check_new_day()
+        self._trace = new_data.get('trace')
+        if self._trace is not None:
+            self.latency.record_trace(self._trace, time.perf_counter_ns())
+
+        # Bars and indicators are updated once here for every strategy
+        completed = self.indicators.on_bar(new_data)
+        new_data['completed_timeframes'] = completed or []
+
+        # Mark open positions before strategies look at them; a repeated feed bar was already applied
+        bar_data = new_data.get('bar_data')
+        fired = []
+        if bar_data and 'close' in bar_data and completed is not None:
+            symbol = new_data['symbol']
+            self.position_book.update_price(symbol, bar_data['close'])
+            self.pnl.on_price(symbol)
+            # Simulated venues fill resting orders on the new bar before strategies react
+            if self.execution is not None:
+                self.execution.on_bar(symbol, bar_data)
+            # Only the nearest stop/target levels of this symbol are examined
+            fired = self.trigger_engine.on_price(symbol, bar_data['close'],
+                                                 bar_data.get('low'), bar_data.get('high'))
+
+        for trigger in fired:
+            strategy = self.strategies.get(trigger.strategy)
+            if strategy is None:
+                continue
+            for signal in self._run_strategy(strategy, strategy.manage_positions, [trigger], essential=True):
+                self.coalescer.add(strategy, signal)
+
+        for strategy in self.strategies.values():
+            if strategy.enabled:
+                for signal in self._run_strategy(strategy, strategy.generate_signals, new_data):
+                    self.coalescer.add(strategy, signal)
+            elif strategy.current_positions:
+                # A disabled strategy still runs its exits and exit-level updates, but opens nothing
+                for signal in self._run_strategy(strategy, strategy.generate_signals, new_data):
+                    if signal.signal_type in (SignalType.BUY, SignalType.SELL_SHORT):
+                        if self.signal_pool is not None:
+                            self.signal_pool.release(signal)
+                    else:
+                        self.coalescer.add(strategy, signal)
+
+        # One net intent per strategy and symbol for this bar
+        unsent_exits = {(trigger.strategy, trigger.symbol) for trigger in fired}
+        for strategy, signal in self.coalescer.flush(bar_data.get('date') if bar_data else None):
+            ticket = self._dispatch_signal(strategy, signal)
+            if ticket is not None and not ticket.is_entry:
+                unsent_exits.discard((ticket.strategy, ticket.symbol))
+            if self.signal_pool is not None:
+                self.signal_pool.release(signal)
+        # Fired triggers whose exit was rejected, merged away or not traded keep protecting the position
+        for strategy_name, symbol in unsent_exits:
+            self._rearm_exits(strategy_name, symbol)
+
+        if self.snapshots is not None and self.snapshots.due():
+            self.save_snapshot()
+        # A crash replays the journal only from the last checkpoint
+        if self.journal is not None and time.monotonic() >= self._next_checkpoint:
+            self._next_checkpoint = time.monotonic() + self.config.snapshot_interval
+            self.checkpoint_journal()
+
+    def _run_strategy(self, strategy: StrategyBase, method, *args, essential: bool = False) -> List[TradeSignal]:
+        """
+        Call into a strategy under its CPU time budget and circuit breaker
+        Essential calls (exits of open positions) still run while the strategy is
+        paused; they are not counted against its breaker.
+        """
+        if not self.supervisor.allow(strategy.name):
+            if not essential:
+                return []
             try:
-                signals = strategy.generate_signals(new_data)
-                for signal in signals:
-                    if strategy.check_global_conditions(signal):
-                        self.dashboard.update_with_signal(signal)
-                        if self.config.live_trading_enabled:
-                            self._execute_trade(signal)
+                return method(*args) or []
             except Exception as e:
-                self._log_error(f"Error in strategy {strategy_name}: {str(e)}")
+                self._log_error(f"Error in paused strategy {strategy.name} managing positions: {e}")
+                return []
+
+        error = None
+        signals = []
+        start_ns = time.thread_time_ns()
+        wall_start_ns = time.perf_counter_ns()
+        try:
+            signals = method(*args)
+        except Exception as e:
+            error = e
+        self.latency.record('strategy', time.perf_counter_ns() - wall_start_ns, strategy.name)
+        message = self.supervisor.record(strategy.name, time.thread_time_ns() - start_ns, error)
+        if message:
+            if error is not None:
+                self._log_error(message)
+            else:
+                self._log_action(message)
+        return signals or []
+
+    def _dispatch_signal(self, strategy: StrategyBase, signal: TradeSignal):
+        """Check a signal against the global conditions, show it and send it; returns the order ticket"""
+        # Entries are sized here from the strategy's max position dollars
+        if signal.signal_type in (SignalType.BUY, SignalType.SELL_SHORT) and signal.quantity <= 0:
+            signal.quantity = strategy.calculate_position_size(signal.price)
+
+        start_ns = time.perf_counter_ns()
+        approved = strategy.check_global_conditions(signal) and self._check_risk(strategy, signal)
+        self.latency.record('risk', time.perf_counter_ns() - start_ns)
+        if approved:
+            self.coalescer.sent(strategy.name, signal)
+            if self.journal is not None:
+                self.journal.record_signal(signal)
+            self.dashboard.update_with_signal(signal)
+            if self.config.live_trading_enabled:
+                return self._execute_trade(signal)
+        return None
+
+    def _check_risk(self, strategy: StrategyBase, signal: TradeSignal) -> bool:
+        """Run the signal through the cross-strategy risk gate"""
+        allowed, reason = self.risk_gate.check(strategy, signal)
+        if not allowed:
+            self._log_action(f"Skipped {signal.signal_type.name} {signal.symbol} for {strategy.name}: {reason}")
+        return allowed
 
     def _execute_trade(self, signal: TradeSignal):
-        """Execute trade through IB"""
-        # Will implement IB trading logic later
-        self._log_action(f"Executing {signal.signal_type} for {signal.symbol}")
+        """Queue the trade with the execution engine; never waits on the broker"""
+        if self.execution is None:
+            self._log_error(f"No execution engine attached, dropping {signal.signal_type.name} for {signal.symbol}")
+            return None
+
+        start_ns = time.perf_counter_ns()
+        ticket = self.execution.submit(signal)
+        end_ns = time.perf_counter_ns()
+        self.latency.record('submit', end_ns - start_ns)
+        if self._trace is not None:
+            self.latency.record('end_to_end', end_ns - self._trace.receive)
+        if ticket is not None:
+            if ticket.is_entry:
+                self.risk_gate.entry_sent(ticket)
+            if self.journal is not None:
+                self.journal.record_order(ticket)
+            self._log_action(f"Executing {signal.signal_type.name} {ticket.quantity:g} {signal.symbol} (order #{ticket.order_id})")
+        return ticket
+
+    def _on_fill(self, ticket, shares: float, price: float):
+        """Count filled entries against the daily trade limit and keep exit triggers in step"""
+        if self.journal is not None:
+            self.journal.record_fill(ticket, shares, price)
+        strategy = self.strategies.get(ticket.strategy)
+        if strategy is not None and ticket.is_entry and ticket.filled_quantity == shares:
+            strategy.today_trade_count += 1
+            self.risk_gate.entry_done(ticket)
+            position = self.position_book.get(ticket.strategy, ticket.symbol)
+            if position is not None:
+                strategy.on_position_opened(position)
+        elif not ticket.is_entry and not self.position_book.has_position(ticket.symbol, ticket.strategy):
+            self.trigger_engine.remove(ticket.strategy, ticket.symbol)
+            self.coalescer.forget(ticket.strategy, ticket.symbol)
+        elif not ticket.is_entry and ticket.remaining_quantity <= 0:
+            # A partial exit is done: the triggers that fired are spent, the others work again
+            self.trigger_engine.settle(ticket.strategy, ticket.symbol)
+        self._log_action(f"Filled {ticket.action} {shares:g} {ticket.symbol} @ {price:.2f} ({ticket.strategy})")
+
+    def _on_order_status(self, ticket, state):
+        """An entry that ends unfilled frees its daily trade; an exit gives the position its triggers back"""
+        # The same intent may be sent again right away
+        self.coalescer.forget(ticket.strategy, ticket.symbol)
+        if ticket.is_entry:
+            # A partly filled entry was released by its first fill
+            self.risk_gate.entry_done(ticket)
+            return
+        if not self.position_book.has_position(ticket.symbol, ticket.strategy):
+            return
+        if self.trigger_engine.rearm(ticket.strategy, ticket.symbol):
+            self._log_action(f"Exit order #{ticket.order_id} for {ticket.symbol} {state.value.lower()}, "
+                             f"exit triggers re-armed ({ticket.strategy})")
+
+    def _rearm_exits(self, strategy_name: str, symbol: str):
+        if self.position_book.has_position(symbol, strategy_name):
+            self.trigger_engine.rearm(strategy_name, symbol)
+        else:
+            self.trigger_engine.remove(strategy_name, symbol)
+
+    def get_recent_trades(self, since: int = 0):
+        """Fills after sequence number `since`, for the trade log"""
+        return self.pnl.get_recent_trades(since)
 
     def _log_action(self, message: str):
-        """Log manager actions"""
-        timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        self.dashboard.add_to_system_log(f"{timestamp} - Strategy Manager: {message}")
+        """Log manager actions; the dashboard stamps the time when it writes the line"""
+        self.dashboard.add_to_system_log(message, "INFO", "Strategy Manager")
 
     def _log_error(self, error_message: str):
         """Log errors"""
-        timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        self.dashboard.add_to_system_log(f"{timestamp} - ERROR: {error_message}")
+        self.dashboard.add_to_system_log(error_message, "ERROR", "Strategy Manager")
@@ -0,0 +1,135 @@
+import time
+from enum import Enum
+from typing import Dict, Optional
+
+
+class BreakerState(Enum):
+    CLOSED = "CLOSED"  # Running normally
+    OPEN = "OPEN"  # Paused until the cool-down has passed
+    HALF_OPEN = "HALF_OPEN"  # Cool-down over, the next event is a trial run
+
+
+class StrategyHealth:
+    __slots__ = ('name', 'state', 'calls', 'total_ns', 'max_ns', 'overruns', 'errors',
+                 'consecutive_errors', 'consecutive_overruns', 'trips', 'opened_at',
+                 'skipped', 'last_error')
+
+    def __init__(self, name: str):
+        self.name = name
+        self.state = BreakerState.CLOSED
+        self.calls = 0
+        self.total_ns = 0  # CPU time spent in the strategy
+        self.max_ns = 0
+        self.overruns = 0
+        self.errors = 0
+        self.consecutive_errors = 0
+        self.consecutive_overruns = 0
+        self.trips = 0
+        self.opened_at = 0.0
+        self.skipped = 0  # Events not delivered while paused
+        self.last_error = ""
+
+    @property
+    def mean_ms(self) -> float:
+        return self.total_ns / self.calls / 1e6 if self.calls else 0.0
+
+
+class StrategySupervisor:
+    """
+    Per-strategy CPU time budget, overrun/error accounting and circuit breaker
+    A strategy that raises `max_errors` times in a row, or overruns its budget
+    `max_overruns` times in a row, is paused for `cooldown` seconds and then
+    given one trial event; a clean trial resumes it, a failed one pauses it again.
+    """
+
+    def __init__(self, budget_ms: float = 5.0, max_errors: int = 3, max_overruns: int = 5,
+                 cooldown: float = 60.0):
+        self.budget_ns = int(budget_ms * 1e6)
+        self.max_errors = max_errors
+        self.max_overruns = max_overruns
+        self.cooldown = cooldown
+        self.health: Dict[str, StrategyHealth] = {}
+
+    def get(self, name: str) -> StrategyHealth:
+        health = self.health.get(name)
+        if health is None:
+            health = self.health[name] = StrategyHealth(name)
+        return health
+
+    def allow(self, name: str) -> bool:
+        """Whether the strategy should receive the current event"""
+        health = self.get(name)
+        if health.state is BreakerState.OPEN:
+            if time.monotonic() - health.opened_at < self.cooldown:
+                health.skipped += 1
+                return False
+            health.state = BreakerState.HALF_OPEN
+        return True
+
+    def record(self, name: str, elapsed_ns: int, error: Optional[Exception] = None) -> Optional[str]:
+        """
+        Account for one event; returns a message when it is worth logging
+        (first error of a streak, the breaker opening, the strategy resuming)
+        """
+        health = self.get(name)
+        health.calls += 1
+        health.total_ns += elapsed_ns
+        if elapsed_ns > health.max_ns:
+            health.max_ns = elapsed_ns
+
+        message = None
+        overrun = elapsed_ns > self.budget_ns
+        if overrun:
+            health.overruns += 1
+            health.consecutive_overruns += 1
+        else:
+            health.consecutive_overruns = 0
+
+        if error is not None:
+            health.errors += 1
+            health.consecutive_errors += 1
+            health.last_error = str(error)
+            if health.consecutive_errors == 1:
+                message = f"Error in strategy {name}: {health.last_error}"
+        else:
+            health.consecutive_errors = 0
+
+        if health.state is BreakerState.HALF_OPEN:
+            if error is not None or overrun:
+                return self._trip(health, "trial run failed")
+            health.state = BreakerState.CLOSED
+            return f"Strategy {name} resumed after cool-down"
+
+        if health.consecutive_errors >= self.max_errors:
+            return self._trip(health, f"{health.consecutive_errors} errors in a row, last: {health.last_error}")
+        if health.consecutive_overruns >= self.max_overruns:
+            return self._trip(health, (f"{health.consecutive_overruns} events over the "
+                                       f"{self.budget_ns / 1e6:g}ms budget"))
+        return message
+
+    def _trip(self, health: StrategyHealth, reason: str) -> str:
+        health.state = BreakerState.OPEN
+        health.opened_at = time.monotonic()
+        health.trips += 1
+        health.consecutive_errors = 0
+        health.consecutive_overruns = 0
+        return f"Strategy {health.name} paused for {self.cooldown:g}s: {reason}"
+
+    def reset(self, name: str):
+        """Resume a paused strategy immediately"""
+        self.health[name] = StrategyHealth(name)
+
+    def stats(self) -> Dict[str, Dict]:
+        return {
+            name: {
+                'state': health.state.value,
+                'calls': health.calls,
+                'mean_ms': health.mean_ms,
+                'max_ms': health.max_ns / 1e6,
+                'overruns': health.overruns,
+                'errors': health.errors,
+                'trips': health.trips,
+                'skipped': health.skipped,
+            }
+            for name, health in self.health.items()
+        }
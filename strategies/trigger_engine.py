@@ -0,0 +1,219 @@
+import heapq
+import itertools
+from typing import Dict, List, Optional, Tuple
+
+
+class ExitTrigger:
+    __slots__ = ('strategy', 'symbol', 'name', 'is_stop', 'level', 'fraction',
+                 'trail', 'peak', 'version', 'fire_price', 'held', 'fired')
+
+    def __init__(self, strategy: str, symbol: str, name: str, is_stop: bool, level: float,
+                 fraction: float = 1.0, trail: Optional[float] = None):
+        self.strategy = strategy
+        self.symbol = symbol
+        self.name = name  # Also used as the exit reason
+        self.is_stop = is_stop  # Stops fire at or below the level, targets at or above
+        self.level = level
+        self.fraction = fraction  # Share of the remaining position to exit
+        self.trail = trail  # Trailing distance for trailing stops
+        self.peak = level + trail if trail is not None else 0.0
+        self.version = 0
+        self.fire_price = 0.0
+        self.held = False  # Out of the heaps while an exit order of the position is working
+        self.fired = False  # Held because it fired; dropped once that exit fills
+
+    def __repr__(self):
+        side = 'stop' if self.is_stop else 'target'
+        return f"ExitTrigger({self.strategy}:{self.symbol} {self.name} {side} @ {self.level:.2f} x{self.fraction:g})"
+
+
+class TriggerEngine:
+    """
+    Per-symbol stop and target levels kept in heaps, so a price update only
+    looks at the nearest stop (highest level) and nearest target (lowest level)
+    Fired triggers are held, not removed, until the exit they caused is settled:
+    settle() drops them once the exit fills, rearm() restores them when no exit
+    order went out or it was cancelled or rejected.
+    """
+
+    def __init__(self):
+        # symbol -> heap of (key, seq, version, trigger); stops use -level as key
+        self._stops: Dict[str, list] = {}
+        self._targets: Dict[str, list] = {}
+        # (strategy, symbol) -> name -> trigger
+        self._triggers: Dict[Tuple[str, str], Dict[str, ExitTrigger]] = {}
+        self._trailing: Dict[str, Dict[int, ExitTrigger]] = {}
+        self._live: Dict[str, int] = {}
+        self._seq = itertools.count()
+
+    def set_stop(self, strategy: str, symbol: str, name: str, level: float,
+                 fraction: float = 1.0, trail: Optional[float] = None) -> ExitTrigger:
+        """Add or move a stop; with `trail` the level follows new highs at that distance"""
+        return self._set(strategy, symbol, name, True, level, fraction, trail)
+
+    def set_target(self, strategy: str, symbol: str, name: str, level: float,
+                   fraction: float = 1.0) -> ExitTrigger:
+        """Add or move a take-profit style level"""
+        return self._set(strategy, symbol, name, False, level, fraction, None)
+
+    def get(self, strategy: str, symbol: str, name: str) -> Optional[ExitTrigger]:
+        return self._triggers.get((strategy, symbol), {}).get(name)
+
+    def triggers(self, strategy: str, symbol: str) -> List[ExitTrigger]:
+        return list(self._triggers.get((strategy, symbol), {}).values())
+
+    def remove(self, strategy: str, symbol: str, name: Optional[str] = None):
+        """Drop one named trigger, or every trigger of the position when name is None"""
+        by_name = self._triggers.get((strategy, symbol))
+        if not by_name:
+            return
+        names = [name] if name is not None else list(by_name)
+        for trigger_name in names:
+            trigger = by_name.pop(trigger_name, None)
+            if trigger is None:
+                continue
+            # Heap entries of old versions are skipped and compacted lazily
+            trigger.version += 1
+            self._live[symbol] -= 1
+            self._trailing.get(symbol, {}).pop(id(trigger), None)
+        if not by_name:
+            del self._triggers[(strategy, symbol)]
+
+    def on_price(self, symbol: str, price: float, low: Optional[float] = None,
+                 high: Optional[float] = None) -> List[ExitTrigger]:
+        """
+        Fire every trigger crossed by the update; a bar's low/high catch intrabar crossings
+        Returns at most one trigger per position; a full exit wins over a partial one.
+        """
+        low = price if low is None else low
+        high = price if high is None else high
+        fired = []
+
+        stops = self._stops.get(symbol)
+        while stops:
+            key, _, version, trigger = stops[0]
+            if version != trigger.version:
+                heapq.heappop(stops)
+                continue
+            if -key < low:
+                break
+            heapq.heappop(stops)
+            trigger.fire_price = -key
+            fired.append(trigger)
+
+        targets = self._targets.get(symbol)
+        while targets:
+            key, _, version, trigger = targets[0]
+            if version != trigger.version:
+                heapq.heappop(targets)
+                continue
+            if key > high:
+                break
+            heapq.heappop(targets)
+            trigger.fire_price = key
+            fired.append(trigger)
+
+        # Trailing stops ratchet up after this update has been checked
+        trailing = self._trailing.get(symbol)
+        if trailing:
+            for trigger in list(trailing.values()):
+                if high > trigger.peak:
+                    trigger.peak = high
+                    if high - trigger.trail > trigger.level:
+                        self._push(trigger, high - trigger.trail)
+
+        if not fired:
+            return fired
+        return self._resolve(fired)
+
+    def _resolve(self, fired: List[ExitTrigger]) -> List[ExitTrigger]:
+        # Stops were collected first, so for a bar spanning both a stop and a
+        # target the more conservative stop wins
+        chosen: Dict[Tuple[str, str], ExitTrigger] = {}
+        for trigger in fired:
+            key = (trigger.strategy, trigger.symbol)
+            current = chosen.get(key)
+            if current is None or (current.fraction < 1.0 <= trigger.fraction):
+                chosen[key] = trigger
+
+        for trigger in fired:
+            trigger.fired = True
+            self._hold(trigger)
+        # A full exit holds every level of the position so nothing fires twice while it works
+        for (strategy, symbol), trigger in chosen.items():
+            if trigger.fraction >= 1.0:
+                for other in self.triggers(strategy, symbol):
+                    self._hold(other)
+        return list(chosen.values())
+
+    def _hold(self, trigger: ExitTrigger):
+        trigger.held = True
+        # Heap entries of old versions are skipped and compacted lazily
+        trigger.version += 1
+        self._trailing.get(trigger.symbol, {}).pop(id(trigger), None)
+
+    def rearm(self, strategy: str, symbol: str) -> int:
+        """Put the held triggers of a position back, e.g. when its exit was rejected or never sent"""
+        rearmed = 0
+        for trigger in self.triggers(strategy, symbol):
+            if trigger.held:
+                trigger.held = False
+                trigger.fired = False
+                if trigger.trail is not None:
+                    self._trailing.setdefault(symbol, {})[id(trigger)] = trigger
+                self._push(trigger, trigger.level)
+                rearmed += 1
+        return rearmed
+
+    def settle(self, strategy: str, symbol: str):
+        """The exit of a position that stays open has filled: drop what fired, rearm the rest"""
+        for trigger in self.triggers(strategy, symbol):
+            if trigger.fired:
+                self.remove(strategy, symbol, trigger.name)
+        self.rearm(strategy, symbol)
+
+    def _set(self, strategy, symbol, name, is_stop, level, fraction, trail) -> ExitTrigger:
+        by_name = self._triggers.setdefault((strategy, symbol), {})
+        trigger = by_name.get(name)
+        if trigger is None or trigger.is_stop != is_stop:
+            if trigger is not None:
+                self.remove(strategy, symbol, name)
+                by_name = self._triggers.setdefault((strategy, symbol), {})
+            trigger = ExitTrigger(strategy, symbol, name, is_stop, level, fraction, trail)
+            by_name[name] = trigger
+            self._live[symbol] = self._live.get(symbol, 0) + 1
+        else:
+            trigger.fraction = fraction
+            trigger.trail = trail
+            if trigger.held:
+                # Moved while its exit is working; goes back in the heaps on rearm()
+                trigger.level = level
+                if trail is not None:
+                    trigger.peak = max(trigger.peak, level + trail)
+                return trigger
+
+        if trail is not None:
+            trigger.peak = max(trigger.peak, level + trail)
+            self._trailing.setdefault(symbol, {})[id(trigger)] = trigger
+        else:
+            self._trailing.get(symbol, {}).pop(id(trigger), None)
+
+        self._push(trigger, level)
+        return trigger
+
+    def _push(self, trigger: ExitTrigger, level: float):
+        trigger.level = level
+        trigger.version += 1
+        symbol = trigger.symbol
+        if trigger.is_stop:
+            heap = self._stops.setdefault(symbol, [])
+            heapq.heappush(heap, (-level, next(self._seq), trigger.version, trigger))
+        else:
+            heap = self._targets.setdefault(symbol, [])
+            heapq.heappush(heap, (level, next(self._seq), trigger.version, trigger))
+
+        # Levels that move every bar leave stale entries behind; rebuild once they dominate
+        if len(heap) > 4 * self._live.get(symbol, 0) + 16:
+            live = [entry for entry in heap if entry[2] == entry[3].version]
+            heapq.heapify(live)
+            heap[:] = live
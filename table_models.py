@@ -0,0 +1,328 @@
+from array import array
+from datetime import datetime
+from typing import Dict, Hashable, Iterable, List, Optional, Sequence
+
+from PyQt5.QtCore import QAbstractTableModel, QModelIndex, Qt, QVariant, pyqtSignal
+from PyQt5.QtGui import QColor
+
+SORT_ROLE = Qt.UserRole  # Raw cell value, so numbers and times sort by value rather than by text
+
+
+class RecordTableModel(QAbstractTableModel):
+    """
+    Rows of raw values, formatted only when a visible cell is painted
+    Subclasses set `headers` and `formats` (a format spec, or 'time' for epoch
+    seconds); a column listed in `pnl_columns` is colored by sign.
+    """
+
+    headers: Sequence[str] = ()
+    formats: Sequence[str] = ()
+    pnl_columns: Sequence[int] = ()
+
+    def __init__(self, positive_color: QColor, negative_color: QColor, parent=None):
+        super().__init__(parent)
+        self.positive_color = positive_color
+        self.negative_color = negative_color
+        self._rows: List[list] = []
+
+    def rowCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._rows)
+
+    def columnCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.headers)
+
+    def headerData(self, section: int, orientation, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole:
+            return QVariant()
+        if orientation == Qt.Horizontal:
+            return self.headers[section]
+        return str(section + 1)
+
+    def value(self, row: int, column: int):
+        return self._rows[row][column]
+
+    def data(self, index: QModelIndex, role=Qt.DisplayRole):
+        if not index.isValid():
+            return QVariant()
+        value = self.value(index.row(), index.column())
+        if role == Qt.DisplayRole:
+            spec = self.formats[index.column()]
+            if spec == 'time':
+                return datetime.fromtimestamp(value).strftime('%Y-%m-%d %H:%M:%S')
+            return format(value, spec)
+        if role == SORT_ROLE:
+            return value
+        if role == Qt.ForegroundRole and index.column() in self.pnl_columns:
+            return self.positive_color if value >= 0 else self.negative_color
+        return QVariant()
+
+    def append_rows(self, rows: List[list]):
+        if not rows:
+            return
+        first = len(self._rows)
+        self.beginInsertRows(QModelIndex(), first, first + len(rows) - 1)
+        self._rows.extend(rows)
+        self.endInsertRows()
+
+    def clear(self):
+        self.beginResetModel()
+        self._rows.clear()
+        self.endResetModel()
+
+
+class PositionsModel(RecordTableModel):
+    """Open positions with a (strategy, symbol) -> row index, so updating a row is O(1)"""
+
+    headers = ("Time", "Ticker", "Strategy", "Shares", "Entry Price", "Current Price", "Live PnL")
+    formats = ("", "", "", "g", ".2f", ".2f", ".2f")
+    pnl_columns = (6,)
+    FIRST_LIVE_COLUMN = 3  # Columns before this never change while the position is open
+
+    def __init__(self, positive_color: QColor, negative_color: QColor, parent=None):
+        super().__init__(positive_color, negative_color, parent)
+        self._index: Dict[Hashable, int] = {}
+        self._keys: List[Hashable] = []
+
+    def row_of(self, key: Hashable) -> Optional[int]:
+        return self._index.get(key)
+
+    def set_position(self, key: Hashable, entry_time: str, symbol: str, strategy: str,
+                     shares: float, entry_price: float, last_price: float, pnl: float):
+        """Add a position, or update its live columns and signal only the cells that changed"""
+        row = self._index.get(key)
+        if row is None:
+            self._index[key] = len(self._rows)
+            self._keys.append(key)
+            self.append_rows([[entry_time, symbol, strategy, shares, entry_price, last_price, pnl]])
+            return
+
+        values = self._rows[row]
+        first = last = None
+        for column, value in enumerate((shares, entry_price, last_price, pnl), self.FIRST_LIVE_COLUMN):
+            if values[column] != value:
+                values[column] = value
+                if first is None:
+                    first = column
+                last = column
+        if first is not None:
+            self.dataChanged.emit(self.index(row, first), self.index(row, last))
+
+    def remove_position(self, key: Hashable):
+        row = self._index.pop(key, None)
+        if row is None:
+            return
+        self.beginRemoveRows(QModelIndex(), row, row)
+        del self._rows[row]
+        del self._keys[row]
+        self.endRemoveRows()
+        # Only the rows below the removed one move up
+        for moved in range(row, len(self._keys)):
+            self._index[self._keys[moved]] = moved
+
+    def clear(self):
+        super().clear()
+        self._index.clear()
+        self._keys.clear()
+
+
+class ColumnStore:
+    """Append-only columns: numbers in float64 arrays, text in lists of shared str objects"""
+
+    def __init__(self, kinds: str):
+        # One character per column: 'd' for a number, 's' for text
+        self.columns = [array('d') if kind == 'd' else [] for kind in kinds]
+        self.length = 0
+
+    def __len__(self) -> int:
+        return self.length
+
+    def extend(self, rows: Iterable[Sequence]):
+        columns = self.columns
+        for row in rows:
+            for column, value in zip(columns, row):
+                column.append(value)
+            self.length += 1
+
+
+class TradeStoreModel(RecordTableModel):
+    """
+    A ColumnStore shown through fetchMore(), sortable and filterable by symbol/strategy
+    In store order the view only holds the rows loaded so far: new rows are
+    revealed straight away while everything is loaded, a burst beyond one page
+    is loaded a page at a time as the view scrolls to the end. Sorting or
+    filtering switches to a list of store row numbers; the store is never copied.
+    """
+
+    kinds = ""
+    symbol_column = 0
+    strategy_column = 0
+    PAGE_SIZE = 500
+
+    strategy_added = pyqtSignal(str)
+
+    def __init__(self, positive_color: QColor, negative_color: QColor, parent=None):
+        super().__init__(positive_color, negative_color, parent)
+        self.store = ColumnStore(self.kinds)
+        self.strategies: List[str] = []
+        self.symbol_filter = ""
+        self.strategy_filter = ""
+        self.sort_column = -1
+        self.sort_order = Qt.AscendingOrder
+        self._loaded = 0
+        self._view: Optional[List[int]] = None  # Store rows in display order while sorted or filtered
+        self._view_keys: List = []  # Sort key of each _view row
+
+    def rowCount(self, parent=QModelIndex()) -> int:
+        if parent.isValid():
+            return 0
+        return self._loaded if self._view is None else len(self._view)
+
+    def value(self, row: int, column: int):
+        if self._view is not None:
+            row = self._view[row]
+        return self.store.columns[column][row]
+
+    def canFetchMore(self, parent=QModelIndex()) -> bool:
+        return not parent.isValid() and self._view is None and self._loaded < len(self.store)
+
+    def fetchMore(self, parent=QModelIndex()):
+        count = min(self.PAGE_SIZE, len(self.store) - self._loaded)
+        if parent.isValid() or self._view is not None or count <= 0:
+            return
+        self.beginInsertRows(QModelIndex(), self._loaded, self._loaded + count - 1)
+        self._loaded += count
+        self.endInsertRows()
+
+    def sort(self, column: int, order=Qt.AscendingOrder):
+        """Called by the view on a header click; column -1 restores the store order"""
+        self.sort_column = column
+        self.sort_order = order
+        self._rebuild_view()
+
+    def set_filter(self, symbol: str = "", strategy: str = ""):
+        """Show rows whose symbol starts with `symbol` and, if given, of one strategy only"""
+        self.symbol_filter = symbol.strip().upper()
+        self.strategy_filter = strategy
+        self._rebuild_view()
+
+    def _accepts(self, row: int) -> bool:
+        columns = self.store.columns
+        if self.symbol_filter and not columns[self.symbol_column][row].startswith(self.symbol_filter):
+            return False
+        if self.strategy_filter and columns[self.strategy_column][row] != self.strategy_filter:
+            return False
+        return True
+
+    def _rebuild_view(self):
+        view, view_keys = None, []
+        if self.sort_column >= 0 or self.symbol_filter or self.strategy_filter:
+            rows = range(len(self.store))
+            if self.symbol_filter or self.strategy_filter:
+                rows = [row for row in rows if self._accepts(row)]
+            if self.sort_column >= 0:
+                keys = self.store.columns[self.sort_column]
+                # Stable, so equal keys keep the order they happened in
+                rows = sorted(rows, key=keys.__getitem__, reverse=self.sort_order == Qt.DescendingOrder)
+                view_keys = [keys[row] for row in rows]
+            view = list(rows)
+        # Store order starts again from one page; fetchMore() loads the rest as the view scrolls
+        count = min(len(self.store), self.PAGE_SIZE) if view is None else len(view)
+
+        if count != self.rowCount():
+            # Rows come and go, which a layout change cannot express
+            self.beginResetModel()
+            self._view, self._view_keys = view, view_keys
+            self._loaded = count if view is None else self._loaded
+            self.endResetModel()
+            return
+
+        self.layoutAboutToBeChanged.emit()
+        old_rows = [self._view[index.row()] if self._view is not None else index.row()
+                    for index in self.persistentIndexList()]
+        self._view, self._view_keys = view, view_keys
+        if view is None:
+            self._loaded = count
+        # Keep the selection on the same trades where they are still shown
+        positions = {row: position for position, row in enumerate(view)} if view is not None else None
+        for index, row in zip(self.persistentIndexList(), old_rows):
+            position = row if positions is None else positions.get(row)
+            self.changePersistentIndex(index, QModelIndex() if position is None else
+                                       self.index(position, index.column()))
+        self.layoutChanged.emit()
+
+    def _insert_position(self, key) -> int:
+        """Where a new row with sort key `key` goes; after equal keys"""
+        keys = self._view_keys
+        descending = self.sort_order == Qt.DescendingOrder
+        low, high = 0, len(keys)
+        while low < high:
+            middle = (low + high) // 2
+            if (keys[middle] >= key) if descending else (keys[middle] <= key):
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def append_rows(self, rows: List[list]):
+        if not rows:
+            return
+        first = len(self.store)
+        fully_loaded = self._loaded == first
+        self.store.extend(rows)
+        for row in rows:
+            strategy = row[self.strategy_column]
+            if strategy not in self.strategies:
+                self.strategies.append(strategy)
+                self.strategy_added.emit(strategy)
+
+        if self._view is None:
+            if fully_loaded:
+                self.fetchMore()
+            return
+        new_rows = [row for row in range(first, len(self.store)) if self._accepts(row)]
+        if self.sort_column < 0:
+            if new_rows:
+                self.beginInsertRows(QModelIndex(), len(self._view), len(self._view) + len(new_rows) - 1)
+                self._view.extend(new_rows)
+                self.endInsertRows()
+            return
+        keys = self.store.columns[self.sort_column]
+        for row in new_rows:
+            position = self._insert_position(keys[row])
+            self.beginInsertRows(QModelIndex(), position, position)
+            self._view.insert(position, row)
+            self._view_keys.insert(position, keys[row])
+            self.endInsertRows()
+
+    def clear(self):
+        self.beginResetModel()
+        self.store = ColumnStore(self.kinds)
+        self._loaded = 0
+        if self._view is not None:
+            self._view = []
+            self._view_keys = []
+        self.endResetModel()
+
+
+class TradeLogModel(TradeStoreModel):
+    headers = ("Date/Time", "Ticker", "Side", "Price", "Size", "Strategy", "Reason/Notes")
+    formats = ("time", "", "", ".2f", "g", "", "")
+    kinds = "dssddss"
+    symbol_column = 1
+    strategy_column = 5
+
+    def append_trades(self, trades):
+        self.append_rows([(trade.time, trade.symbol, trade.side, trade.price, trade.size,
+                           trade.strategy, trade.notes) for trade in trades])
+
+
+class ClosedTradesModel(TradeStoreModel):
+    headers = ("Ticker", "Strategy", "PnL", "Closed Time")
+    formats = ("", "", ".2f", "time")
+    kinds = "ssdd"
+    pnl_columns = (2,)
+    symbol_column = 0
+    strategy_column = 1
+
+    def append_trades(self, trades):
+        self.append_rows([(trade.symbol, trade.strategy, trade.pnl, trade.closed_time) for trade in trades])
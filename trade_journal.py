@@ -0,0 +1,227 @@
+import logging
+import queue
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+from position_book import PositionBook
+
+# One row per event; unused columns stay at their defaults
+COLUMNS = ('time', 'kind', 'strategy', 'symbol', 'side', 'quantity', 'price', 'order_id',
+           'opens', 'reason', 'stop_loss', 'take_profit', 'entry_candle_low')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    time REAL NOT NULL,
+    kind TEXT NOT NULL,
+    strategy TEXT,
+    symbol TEXT,
+    side TEXT,
+    quantity REAL DEFAULT 0,
+    price REAL DEFAULT 0,
+    order_id INTEGER DEFAULT 0,
+    opens INTEGER DEFAULT 0,
+    reason TEXT DEFAULT '',
+    stop_loss REAL DEFAULT 0,
+    take_profit REAL DEFAULT 0,
+    entry_candle_low REAL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS events_kind ON events (kind, id);
+"""
+
+INSERT = f"INSERT INTO events ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))})"
+
+
+class TradeJournal:
+    """
+    Append-only journal of signals, orders, fills and checkpoints in SQLite (WAL mode)
+    record_* calls only put a tuple on a queue. A writer thread drains it and
+    commits each batch as one transaction (group commit), so journaling never
+    waits on the disk. recover() loads the last checkpoint and replays the
+    fills after it.
+    """
+
+    def __init__(self, path: str = 'trade_journal.db', flush_interval: float = 0.05,
+                 batch_size: int = 1000):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.logger = logging.getLogger('TradeJournal')
+
+        self._queue: queue.SimpleQueue = queue.SimpleQueue()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+        self.written_count = 0
+        self.commit_count = 0
+        self.error_count = 0
+
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path)
+        conn.execute("PRAGMA journal_mode=WAL")
+        # In WAL mode NORMAL is durable across application crashes, only an OS crash can lose the tail
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='TradeJournal', daemon=True)
+        self._thread.start()
+
+    def close(self):
+        """Write everything still queued and stop the writer"""
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+
+    # Hot path: build a tuple and queue it
+
+    def record_signal(self, signal):
+        self._queue.put((signal.timestamp, 'signal', signal.strategy_name, signal.symbol,
+                         signal.signal_type.name, signal.quantity or signal.sell_size, signal.price,
+                         0, 0, signal.reason, signal.stop_loss, signal.take_profit,
+                         signal.entry_candle_low))
+
+    def record_order(self, ticket):
+        self._queue.put((time.time(), 'order', ticket.strategy, ticket.symbol, ticket.action,
+                         ticket.quantity, ticket.limit_price or ticket.aux_price, ticket.order_id,
+                         int(ticket.is_entry), ticket.reason, ticket.initial_stop_loss,
+                         ticket.take_profit_level, ticket.entry_candle_low))
+
+    def record_fill(self, ticket, shares: float, price: float):
+        # `opens` marks the first fill of an entry order, which counts as a trade for the day
+        opens = int(ticket.is_entry and ticket.filled_quantity == shares)
+        self._queue.put((time.time(), 'fill', ticket.strategy, ticket.symbol, ticket.action,
+                         shares, price, ticket.order_id, opens if ticket.is_entry else -1,
+                         ticket.reason, ticket.initial_stop_loss, ticket.take_profit_level,
+                         ticket.entry_candle_low))
+
+    def checkpoint(self, position_book: PositionBook, trade_counts: Dict[str, int]):
+        """Record the open positions, today's trade counts and realized PnL; recovery starts from here"""
+        now = time.time()
+        rows = [(now, 'checkpoint', None, None, None, 0, 0, 0, 0, '', 0, 0, 0)]
+        for position in position_book.positions():
+            rows.append((position.entry_time.timestamp(), 'position', position.strategy,
+                         position.symbol, 'BUY', position.remaining_size, position.entry_price,
+                         0, 0, '', position.initial_stop_loss, position.take_profit_level,
+                         position.entry_candle_low))
+        for strategy, count in trade_counts.items():
+            rows.append((now, 'trade_count', strategy, None, None, count, 0, 0, 0, '', 0, 0, 0))
+        for strategy, realized in position_book.strategy_realized_pnl.items():
+            rows.append((now, 'realized_pnl', strategy, None, None, 0, realized, 0, 0, '', 0, 0, 0))
+        # Queued as one item so the checkpoint is committed in a single transaction
+        self._queue.put(rows)
+
+    # Writer thread
+
+    def _run(self):
+        conn = self._connect()
+        try:
+            while True:
+                stopping = self._stop.is_set()
+                rows = self._drain()
+                if rows:
+                    self._write(conn, rows)
+                elif stopping:
+                    break
+                else:
+                    self._stop.wait(self.flush_interval)
+        finally:
+            conn.close()
+
+    def _drain(self) -> List[tuple]:
+        rows = []
+        try:
+            while len(rows) < self.batch_size:
+                item = self._queue.get_nowait()
+                if isinstance(item, list):
+                    rows.extend(item)
+                else:
+                    rows.append(item)
+        except queue.Empty:
+            pass
+        return rows
+
+    def _write(self, conn: sqlite3.Connection, rows: List[tuple]):
+        try:
+            with conn:
+                conn.executemany(INSERT, rows)
+            self.written_count += len(rows)
+            self.commit_count += 1
+        except sqlite3.Error as e:
+            self.error_count += 1
+            self.logger.error(f"Journal write of {len(rows)} rows failed: {e}")
+
+    # Startup
+
+    def recover(self, position_book: PositionBook) -> Dict[str, int]:
+        """
+        Rebuild open positions into an empty book from the last checkpoint and the
+        fills after it; returns today's entry count per strategy
+        """
+        midnight = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0).timestamp()
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT id, time FROM events WHERE kind = 'checkpoint' ORDER BY id DESC LIMIT 1"
+            ).fetchone()
+            start_id, checkpoint_time = row if row else (0, 0.0)
+
+            trade_counts: Dict[str, int] = {}
+            if start_id:
+                # Only checkpoints write these kinds, so every one after the last marker belongs to it
+                events = conn.execute(
+                    f"SELECT {', '.join(COLUMNS)} FROM events "
+                    "WHERE id > ? AND kind IN ('position', 'trade_count', 'realized_pnl') ORDER BY id",
+                    (start_id,)
+                )
+                for (event_time, kind, strategy, symbol, _, quantity, price, _, _, _,
+                     stop_loss, take_profit, entry_candle_low) in events:
+                    if kind == 'position':
+                        position_book.open_position(strategy, symbol, price, quantity, stop_loss,
+                                                    take_profit, entry_candle_low,
+                                                    datetime.fromtimestamp(event_time))
+                    elif checkpoint_time < midnight:
+                        continue
+                    elif kind == 'trade_count':
+                        trade_counts[strategy] = int(quantity)
+                    else:
+                        position_book.strategy_realized_pnl[strategy] = price
+                        position_book.realized_pnl += price
+
+            fills = conn.execute(
+                f"SELECT {', '.join(COLUMNS)} FROM events WHERE kind = 'fill' AND id > ? ORDER BY id",
+                (start_id,)
+            )
+            self._replay(position_book, fills, trade_counts, midnight)
+        return trade_counts
+
+    @staticmethod
+    def _replay(position_book: PositionBook, fills: Iterable[tuple], trade_counts: Dict[str, int],
+                midnight: float):
+        earlier_day = False
+        for (event_time, _, strategy, symbol, _, shares, price, _, opens, _,
+             stop_loss, take_profit, entry_candle_low) in fills:
+            if earlier_day and event_time >= midnight:
+                # Exits of earlier days do not count toward today's loss limit
+                position_book.reset_realized_pnl()
+                earlier_day = False
+            if opens >= 0:
+                position_book.open_position(strategy, symbol, price, shares, stop_loss, take_profit,
+                                            entry_candle_low, datetime.fromtimestamp(event_time))
+                if opens and event_time >= midnight:
+                    trade_counts[strategy] = trade_counts.get(strategy, 0) + 1
+            else:
+                position_book.reduce_position(strategy, symbol, shares, price)
+                earlier_day = event_time < midnight
+        if earlier_day:
+            position_book.reset_realized_pnl()
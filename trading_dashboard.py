@@ -1,11 +1,22 @@
 from PyQt5.QtWidgets import (QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
-                             QTableWidget, QTableWidgetItem, QLabel, QPushButton,
-                             QGroupBox, QTextEdit, QHeaderView)
-from PyQt5.QtCore import Qt, QTimer, QDateTime
+                             QTableWidget, QTableWidgetItem, QTableView, QLabel, QPushButton,
+                             QGroupBox, QPlainTextEdit, QHeaderView, QComboBox, QLineEdit)
+from PyQt5.QtCore import Qt, QTimer, QDateTime, pyqtSignal
 from PyQt5.QtGui import QFont, QColor
+import time
+from collections import deque
+
+from chart_widget import ChartWidget
+from heatmap_widget import HeatmapWidget
+from table_models import ClosedTradesModel, PositionsModel, TradeLogModel
+
+LOG_LEVELS = {'DEBUG': 10, 'INFO': 20, 'WARNING': 30, 'ERROR': 40}
 
 
 class TradingDashboard(QMainWindow):
+    closed = pyqtSignal()  # The application shuts down with the dashboard
+    chart_requested = pyqtSignal(str, object)  # Symbol and timeframe (minutes or 'D') to chart
+
     def __init__(self, account_id, trading_start, trading_end, max_positions,
                  max_position_dollars, min_stock_price, max_stock_price,
                  strategy_settings):
@@ -20,6 +31,18 @@ class TradingDashboard(QMainWindow):
         self.positive_color = QColor("#006400")  # Dark Green
         self.negative_color = QColor("#8B0000")  # Dark Red
 
+        # LatencyMonitor of the strategy manager, set once trading starts
+        self.latency_monitor = None
+
+        # System log: messages below the level or from a muted source are dropped before
+        # formatting; the rest wait in a bounded queue for the next flush
+        self.log_level = 'INFO'
+        self.muted_log_sources = set()
+        self.log_max_lines = 5000
+        self._log_queue = deque(maxlen=self.log_max_lines)
+        self._log_second = None
+        self._log_stamp = ""
+
         # Initialize settings first
         self.init_settings(account_id, trading_start, trading_end, max_positions,
                            max_position_dollars, min_stock_price, max_stock_price,
@@ -31,11 +54,14 @@ class TradingDashboard(QMainWindow):
         # Add all UI components
         self.add_session_info()
         self.create_open_positions_section()
+        self.create_chart_section()
+        self.create_universe_section()
         self.create_trade_log_section()
         self.create_closed_trades_section()
         self.create_strategy_pnl_section()
         self.create_total_pnl_section()
         self.create_system_log_section()
+        self.create_latency_section()
         self.create_control_buttons()
 
         # Setup timer last
@@ -93,93 +119,104 @@ class TradingDashboard(QMainWindow):
         group.setFont(self.header_font)
         layout = QVBoxLayout()
 
-        self.positions_table = QTableWidget()
-        self.positions_table.setFont(self.default_font)
-        self.positions_table.setColumnCount(7)
-        self.positions_table.setRowCount(5)
+        self.positions_model = PositionsModel(self.positive_color, self.negative_color)
+        self.positions_table = self._create_table_view(self.positions_model, [200, 150, 300, 100, 150, 150, 150])
         self.positions_table.setMinimumHeight(210)
 
-        headers = ["Time", "Ticker", "Strategy", "Shares", "Entry Price", "Current Price", "Live PnL"]
-        self.positions_table.setHorizontalHeaderLabels(headers)
+        layout.addWidget(self.positions_table)
+        group.setLayout(layout)
+        self.main_layout.addWidget(group)
 
-        # Set specific column widths
-        self.positions_table.setColumnWidth(0, 200)  # Time
-        self.positions_table.setColumnWidth(1, 150)  # Ticker
-        self.positions_table.setColumnWidth(2, 300)  # Strategy
-        self.positions_table.setColumnWidth(3, 100)  # Shares
-        self.positions_table.setColumnWidth(4, 150)  # Entry Price
-        self.positions_table.setColumnWidth(5, 150)  # Current Price
-        self.positions_table.setColumnWidth(6, 150)  # Live PnL
-
-        # Set row numbers and initial empty rows
-        for i in range(5):
-            self.positions_table.setVerticalHeaderItem(i, QTableWidgetItem(str(i + 1)))
-            for j in range(7):
-                item = QTableWidgetItem("")
-                item.setFont(self.default_font)
-                self.positions_table.setItem(i, j, item)
-
-        header = self.positions_table.horizontalHeader()
-        header.setFont(self.header_font)
-        header.setDefaultAlignment(Qt.AlignLeft)
+    def create_chart_section(self):
+        group = QGroupBox("Chart")
+        group.setFont(self.header_font)
+        layout = QVBoxLayout()
 
-        layout.addWidget(self.positions_table)
+        selector = QHBoxLayout()
+        self.chart_symbol_combo = QComboBox()
+        self.chart_symbol_combo.setFont(self.default_font)
+        self.chart_symbol_combo.setEditable(True)
+        self.chart_symbol_combo.setMinimumWidth(150)
+        self.chart_timeframe_combo = QComboBox()
+        self.chart_timeframe_combo.setFont(self.default_font)
+        self.chart_timeframe_combo.addItems(["1", "2", "5", "15", "60", "D"])
+        self.chart_timeframe_combo.setCurrentText("5")
+        self.chart_symbol_combo.activated.connect(self.request_chart)
+        self.chart_timeframe_combo.activated.connect(self.request_chart)
+        selector.addWidget(QLabel("Ticker:"))
+        selector.addWidget(self.chart_symbol_combo)
+        selector.addWidget(QLabel("Timeframe (min):"))
+        selector.addWidget(self.chart_timeframe_combo)
+        selector.addStretch()
+
+        self.chart = ChartWidget()
+        layout.addLayout(selector)
+        layout.addWidget(self.chart)
         group.setLayout(layout)
         self.main_layout.addWidget(group)
 
-    def create_trade_log_section(self):
-        group = QGroupBox("Trade Log History")
+    def request_chart(self, *_):
+        symbol = self.chart_symbol_combo.currentText().strip().upper()
+        if not symbol:
+            return
+        timeframe = self.chart_timeframe_combo.currentText()
+        self.chart_requested.emit(symbol, timeframe if timeframe == 'D' else int(timeframe))
+
+    def set_chart_symbols(self, symbols):
+        """Offer the symbols with history; the first one is charted if nothing is yet"""
+        current = self.chart_symbol_combo.currentText()
+        self.chart_symbol_combo.clear()
+        self.chart_symbol_combo.addItems(symbols)
+        if current:
+            self.chart_symbol_combo.setCurrentText(current)
+        elif symbols:
+            self.request_chart()
+
+    def update_chart(self, update):
+        """Apply a chart update from a dashboard frame; updates for a previous selection are ignored"""
+        if update['reset']:
+            self.chart.set_series(update['symbol'], update['timeframe'], update['rows'], update['forming'])
+        elif (update['symbol'], update['timeframe']) == (self.chart.symbol, self.chart.timeframe):
+            self.chart.append(update['rows'], update['forming'])
+
+    def create_universe_section(self):
+        group = QGroupBox("Universe")
         group.setFont(self.header_font)
         layout = QVBoxLayout()
 
-        self.trade_log_table = QTableWidget()
-        self.trade_log_table.setFont(self.default_font)
-        self.trade_log_table.setColumnCount(7)
-        self.trade_log_table.setRowCount(5)  # Set initial number of rows
-        self.trade_log_table.setMinimumHeight(210)  # Increased height for better visibility
+        legend = QLabel("Fill: 1min ATR ratio (red below EMA 50, green above)   Top: daily EMA 8/21/50 alignment   "
+                        "Bottom: 5min close vs EMA 50 in ATRs (orange below, blue above)   Click a ticker to chart it")
+        legend.setFont(self.default_font)
+        legend.setWordWrap(True)
+        self.heatmap = HeatmapWidget()
+        self.heatmap.symbol_clicked.connect(self.show_chart)
+        layout.addWidget(legend)
+        layout.addWidget(self.heatmap)
+        group.setLayout(layout)
+        self.main_layout.addWidget(group)
 
-        headers = ["Date/Time", "Ticker", "Side", "Price", "Size", "Strategy", "Reason/Notes"]
-        self.trade_log_table.setHorizontalHeaderLabels(headers)
+    def show_chart(self, symbol):
+        self.chart_symbol_combo.setCurrentText(symbol)
+        self.request_chart()
 
-        # Set specific column widths
-        self.trade_log_table.setColumnWidth(0, 200)  # Date/Time
-        self.trade_log_table.setColumnWidth(1, 150)  # Ticker
-        self.trade_log_table.setColumnWidth(2, 100)  # Side
-        self.trade_log_table.setColumnWidth(3, 100)  # Price
-        self.trade_log_table.setColumnWidth(4, 100)  # Size
-        self.trade_log_table.setColumnWidth(5, 300)  # Strategy
-        self.trade_log_table.setColumnWidth(6, 300)  # Reason/Notes
-
-        # Initialize empty rows
-        for i in range(5):
-            self.trade_log_table.setVerticalHeaderItem(i, QTableWidgetItem(str(i + 1)))
-            for j in range(7):
-                item = QTableWidgetItem("")
-                item.setFont(self.default_font)
-                self.trade_log_table.setItem(i, j, item)
-
-        # Style the header
-        header = self.trade_log_table.horizontalHeader()
-        header.setFont(self.header_font)
-        header.setDefaultAlignment(Qt.AlignLeft)
-        header.setStretchLastSection(True)
+    def update_heatmap(self, update):
+        """Apply the changed heatmap cells of a dashboard frame"""
+        if update['symbols'] is not None:
+            self.heatmap.set_symbols(update['symbols'], update['indices'], update['codes'])
+        else:
+            self.heatmap.update_cells(update['indices'], update['codes'])
 
-        # Style the table
-        self.trade_log_table.setShowGrid(True)
-        self.trade_log_table.setAlternatingRowColors(True)
-        self.trade_log_table.setStyleSheet("""
-            QTableWidget {
-                gridline-color: #d3d3d3;
-                background-color: white;
-                alternate-background-color: #f5f5f5;
-            }
-            QHeaderView::section {
-                background-color: #f0f0f0;
-                padding: 6px;
-                border: 1px solid #d3d3d3;
-            }
-        """)
+    def create_trade_log_section(self):
+        group = QGroupBox("Trade Log History")
+        group.setFont(self.header_font)
+        layout = QVBoxLayout()
 
+        self.trade_log_model = TradeLogModel(self.positive_color, self.negative_color)
+        self.trade_log_table = self._create_table_view(self.trade_log_model, [200, 150, 100, 100, 100, 300, 300])
+        self.trade_log_table.setMinimumHeight(210)  # Increased height for better visibility
+        self._style_log_view(self.trade_log_table)
+
+        layout.addLayout(self._create_filter_bar(self.trade_log_model))
         layout.addWidget(self.trade_log_table)
         group.setLayout(layout)
         self.main_layout.addWidget(group)
@@ -189,39 +226,63 @@ class TradingDashboard(QMainWindow):
         group.setFont(self.header_font)
         layout = QVBoxLayout()
 
-        self.closed_trades_table = QTableWidget()
-        self.closed_trades_table.setFont(self.default_font)
-        self.closed_trades_table.setColumnCount(3)
-        self.closed_trades_table.setRowCount(5)  # Set initial number of rows
+        self.closed_trades_model = ClosedTradesModel(self.positive_color, self.negative_color)
+        self.closed_trades_table = self._create_table_view(self.closed_trades_model, [150, 300, 150, 200])
         self.closed_trades_table.setMinimumHeight(210)  # Increased height for better visibility
+        self._style_log_view(self.closed_trades_table)
 
-        headers = ["Ticker", "PnL", "Closed Time"]
-        self.closed_trades_table.setHorizontalHeaderLabels(headers)
+        layout.addLayout(self._create_filter_bar(self.closed_trades_model))
+        layout.addWidget(self.closed_trades_table)
+        group.setLayout(layout)
+        self.main_layout.addWidget(group)
 
-        # Set specific column widths
-        self.closed_trades_table.setColumnWidth(0, 150)  # Ticker
-        self.closed_trades_table.setColumnWidth(1, 150)  # PnL
-        self.closed_trades_table.setColumnWidth(2, 200)  # Closed Time
-
-        # Initialize empty rows
-        for i in range(5):
-            self.closed_trades_table.setVerticalHeaderItem(i, QTableWidgetItem(str(i + 1)))
-            for j in range(3):
-                item = QTableWidgetItem("")
-                item.setFont(self.default_font)
-                self.closed_trades_table.setItem(i, j, item)
-
-        # Style the header
-        header = self.closed_trades_table.horizontalHeader()
+    def _create_table_view(self, model, column_widths):
+        """Table view over one of the dashboard models; cells are painted straight from the model"""
+        view = QTableView()
+        view.setFont(self.default_font)
+        view.setModel(model)
+        for col, width in enumerate(column_widths):
+            view.setColumnWidth(col, width)
+
+        header = view.horizontalHeader()
         header.setFont(self.header_font)
         header.setDefaultAlignment(Qt.AlignLeft)
-        header.setStretchLastSection(True)
+        return view
 
-        # Style the table
-        self.closed_trades_table.setShowGrid(True)
-        self.closed_trades_table.setAlternatingRowColors(True)
-        self.closed_trades_table.setStyleSheet("""
-            QTableWidget {
+    def _create_filter_bar(self, model):
+        """Symbol prefix and strategy filters for a trade view; strategies are listed as they first trade"""
+        layout = QHBoxLayout()
+        symbol_filter = QLineEdit()
+        symbol_filter.setFont(self.default_font)
+        symbol_filter.setPlaceholderText("Filter by ticker")
+        strategy_filter = QComboBox()
+        strategy_filter.setFont(self.default_font)
+        strategy_filter.addItem("All Strategies")
+        model.strategy_added.connect(strategy_filter.addItem)
+
+        def apply_filter():
+            strategy = strategy_filter.currentText() if strategy_filter.currentIndex() > 0 else ""
+            model.set_filter(symbol_filter.text(), strategy)
+
+        symbol_filter.textChanged.connect(apply_filter)
+        strategy_filter.currentIndexChanged.connect(apply_filter)
+        layout.addWidget(symbol_filter)
+        layout.addWidget(strategy_filter)
+        return layout
+
+    def _style_log_view(self, view):
+        # Sortable by any column; the initial order is the order trades happened in
+        view.horizontalHeader().setSortIndicator(-1, Qt.AscendingOrder)
+        view.setSortingEnabled(True)
+        # Fixed row heights keep scrolling through thousands of rows cheap
+        view.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
+        view.verticalHeader().setDefaultSectionSize(view.fontMetrics().height() + 8)
+        view.setWordWrap(False)
+        view.horizontalHeader().setStretchLastSection(True)
+        view.setShowGrid(True)
+        view.setAlternatingRowColors(True)
+        view.setStyleSheet("""
+            QTableView {
                 gridline-color: #d3d3d3;
                 background-color: white;
                 alternate-background-color: #f5f5f5;
@@ -233,11 +294,6 @@ class TradingDashboard(QMainWindow):
             }
         """)
 
-        layout.addWidget(self.closed_trades_table)
-        group.setLayout(layout)
-        self.main_layout.addWidget(group)
-
-
     def create_strategy_pnl_section(self):
         group = QGroupBox("Live PnL by Strategy")
         group.setFont(self.header_font)
@@ -304,15 +360,54 @@ class TradingDashboard(QMainWindow):
         group.setFont(self.header_font)
         layout = QVBoxLayout()
 
-        self.system_log = QTextEdit()
+        self.system_log = QPlainTextEdit()
         self.system_log.setFont(self.default_font)
         self.system_log.setReadOnly(True)
         self.system_log.setMinimumHeight(150)
+        # Oldest lines are discarded past the limit, so a full day costs the same as a minute
+        self.system_log.setMaximumBlockCount(self.log_max_lines)
+
+        self.log_level_combo = QComboBox()
+        self.log_level_combo.setFont(self.default_font)
+        self.log_level_combo.addItems(list(LOG_LEVELS))
+        self.log_level_combo.setCurrentText(self.log_level)
+        self.log_level_combo.currentTextChanged.connect(self.set_log_level)
 
+        layout.addWidget(self.log_level_combo)
         layout.addWidget(self.system_log)
         group.setLayout(layout)
         self.main_layout.addWidget(group)
 
+    def create_latency_section(self):
+        group = QGroupBox("Pipeline Latency (microseconds)")
+        group.setFont(self.header_font)
+        layout = QVBoxLayout()
+
+        self.latency_table = QTableWidget()
+        self.latency_table.setFont(self.default_font)
+        self.latency_table.setColumnCount(5)
+        self.latency_table.setRowCount(0)
+        self.latency_table.setMinimumHeight(150)
+
+        headers = ["Stage", "Count", "p50", "p99", "Max"]
+        self.latency_table.setHorizontalHeaderLabels(headers)
+        self.latency_table.setColumnWidth(0, 300)  # Stage
+        for col in range(1, 5):
+            self.latency_table.setColumnWidth(col, 120)
+
+        header = self.latency_table.horizontalHeader()
+        header.setFont(self.header_font)
+        header.setDefaultAlignment(Qt.AlignLeft)
+
+        self.export_latency_button = QPushButton("Export Latency Report")
+        self.export_latency_button.setFont(self.default_font)
+        self.export_latency_button.clicked.connect(self.export_latency_report)
+
+        layout.addWidget(self.latency_table)
+        layout.addWidget(self.export_latency_button)
+        group.setLayout(layout)
+        self.main_layout.addWidget(group)
+
     def create_control_buttons(self):
         button_container = QWidget()
         button_layout = QHBoxLayout(button_container)
@@ -396,13 +491,53 @@ class TradingDashboard(QMainWindow):
         """Setup timer for updating time display"""
         self.timer = QTimer()
         self.timer.timeout.connect(self.update_time)
+        self.timer.timeout.connect(self.update_latency_table)
         self.timer.start(1000)  # Update every second
 
+        # Queued log messages are written in one batch per tick
+        self.log_timer = QTimer()
+        self.log_timer.timeout.connect(self.flush_system_log)
+        self.log_timer.start(250)
+
     def update_time(self):
         """Update the time display"""
         current_time = QDateTime.currentDateTime().toString('yyyy-MM-dd HH:mm:ss')
         self.time_label.setText(f"Current Date and Time (UTC - YYYY-MM-DD HH:MM:SS formatted): {current_time}")
 
+    def update_latency_table(self):
+        """Show p50/p99/max per pipeline stage and per strategy"""
+        if self.latency_monitor is None:
+            return
+        rows = self.latency_monitor.snapshot()
+        if self.latency_table.rowCount() != len(rows):
+            self.latency_table.setRowCount(len(rows))
+
+        for row, stats in enumerate(rows):
+            values = [stats['stage'], str(stats['count']), str(stats['p50_us']),
+                      str(stats['p99_us']), str(stats['max_us'])]
+            for col, value in enumerate(values):
+                item = self.latency_table.item(row, col)
+                if item is None:
+                    item = QTableWidgetItem()
+                    self.latency_table.setItem(row, col, item)
+                item.setText(value)
+
+    def export_latency_report(self):
+        """Write the latency histograms to a CSV file in the working directory"""
+        if self.latency_monitor is None:
+            self.add_to_system_log("No latency data to export yet")
+            return
+        path = f"latency_{QDateTime.currentDateTime().toString('yyyyMMdd_HHmmss')}.csv"
+        try:
+            self.latency_monitor.export(path)
+            self.add_to_system_log(f"Latency report written to {path}")
+        except OSError as e:
+            self.add_to_system_log(f"Error writing latency report: {str(e)}")
+
+    def closeEvent(self, event):
+        self.closed.emit()
+        event.accept()
+
     def update_pnl_color(self, widget, value):
         """Helper function to set PnL colors"""
         try:
@@ -416,17 +551,64 @@ class TradingDashboard(QMainWindow):
             pass
 
 
-    def add_to_system_log(self, message):
-        """Add a message to the system log"""
-        if hasattr(self, 'system_log'):
-            # Append new message with a newline
-            current_text = self.system_log.toPlainText()
-            if current_text:
-                self.system_log.append(message)  # append adds a newline automatically
-            else:
-                self.system_log.setText(message)
-
-            # Auto-scroll to the bottom
-            self.system_log.verticalScrollBar().setValue(
-                self.system_log.verticalScrollBar().maximum()
-            )
\ No newline at end of file
+    def update_with_signal(self, signal):
+        """Log an approved strategy signal; only its fields are kept, not the signal itself"""
+        self.add_to_system_log(
+            f"{signal.time_str} - Signal: {signal.signal_type.name} {signal.symbol} @ {signal.price:.2f} "
+            f"({signal.strategy_name}{': ' + signal.reason if signal.reason else ''})"
+        )
+
+    def set_log_level(self, level):
+        self.log_level = level
+        if self.log_level_combo.currentText() != level:
+            self.log_level_combo.setCurrentText(level)
+
+    def set_log_capacity(self, max_lines):
+        """Lines kept in the log panel; also bounds the messages waiting for a flush"""
+        self.log_max_lines = max_lines
+        self._log_queue = deque(self._log_queue, maxlen=max_lines)
+        self.system_log.setMaximumBlockCount(max_lines)
+
+    def log_enabled(self, level, source=""):
+        """Whether a message would be shown; check it before building an expensive message"""
+        return LOG_LEVELS.get(level, 20) >= LOG_LEVELS[self.log_level] and source not in self.muted_log_sources
+
+    def add_to_system_log(self, message, level="INFO", source="", *args):
+        """
+        Queue a message for the system log; safe to call from any thread
+        With args, the message is %-formatted only once it is written.
+        """
+        if LOG_LEVELS.get(level, 20) < LOG_LEVELS[self.log_level] or source in self.muted_log_sources:
+            return
+        self._log_queue.append((time.time(), level, source, message, args))
+
+    def flush_system_log(self):
+        """Write the queued messages to the panel in one append"""
+        queue = self._log_queue
+        if not queue:
+            return
+        lines = []
+        while queue:
+            timestamp, level, source, message, args = queue.popleft()
+            if args:
+                message = message % args
+            prefix = self._stamp(timestamp)
+            if level != "INFO":
+                prefix += f" - {level}"
+            if source:
+                prefix += f" - {source}"
+            lines.append(f"{prefix}: {message}")
+        self.system_log.appendPlainText("\n".join(lines))
+
+        # Auto-scroll to the bottom
+        self.system_log.verticalScrollBar().setValue(
+            self.system_log.verticalScrollBar().maximum()
+        )
+
+    def _stamp(self, timestamp):
+        # Messages come in bursts within the same second; format the time once per second
+        second = int(timestamp)
+        if second != self._log_second:
+            self._log_second = second
+            self._log_stamp = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(second))
+        return self._log_stamp
@@ -0,0 +1,160 @@
+from typing import Dict
+
+from config import TradingConfig
+from market_data_handler import MarketDataHandler
+from order_execution import ExecutionEngine, IBBroker, RateLimiter
+from paper_broker import FillModel, PaperBroker
+from state_snapshot import StateSnapshot
+from strategies.strategy_manager import StrategyManager
+from strategies.strategy1 import Strategy1
+from strategies.strategy2 import Strategy2
+from strategies.strategy3 import Strategy3
+from strategies.strategy4 import Strategy4
+from trade_journal import TradeJournal
+
+STRATEGY_CLASSES = (Strategy1, Strategy2, Strategy3, Strategy4)
+
+
+class TradingSession:
+    """
+    Market data, strategies, risk and execution wired together, without any GUI
+    `dashboard` only needs add_to_system_log() and update_with_signal(); the
+    settings window passes its TradingDashboard, the headless runner a logger.
+    Everything but configure() runs on the engine's asyncio loop.
+    """
+
+    def __init__(self, dashboard, config: TradingConfig, client_id: int = 199):
+        self.dashboard = dashboard
+        self.config = config
+        self.account_id = ""
+
+        self.market_data = MarketDataHandler(client_id=client_id)
+        self.market_data.ticker_file = config.ticker_file
+        self.market_data.dashboard_logger = dashboard.add_to_system_log
+        self.market_data.data_callback = self.process_market_data
+
+        self.strategy_manager = StrategyManager(dashboard, self.market_data, config)
+        # All strategies share one set of bars and indicators
+        for strategy_class in STRATEGY_CLASSES:
+            self.strategy_manager.register_strategy(strategy_class)
+
+    def configure(self, settings: Dict):
+        """
+        Apply settings in the format the settings window saves: 'global' (account and
+        trading hours), 'position' (limits) and 'strategies' keyed by display name
+        """
+        global_settings = settings.get("global", {})
+        position = settings.get("position", {})
+        self.account_id = global_settings.get("account_id", "")
+
+        # Enforce the limits across every strategy through the risk gate
+        self.strategy_manager.risk_gate.configure(
+            max_positions=position.get("max_positions", 5),
+            max_position_dollars=position.get("max_position_dollars", 5000.0),
+            min_stock_price=position.get("min_stock_price", 5.0),
+            max_stock_price=position.get("max_stock_price", 200.0),
+            trading_start=global_settings.get("trading_start", "09:30"),
+            trading_end=global_settings.get("trading_end", "16:00"),
+            max_symbol_positions=self.config.max_symbol_positions,
+            max_daily_loss=self.config.max_daily_loss
+        )
+
+        strategy_settings = settings.get("strategies", {})
+        for strategy in self.strategy_manager.strategies.values():
+            strategy.max_position_dollars = position.get("max_position_dollars", 5000.0)
+            # Settings are keyed by display name, e.g. "Strategy 2 : 5 Min EMA Cross with ATR Sell"
+            values = next((values for name, values in strategy_settings.items()
+                           if name.startswith(f"Strategy {strategy.number} ")), {})
+            strategy.enabled = values.get("enabled", False)
+            if strategy.enabled:
+                strategy.profit_target_percent = values.get("profit_target_percent", 3.0)
+                strategy.stop_loss_percent = values.get("stop_loss_percent", 2.0)
+                strategy.max_trades_per_day = values.get("max_trades_per_day", 5)
+
+    async def start(self):
+        """Connect, restore state, load history and start the real-time subscriptions"""
+        log = self.dashboard.add_to_system_log
+        try:
+            # Step 1: Connect to IB
+            log("Connecting to Interactive Brokers...")
+            await self.market_data.connect_ib(port=self.config.ib_port, host=self.config.ib_host)
+
+            # Step 1b: Set up order execution, simulated unless IB routing is configured
+            if self.config.execution_mode == 'ib':
+                broker = IBBroker(
+                    self.market_data.ib,
+                    contracts=self.market_data.contracts,
+                    account=self.account_id
+                )
+            else:
+                broker = PaperBroker(FillModel(
+                    slippage_bps=self.config.paper_slippage_bps,
+                    latency_ms=self.config.paper_latency_ms,
+                    participation=self.config.paper_participation
+                ))
+            log(f"Order execution mode: {self.config.execution_mode}")
+            self.strategy_manager.attach_execution(ExecutionEngine(
+                broker,
+                self.strategy_manager.position_book,
+                rate_limiter=RateLimiter(self.config.order_rate_limit),
+                bracket_orders=self.config.bracket_orders
+            ))
+            if not self.config.live_trading_enabled:
+                log("Live trading disabled: signals will not be sent as orders")
+
+            # Step 1c: Restore bars, indicators, positions and trade counts before any bar arrives
+            if self.config.journal_enabled:
+                self.strategy_manager.attach_journal(TradeJournal(self.config.journal_path))
+            if self.config.snapshot_enabled:
+                self.strategy_manager.attach_snapshots(StateSnapshot(
+                    self.config.snapshot_path,
+                    interval=self.config.snapshot_interval,
+                    max_age=self.config.snapshot_max_age
+                ))
+            snapshot_time = self.strategy_manager.warm_start()
+
+            # Step 2: Load tickers
+            log("Loading ticker list...")
+            self.market_data.load_tickers()
+
+            # Step 3: Fetch initial historical data, or only the bars missed since the snapshot
+            if snapshot_time is not None:
+                log("Topping up market data since the snapshot...")
+                await self.market_data.top_up_market_data(snapshot_time)
+                self.strategy_manager.indicators.top_up()
+            else:
+                log("Fetching initial market data...")
+                await self.market_data.fetch_all_market_data()
+
+            # Step 4: Start real-time data subscriptions
+            log("Starting real-time data subscriptions...")
+            await self.market_data.start_all_realtime_data()
+
+            log("Market data system fully initialized")
+
+        except Exception as e:
+            log(f"Error initializing market data: {str(e)}", "ERROR")
+            raise
+
+    def process_market_data(self, data: Dict):
+        """Run one live bar package through the strategies"""
+        try:
+            # Per-bar trace, formatted only if the log level is DEBUG
+            self.dashboard.add_to_system_log(
+                "Processing market data for %s on %smin timeframe", "DEBUG", "Market Data",
+                data['symbol'], data['timeframe']
+            )
+            self.strategy_manager.process_market_data(data)
+
+        except Exception as e:
+            self.dashboard.add_to_system_log(f"Error processing market data: {str(e)}", "ERROR")
+
+    async def stop(self):
+        """Checkpoint the journal, save a snapshot and disconnect"""
+        if self.strategy_manager.journal is not None:
+            self.strategy_manager.checkpoint_journal()
+            self.strategy_manager.journal.close()
+        if self.strategy_manager.snapshots is not None:
+            self.strategy_manager.save_snapshot()
+            self.strategy_manager.snapshots.wait()
+        await self.market_data.disconnect()